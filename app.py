@@ -1,34 +1,121 @@
+import click
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from flask_migrate import Migrate
 import os
+from services.db_routing import RoutingSession
 
-db = SQLAlchemy()
+# Sessão com roteamento leitura/escrita (ver services/db_routing.py)
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 login_manager = LoginManager()
 migrate = Migrate()
 
-def create_app():
+def background_services_enabled(app):
+    """Threads de fundo (SSE, base do assistente, importações) só em quem atende requisições
+
+    Comandos da CLI (`flask db upgrade`, `flask shell`, `flask rollups ...`)
+    não as iniciam: rodam antes das migrações e não servem ninguém. `flask run`
+    e run.py iniciam. BACKGROUND_SERVICES força um ou outro comportamento.
+    """
+    forcado = app.config.get('BACKGROUND_SERVICES')
+    if forcado is not None:
+        return bool(forcado)
+    if os.environ.get('FLASK_RUN_FROM_CLI') != 'true':
+        return True
+    contexto = click.get_current_context(silent=True)
+    return contexto is not None and contexto.info_name == 'run'
+
+def create_app(config=None):
     print("hi")
     app = Flask(__name__)
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///network.db'
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///network.db')
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-    app.config['SECRET_KEY'] = os.urandom(24)
+    # Fixa em produção: vários workers (e o servidor de eventos SSE) precisam da mesma chave
+    app.config['SECRET_KEY'] = os.getenv('SECRET_KEY') or os.urandom(24)
+    # Sobrescritas pontuais (ex.: banco temporário nos benchmarks)
+    app.config.update(config or {})
     
     login_manager.init_app(app)
     login_manager.login_view = 'web.login'
     login_manager.login_message = 'Por favor, faça login para acessar esta página.'
     login_manager.login_message_category = 'warning'
     
+    # Perfil do SQLite (WAL, mmap, busy timeout...); SQLITE_PROFILE = None mantém os padrões do driver
+    from services.sqlite_profile import engine_options, install_profile, sqlite_profile
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {**engine_options(app), **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})}
+    
     db.init_app(app)
     migrate.init_app(app, db)
 
+    perfil = sqlite_profile(app)
+    if perfil is not None:
+        with app.app_context():
+            install_profile(db.engine, perfil)
+
     with app.app_context():
         from models.switch import Switch
         from models.user import User
         from models.data_dictionary import DataDictionary
+        from models.import_job import ImportJob
+        from models.switch_rollup import SwitchRollup
         db.create_all()
 
+    # Agregações de switch_rollups, se a migração já criou os triggers (senão, consultas em switches)
+    from services import fleet_rollups
+    fleet_rollups.init_app(app)
+    app.cli.add_command(fleet_rollups.rollups_cli)
+
+    # Versão do inventário no banco (triggers da migração), comum a todos os workers
+    from services import inventory_state
+    inventory_state.init_app(app)
+
+    # `flask indexes advise`: EXPLAIN QUERY PLAN das consultas do app
+    from services.index_advisor import indexes_cli
+    app.cli.add_command(indexes_cli)
+
+    # Views somente leitura consultam a réplica (SQLALCHEMY_READ_URI) ou um pool
+    # somente leitura do mesmo arquivo SQLite; escritas ficam no primário
+    from services.db_routing import read_router
+    read_router.init_app(app, db)
+
+    # Busca textual (FTS5) da lista de switches e do assistente, se a migração já criou o índice
+    from services.switch_search import switch_search
+    switch_search.init_app(app)
+
+    # Pool de importações em segundo plano; jobs interrompidos só são retomados
+    # por quem atende requisições, nunca por um comando da CLI
+    from services.import_jobs import import_jobs
+    servicos = background_services_enabled(app)
+    import_jobs.init_app(app, resume=servicos)
+
+    # Limite de concorrência das consultas do assistente
+    from services.query_gate import query_gate
+    query_gate.init_app(app)
+
+    # Motores opcionais do assistente (requerem NumPy): snapshot colunar para
+    # perguntas analíticas e índice local para perguntas em texto livre
+    from network_system_rag import network_system
+    if app.config.get('ASSISTANT_ANALYTICS', True):
+        network_system.enable_analytics()
+    if app.config.get('ASSISTANT_RETRIEVAL', True):
+        network_system.enable_retrieval()
+
+    # Base de conhecimento do assistente: atualizada quando o inventário muda
+    # e a cada KNOWLEDGE_REFRESH_INTERVAL segundos, nunca dentro de uma requisição
+    # nem aqui na inicialização (a primeira rodada é feita pela thread)
+    from services.knowledge_refresh import knowledge_refresher
+    from services.live_updates import live_updates
+    if servicos:
+        knowledge_refresher.init_app(app, network_system)
+        # Eventos SSE do inventário (dashboard e painel do assistente)
+        live_updates.init_app(app)
+
+    # Entrega dos eventos num laço asyncio em LIVE_SSE_PORT (sem thread por conexão);
+    # os templates sempre recebem a URL, mesmo quando a porta é de outro worker
+    from services.sse_fanout import sse_fanout
+    sse_fanout.init_app(app, start=servicos)
+
     # Registrar rotas web
     from routes.web import web_bp
     app.register_blueprint(web_bp)
@@ -36,6 +123,10 @@ def create_app():
     # Registrar rotas da API para o sistema de consultas
     from routes.network_api import network_api_bp
     app.register_blueprint(network_api_bp, url_prefix='/api')
+
+    # API REST versionada de switches (projeção ?fields= e paginação por cursor)
+    from routes.switches_api import switches_api_bp
+    app.register_blueprint(switches_api_bp, url_prefix='/api/v1')
     
     return app
 
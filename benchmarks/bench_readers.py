@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos leitores de inventário: linhas/s por formato
+
+Gera um inventário sintético (100k linhas por padrão) em cada formato e mede
+a leitura em streaming e a leitura + mapeamento/validação (`row_to_mapping`
++ hash de conteúdo), que é o caminho compartilhado por todos os formatos.
+
+    python benchmarks/bench_readers.py --rows 100000 --formats csv ndjson parquet xlsx
+"""
+
+import argparse
+import csv
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.switch import compute_content_hash
+from services.readers import COLUMNS, FIELD_ORDER, iter_rows
+from services.switch_import import row_to_mapping
+
+FABRICANTES = ['Cisco', 'HP', 'Dlink', 'Tp-Link', 'Mikrotik']
+STATUS = ['Em produção', 'Inativo', 'Manutenção']
+UNIDADES = ['Sede', 'Filial Norte', 'Filial Sul', 'Matriz']
+
+
+def synthetic_rows(total, seed=42):
+    rnd = random.Random(seed)
+    hoje = date.today()
+    for i in range(total):
+        row = [None] * len(COLUMNS)
+        row[0] = f'SW-{i:06d}'
+        row[1] = f'SW-{rnd.choice(UNIDADES).upper().replace(" ", "-")}-{i:06d}'
+        row[2] = rnd.choice(STATUS)
+        row[3] = rnd.choice(['Alta', 'Média', 'Baixa'])
+        row[4] = 'Produção'
+        row[5] = rnd.choice(UNIDADES)
+        row[6] = f'CPD - Sala {rnd.randint(1, 20)}'
+        row[7] = f'Rack-{rnd.randint(1, 40):02d}'
+        row[10] = rnd.choice(FABRICANTES)
+        row[11] = f'MODEL-{rnd.randint(1000, 9999)}'
+        row[12] = f'SN{rnd.getrandbits(40):010X}'
+        row[13] = rnd.choice(['Core', 'Acesso', 'Distribuição'])
+        row[15] = rnd.choice([24, 48])
+        row[16] = rnd.randint(0, row[15])
+        row[19] = rnd.choice(['Sim', 'Não'])
+        row[22] = f'10.{rnd.randint(0, 255)}.{rnd.randint(0, 255)}.{rnd.randint(1, 254)}'
+        row[25] = rnd.randint(1, 4094)
+        row[42] = (hoje - timedelta(days=rnd.randint(0, 3000))).strftime('%d/%m/%Y')
+        row[43] = round(rnd.uniform(1500, 90000), 2)
+        row[48] = (hoje + timedelta(days=rnd.randint(-400, 1200))).strftime('%d/%m/%Y')
+        row[55] = 'Switch sintético para benchmark'
+        yield row
+
+
+def write_csv(path, total):
+    with open(path, 'w', newline='', encoding='utf-8') as arquivo:
+        writer = csv.writer(arquivo)
+        writer.writerow([cabecalho for cabecalho, _ in COLUMNS])
+        writer.writerows(synthetic_rows(total))
+
+
+def write_ndjson(path, total):
+    with open(path, 'w', encoding='utf-8') as arquivo:
+        for row in synthetic_rows(total):
+            arquivo.write(json.dumps(dict(zip(FIELD_ORDER, row)), ensure_ascii=False))
+            arquivo.write('\n')
+
+
+def write_parquet(path, total, batch=20000):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    writer = None
+    rows = synthetic_rows(total)
+    while True:
+        lote = [row for _, row in zip(range(batch), rows)]
+        if not lote:
+            break
+        colunas = {campo: [row[i] for row in lote] for i, campo in enumerate(FIELD_ORDER)}
+        tabela = pa.table(colunas)
+        if writer is None:
+            writer = pq.ParquetWriter(path, tabela.schema)
+        writer.write_table(tabela)
+    writer.close()
+
+
+def write_xlsx(path, total):
+    import openpyxl
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet('Inventario Switches')
+    sheet.append(['Inventário sintético'])
+    sheet.append([cabecalho for cabecalho, _ in COLUMNS])
+    for row in synthetic_rows(total):
+        sheet.append(row)
+    workbook.save(path)
+
+
+WRITERS = {'csv': write_csv, 'ndjson': write_ndjson, 'parquet': write_parquet, 'xlsx': write_xlsx}
+
+
+def measure(path):
+    inicio = time.perf_counter()
+    lidas = sum(1 for _ in iter_rows(path))
+    leitura = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    for row in iter_rows(path):
+        mapping = row_to_mapping(row, None, row[0])
+        compute_content_hash(mapping)
+    completo = time.perf_counter() - inicio
+    return lidas, leitura, completo
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--formats', nargs='+', default=['csv', 'ndjson', 'parquet', 'xlsx'])
+    args = parser.parse_args()
+
+    print(f"📊 Leitores de inventário - {args.rows} linhas sintéticas")
+    print(f"{'formato':<10}{'tamanho':>12}{'leitura (linhas/s)':>22}{'leitura+validação (linhas/s)':>32}")
+    with tempfile.TemporaryDirectory() as pasta:
+        for formato in args.formats:
+            path = os.path.join(pasta, f'inventario.{formato}')
+            try:
+                WRITERS[formato](path, args.rows)
+            except ImportError as e:
+                print(f"{formato:<10}  ignorado ({e})")
+                continue
+            lidas, leitura, completo = measure(path)
+            tamanho = os.path.getsize(path) / 1024 / 1024
+            print(f"{formato:<10}{tamanho:>10.1f}MB{lidas / leitura:>22,.0f}{lidas / completo:>32,.0f}")
+
+
+if __name__ == '__main__':
+    main()
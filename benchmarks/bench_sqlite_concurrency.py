@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Benchmark de concorrência do SQLite: importação gravando enquanto o dashboard lê
+
+Para cada perfil (padrão do driver e SQLITE_PROFILE ajustado) cria um banco
+temporário com uma carga inicial, dispara uma importação em lotes
+(SwitchImporter, um commit por lote) e, ao mesmo tempo, N threads repetem as
+leituras do dashboard (resumo da frota + primeira página da lista). A
+importação roda em outro processo, como um worker separado, para o GIL não
+misturar espera de CPU com espera de lock. Mede a latência das leituras
+(p50/p95/máx), erros "database is locked" e o tempo da importação.
+
+    python benchmarks/bench_sqlite_concurrency.py --base 20000 --rows 20000 --readers 4
+"""
+
+import argparse
+import multiprocessing
+import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_readers import synthetic_rows
+
+
+def _app(caminho, perfil):
+    from app import create_app
+    from services.fleet_rollups import install_rollups
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{caminho}',
+        'SQLITE_PROFILE': perfil,
+        'KNOWLEDGE_REFRESH_INTERVAL': 0,
+    })
+    # Banco temporário sem migrações: triggers de switch_rollups como em produção
+    with app.app_context():
+        install_rollups()
+    return app
+
+
+def importar(caminho, perfil, rows, seed, prefixo, saida):
+    from app import db
+    from services.switch_import import SwitchImporter
+    app = _app(caminho, perfil)
+    inicio = time.perf_counter()
+    with app.app_context():
+        linhas = ([f'SW-{prefixo}{row[0][3:]}'] + row[1:] for row in synthetic_rows(rows, seed=seed))
+        resultado = SwitchImporter(criado_por=None).run(linhas)
+        db.engine.dispose()
+    saida.put((resultado.imported, len(resultado.errors), time.perf_counter() - inicio))
+
+
+def run(perfil, base, rows, readers, limite):
+    from app import db
+    from services.dashboard_stats import _compute
+    from services.switch_pagination import keyset_page
+    from models.switch import Switch
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, 'bench.db')
+        # spawn: um fork com as threads do app já rodando pode herdar locks presos
+        contexto = multiprocessing.get_context('spawn')
+        saida = contexto.Queue()
+        importar(caminho, perfil, base, 1, '0', saida)
+        saida.get()
+
+        app = _app(caminho, perfil)
+        parar = threading.Event()
+        latencias, erros = [], []
+
+        def leitor():
+            with app.app_context():
+                while not parar.is_set():
+                    inicio = time.perf_counter()
+                    try:
+                        _compute()
+                        keyset_page(Switch.query)
+                        latencias.append(time.perf_counter() - inicio)
+                    except Exception as e:
+                        erros.append(str(e))
+                    finally:
+                        db.session.remove()
+
+        threads = [threading.Thread(target=leitor) for _ in range(readers)]
+        for thread in threads:
+            thread.start()
+        # IDs novos (SW-1xxxxxx) para não colidir com a carga inicial
+        processo = contexto.Process(target=importar, args=(caminho, perfil, rows, 2, '1', saida))
+        processo.start()
+        try:
+            importadas, erros_importacao, importacao = saida.get(timeout=limite)
+            travou = False
+        except queue.Empty:
+            # Importação parada atrás dos leitores: solta os leitores e espera ela terminar
+            travou = True
+            parar.set()
+            importadas, erros_importacao, importacao = saida.get()
+        processo.join()
+        parar.set()
+        for thread in threads:
+            thread.join()
+        with app.app_context():
+            db.engine.dispose()
+
+    latencias.sort()
+
+    def pct(p):
+        return latencias[min(len(latencias) - 1, int(len(latencias) * p / 100))] * 1000 if latencias else float('nan')
+    return {
+        'importadas': importadas,
+        'importacao_s': importacao,
+        'leituras': len(latencias),
+        'p50': pct(50), 'p95': pct(95), 'max': latencias[-1] * 1000 if latencias else float('nan'),
+        'erros': len(erros) + erros_importacao,
+        'travou': travou,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--base', type=int, default=20000, help='switches antes da importação')
+    parser.add_argument('--rows', type=int, default=20000, help='switches importados durante a leitura')
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--limit', type=float, default=60, help='segundos de leitura antes de soltar a importação')
+    args = parser.parse_args()
+
+    print(f'{args.base} switches + importação de {args.rows}, {args.readers} leitores')
+    for nome, perfil in (('padrão', None), ('ajustado', {})):
+        r = run(perfil, args.base, args.rows, args.readers, args.limit)
+        print(f"  {nome:<9} importação {r['importacao_s']:6.2f}s ({r['importadas']} linhas) | "
+              f"{r['leituras']:5d} leituras  p50 {r['p50']:7.1f}ms  p95 {r['p95']:7.1f}ms  "
+              f"máx {r['max']:7.1f}ms | erros {r['erros']}")
+        if r['travou']:
+            print(f"            importação não terminou em {args.limit:.0f}s com leitores ativos; "
+                  f"só terminou depois que eles pararam")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark de GET /api/stats: requisições/s com um inventário sintético
+
+Cria a aplicação num banco SQLite temporário, carrega N switches (50k por
+padrão) e mede o endpoint com o cliente de testes do Flask (sem rede, sem
+login), em série e com várias threads.
+
+    python benchmarks/bench_stats_endpoint.py --rows 50000 --requests 2000 --threads 1 8
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FABRICANTES = ['Cisco', 'HP', 'Dlink', 'Tp-Link', 'Mikrotik']
+STATUS = ['Em produção', 'Inativo', 'Manutenção']
+UNIDADES = ['Sede', 'Filial Norte', 'Filial Sul', 'Matriz']
+
+
+def populate(db, total, seed=42):
+    from models.switch import Switch, mark_inventory_changed
+    rnd = random.Random(seed)
+    hoje = date.today()
+    linhas = [
+        {
+            'id_ativo': f'SW-{i:06d}',
+            'nome_switch': f'SW-{i:06d}',
+            'status_funcionamento': rnd.choice(STATUS),
+            'criticidade': rnd.choice(['Alta', 'Média', 'Baixa']),
+            'ambiente': 'Produção',
+            'unidade': rnd.choice(UNIDADES),
+            'fabricante': rnd.choice(FABRICANTES),
+            'modelo': f'MODEL-{rnd.randint(1000, 9999)}',
+            'tipo_switch': rnd.choice(['Core', 'Acesso', 'Distribuição']),
+            'valor_aquisicao': round(rnd.uniform(1500, 90000), 2),
+            'fim_garantia': hoje + timedelta(days=rnd.randint(-400, 1200)),
+        }
+        for i in range(total)
+    ]
+    db.session.execute(Switch.__table__.insert(), linhas)
+    mark_inventory_changed(db.session)
+    db.session.commit()
+
+
+def measure(app, total_requests, threads):
+    def worker(quantidade):
+        cliente = app.test_client()
+        for _ in range(quantidade):
+            resposta = cliente.get('/api/stats')
+            assert resposta.status_code == 200, resposta.status_code
+
+    por_thread = total_requests // threads
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(worker, [por_thread] * threads))
+    return por_thread * threads / (time.perf_counter() - inicio)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 8])
+    args = parser.parse_args()
+
+    from app import create_app, db
+    from services.fleet_rollups import install_rollups
+    with tempfile.TemporaryDirectory() as pasta:
+        app = create_app({
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{os.path.join(pasta, "bench.db")}',
+            'LOGIN_DISABLED': True,
+            'KNOWLEDGE_REFRESH_INTERVAL': 0,
+        })
+        with app.app_context():
+            # Banco temporário sem migrações: triggers de switch_rollups como em produção
+            install_rollups()
+            populate(db, args.rows)
+
+        cliente = app.test_client()
+        cliente.get('/api/stats')  # aquecimento
+        print(f'{args.rows} switches, {args.requests} requisições por rodada')
+        for threads in args.threads:
+            print(f'  {threads:>2} thread(s): {measure(app, args.requests, threads):8.1f} req/s')
+        with app.app_context():
+            db.engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark da API v1 de switches: projeção + serializador gerado vs to_dict()
+
+Carrega uma frota sintética num banco temporário e mede a listagem de N
+switches (10k por padrão):
+
+- ORM + to_dict(): objetos completos, ~60 campos com isoformat por campo, json
+- projeção: só as colunas de `--fields` no SELECT + serializador gerado,
+  com o json da biblioteca padrão e com orjson (se instalado)
+- HTTP: GET /api/v1/switches?fields=...&limit=N pelo cliente de teste do Flask
+
+    python benchmarks/bench_switch_api.py --rows 10000 --fields id_ativo,nome_switch,status_funcionamento,ip_gestao,fim_garantia
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_readers import synthetic_rows
+
+
+def cronometrar(funcao, repeat):
+    """(mediana em ms, bytes do último resultado)"""
+    amostras = []
+    for _ in range(repeat):
+        inicio = time.perf_counter()
+        corpo = funcao()
+        amostras.append(time.perf_counter() - inicio)
+    return statistics.median(amostras) * 1000, len(corpo)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=10000, help='switches listados')
+    parser.add_argument('--fields', default='id_ativo,nome_switch,status_funcionamento,ip_gestao,fim_garantia')
+    parser.add_argument('--repeat', type=int, default=10, help='execuções por variante (mediana)')
+    args = parser.parse_args()
+
+    from app import create_app, db
+    from models.switch import Switch
+    from models.user import User
+    from services.switch_import import SwitchImporter
+    from services.switch_serializer import ORJSON, columns, dumps, parse_fields, serializer
+
+    campos = parse_fields(args.fields)
+    with tempfile.TemporaryDirectory() as pasta:
+        app = create_app({
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(pasta, 'bench.db')}",
+            'KNOWLEDGE_REFRESH_INTERVAL': 0,
+            'ASSISTANT_ANALYTICS': False,
+            'ASSISTANT_RETRIEVAL': False,
+        })
+        with app.app_context():
+            SwitchImporter(criado_por=None).run(synthetic_rows(args.rows))
+            usuario = User(username='bench', email='bench@example.com', name='Bench')
+            usuario.set_password('bench')
+            db.session.add(usuario)
+            db.session.commit()
+            usuario_id = usuario.id
+
+            def orm_to_dict():
+                switches = Switch.query.order_by(Switch.id_ativo).limit(args.rows).all()
+                corpo = json.dumps([switch.to_dict() for switch in switches], ensure_ascii=False).encode('utf-8')
+                db.session.remove()
+                return corpo
+
+            def projecao(colunas, usar_orjson):
+                def executar():
+                    rows = db.session.query(*columns(colunas)).order_by(Switch.id_ativo).limit(args.rows).all()
+                    corpo = dumps(serializer(colunas, usar_orjson)(rows), usar_orjson)
+                    db.session.remove()
+                    return corpo
+                return executar
+
+            variantes = [('ORM + to_dict() + json', orm_to_dict)]
+            encoders = [('json', False)] + ([('orjson', True)] if ORJSON else [])
+            for nome, usar_orjson in encoders:
+                variantes.append((f'{len(campos)} campos, serializador + {nome}', projecao(campos, usar_orjson)))
+            for nome, usar_orjson in encoders:
+                variantes.append((f'todos os campos, serializador + {nome}', projecao(parse_fields(None), usar_orjson)))
+
+            resultados = [(nome, *cronometrar(funcao, args.repeat)) for nome, funcao in variantes]
+
+        cliente = app.test_client()
+        with cliente.session_transaction() as sessao:
+            sessao['_user_id'] = str(usuario_id)
+        url = f'/api/v1/switches?fields={",".join(campos)}&limit={args.rows}'
+        resultados.append((f'HTTP {url.split("?")[0]} ({len(campos)} campos)',
+                           *cronometrar(lambda: cliente.get(url).data, args.repeat)))
+        with app.app_context():
+            db.engine.dispose()
+
+    base = resultados[0][1]
+    print(f'{args.rows} switches, campos: {",".join(campos)}; mediana de {args.repeat} execuções')
+    for nome, ms, tamanho in resultados:
+        print(f'  {nome:<45} {ms:8.1f}ms {tamanho / 1024:8.0f} KiB {base / ms:6.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos índices de switches: consultas do app com e sem os índices
+
+Cria um banco temporário com uma frota sintética (100k switches por padrão),
+remove os índices de `Switch.__table_args__` e mede cada cenário do
+conselheiro (`services/index_advisor.CENARIOS`: lista, totais, dashboard,
+assistente); depois recria os índices, roda ANALYZE e mede de novo. Também
+mede o custo na escrita: importação de um lote extra em cada fase.
+
+    python benchmarks/bench_switch_indexes.py --rows 100000 --repeat 20 --write-rows 10000
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_readers import synthetic_rows
+
+
+def importar(rows, seed, prefixo):
+    from services.switch_import import SwitchImporter
+    linhas = ([f'SW-{prefixo}{row[0][3:]}'] + row[1:] for row in synthetic_rows(rows, seed=seed))
+    inicio = time.perf_counter()
+    resultado = SwitchImporter(criado_por=None).run(linhas)
+    return resultado.imported, time.perf_counter() - inicio
+
+
+def medir(repeat):
+    """{cenário: mediana em ms} e {cenário: varreduras completas} com os índices atuais"""
+    from services.index_advisor import CENARIOS, capture, explain, full_scans
+    from app import db
+    tempos, varreduras = {}, {}
+    for nome, fabrica, _ in CENARIOS:
+        executar = fabrica()
+        executar()
+        amostras = []
+        for _ in range(repeat):
+            inicio = time.perf_counter()
+            executar()
+            amostras.append(time.perf_counter() - inicio)
+            db.session.remove()
+        tempos[nome] = statistics.median(amostras) * 1000
+        varreduras[nome] = any(full_scans(explain(*consulta)) for consulta in capture(executar))
+    return tempos, varreduras
+
+
+def fase(repeat, write_rows, prefixo):
+    """Leituras e depois a escrita de um lote extra (removido em seguida)"""
+    from sqlalchemy import text
+    from app import db
+    tempos, varreduras = medir(repeat)
+    importadas, escrita = importar(write_rows, 3, prefixo) if write_rows else (0, 0)
+    with db.engine.begin() as conn:
+        conn.execute(text('DELETE FROM switches WHERE id_ativo LIKE :prefixo'), {'prefixo': f'SW-{prefixo}%'})
+    return tempos, varreduras, importadas, escrita
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=100000, help='tamanho da frota sintética')
+    parser.add_argument('--repeat', type=int, default=20, help='execuções por cenário (mediana)')
+    parser.add_argument('--write-rows', type=int, default=10000, help='lote importado para medir o custo na escrita')
+    args = parser.parse_args()
+
+    from sqlalchemy import text
+    from app import create_app, db
+    from models.switch import Switch
+    from services.fleet_rollups import install_rollups
+
+    with tempfile.TemporaryDirectory() as pasta:
+        app = create_app({
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(pasta, 'bench.db')}",
+            'KNOWLEDGE_REFRESH_INTERVAL': 0,
+            'ASSISTANT_ANALYTICS': False,
+            'ASSISTANT_RETRIEVAL': False,
+        })
+        indices = list(Switch.__table__.indexes)
+        with app.app_context():
+            # Banco temporário sem migrações: triggers de switch_rollups como em produção
+            install_rollups()
+            importadas, carga = importar(args.rows, 1, '0')
+            print(f'{importadas} switches carregados em {carga:.1f}s; {len(indices)} índices, '
+                  f'{args.repeat} execuções por cenário (mediana)')
+
+            with db.engine.begin() as conn:
+                for indice in indices:
+                    indice.drop(conn)
+                conn.execute(text('ANALYZE'))
+            sem, scans_sem, lote, escrita_sem = fase(args.repeat, args.write_rows, '8')
+
+            with db.engine.begin() as conn:
+                for indice in indices:
+                    indice.create(conn)
+                conn.execute(text('ANALYZE'))
+            com, scans_com, _, escrita_com = fase(args.repeat, args.write_rows, '9')
+            db.engine.dispose()
+
+    print(f"\n  {'cenário':<42} {'sem índices':>12} {'com índices':>12} {'ganho':>7}")
+    for nome in sem:
+        marca = lambda scan: 'SCAN' if scan else '    '
+        print(f"  {nome:<42} {sem[nome]:9.2f}ms {marca(scans_sem[nome])} "
+              f"{com[nome]:7.2f}ms {marca(scans_com[nome])} {sem[nome] / com[nome]:6.1f}x")
+    if args.write_rows:
+        print(f'\n  importação de {lote} linhas: {escrita_sem:.2f}s sem índices, {escrita_com:.2f}s com índices '
+              f'({(escrita_com / escrita_sem - 1) * 100:+.0f}%)')
+
+
+if __name__ == '__main__':
+    main()
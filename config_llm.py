@@ -1,10 +1,197 @@
 # config_llm.py
+"""Cliente de LLM (API compatível com OpenAI Chat Completions) usado como fallback do assistente
+
+- conexões HTTP persistentes em pool, com timeout por chamada;
+- cache de prompt/resposta por versão do inventário (acerto não toca a rede);
+- micro-lotes: pedidos simultâneos são agrupados numa janela curta e os
+  prompts idênticos do lote viram uma única chamada;
+- endpoint configurável (LLM_BASE_URL), ex.: um servidor stub local nos testes.
+"""
+import http.client
+import json
 import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from urllib.parse import urlsplit
+from services.result_cache import MISS, ResultCache
+
+DEFAULT_BASE_URL = 'https://api.openai.com/v1'
+DEFAULT_MODEL = 'gpt-4o-mini'
+DEFAULT_TIMEOUT = 15.0
+POOL_SIZE = 4
+CACHE_SIZE = 256
+BATCH_WINDOW = 0.01
+MAX_BATCH = 8
+
+
+class LLMError(Exception):
+    """Falha de rede, timeout ou resposta inválida do endpoint"""
+
+
+class _ConnectionPool:
+    """Conexões keep-alive reaproveitadas entre chamadas (LIFO: a mais recente está quente)"""
+
+    def __init__(self, base_url, size):
+        partes = urlsplit(base_url)
+        self.https = partes.scheme == 'https'
+        self.host = partes.hostname
+        self.port = partes.port
+        self.path = partes.path.rstrip('/')
+        self._livres = queue.LifoQueue(maxsize=size)
+
+    def _nova(self, timeout):
+        classe = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+        return classe(self.host, self.port, timeout=timeout)
+
+    def request(self, method, path, body, headers, timeout):
+        try:
+            conexao, reaproveitada = self._livres.get_nowait(), True
+        except queue.Empty:
+            conexao, reaproveitada = self._nova(timeout), False
+        try:
+            conexao.timeout = timeout
+            if conexao.sock is not None:
+                conexao.sock.settimeout(timeout)
+            conexao.request(method, self.path + path, body=body, headers=headers)
+            resposta = conexao.getresponse()
+            dados = resposta.read()
+        except (OSError, http.client.HTTPException) as e:
+            conexao.close()
+            if reaproveitada and not isinstance(e, TimeoutError):
+                # Conexão ociosa fechada pelo servidor: uma nova tentativa com conexão nova
+                return self.request(method, path, body, headers, timeout)
+            raise LLMError(f'Falha na chamada ao LLM: {e}')
+        if resposta.will_close:
+            conexao.close()
+        else:
+            try:
+                self._livres.put_nowait(conexao)
+            except queue.Full:
+                conexao.close()
+        return resposta.status, dados
+
+    def close(self):
+        while True:
+            try:
+                self._livres.get_nowait().close()
+            except queue.Empty:
+                return
+
 
 class LLMClient:
-    def __init__(self):
-        # Para futuro uso com OpenAI ou outras LLMs
-        self.api_key = os.getenv('OPENAI_API_KEY')
-    
+    def __init__(self, api_key=None, base_url=None, model=None, timeout=None,
+                 pool_size=POOL_SIZE, cache_size=CACHE_SIZE, batch_window=BATCH_WINDOW, max_batch=MAX_BATCH):
+        self.api_key = api_key if api_key is not None else os.getenv('OPENAI_API_KEY')
+        self.custom_endpoint = base_url is not None or bool(os.getenv('LLM_BASE_URL'))
+        self.base_url = base_url or os.getenv('LLM_BASE_URL') or DEFAULT_BASE_URL
+        self.model = model or os.getenv('LLM_MODEL') or DEFAULT_MODEL
+        self.timeout = timeout or float(os.getenv('LLM_TIMEOUT', DEFAULT_TIMEOUT))
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.cache = ResultCache(cache_size)
+        self.calls = 0
+        self.batches = 0
+        self.deduplicated = 0
+        self._pool = _ConnectionPool(self.base_url, pool_size)
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix='llm-call')
+        self._pendentes = queue.Queue()
+        self._dispatcher = None
+        self._lock = threading.Lock()
+
     def is_available(self):
-        return bool(self.api_key)
\ No newline at end of file
+        # Endpoint próprio (ex.: stub local) dispensa chave
+        return bool(self.api_key) or self.custom_endpoint
+
+    def complete(self, prompt, system=None, version=None, timeout=None):
+        """Resposta do modelo para `prompt`; `version` invalida o cache quando o inventário muda"""
+        key = (self.model, system, prompt)
+        resposta = self.cache.get(key, version)
+        if resposta is not MISS:
+            return resposta
+
+        timeout = timeout or self.timeout
+        future = Future()
+        self._ensure_dispatcher()
+        self._pendentes.put((key, timeout, future))
+        try:
+            # Margem para a janela do lote e a espera por uma conexão livre
+            resposta = future.result(timeout=timeout + self.batch_window + 1)
+        except FutureTimeout:
+            raise LLMError('Tempo limite da chamada ao LLM esgotado')
+        self.cache.put(key, version, resposta)
+        return resposta
+
+    def stats(self):
+        cache = self.cache.stats()
+        return {
+            'cache_hits': cache['hits'],
+            'cache_misses': cache['misses'],
+            'calls': self.calls,
+            'batches': self.batches,
+            'deduplicated': self.deduplicated,
+        }
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        self._pool.close()
+
+    # ------------------------------------------------------------ micro-lotes
+
+    def _ensure_dispatcher(self):
+        with self._lock:
+            if self._dispatcher is None:
+                self._dispatcher = threading.Thread(target=self._dispatch_loop, name='llm-batcher', daemon=True)
+                self._dispatcher.start()
+
+    def _dispatch_loop(self):
+        while True:
+            lote = [self._pendentes.get()]
+            limite = time.monotonic() + self.batch_window
+            while len(lote) < self.max_batch:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    break
+                try:
+                    lote.append(self._pendentes.get(timeout=restante))
+                except queue.Empty:
+                    break
+            self._dispatch(lote)
+
+    def _dispatch(self, lote):
+        por_prompt = {}
+        for key, timeout, future in lote:
+            por_prompt.setdefault(key, (timeout, []))[1].append(future)
+        self.batches += 1
+        self.deduplicated += len(lote) - len(por_prompt)
+        for key, (timeout, futures) in por_prompt.items():
+            self._executor.submit(self._call, key, timeout, futures)
+
+    def _call(self, key, timeout, futures):
+        try:
+            resposta = self._chat(key, timeout)
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+        else:
+            for future in futures:
+                future.set_result(resposta)
+
+    def _chat(self, key, timeout):
+        model, system, prompt = key
+        mensagens = [{'role': 'system', 'content': system}] if system else []
+        mensagens.append({'role': 'user', 'content': prompt})
+        corpo = json.dumps({'model': model, 'messages': mensagens}).encode('utf-8')
+        headers = {'Content-Type': 'application/json'}
+        if self.api_key:
+            headers['Authorization'] = f'Bearer {self.api_key}'
+
+        self.calls += 1
+        status, dados = self._pool.request('POST', '/chat/completions', corpo, headers, timeout)
+        if status != 200:
+            raise LLMError(f'LLM respondeu HTTP {status}: {dados[:200].decode("utf-8", "replace")}')
+        try:
+            return json.loads(dados)['choices'][0]['message']['content']
+        except (ValueError, KeyError, IndexError):
+            raise LLMError('Resposta do LLM em formato inesperado')
@@ -0,0 +1,163 @@
+"""hash de conteúdo dos switches e contadores de upsert dos jobs de importação
+
+As tabelas são criadas por db.create_all(); esta revisão só acrescenta as
+colunas novas em bancos criados antes dela e preenche hash_conteudo dos
+switches existentes (sem ele, a primeira importação em modo `atualizar`
+regravaria todas as linhas).
+
+Revision ID: 3f9a1c2b7d40
+Revises: 
+Create Date: 2026-10-17 16:20:00.000000
+
+"""
+from alembic import op
+import hashlib
+from datetime import date, datetime
+from decimal import Decimal
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9a1c2b7d40'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH = 1000
+
+# Cópia de models.switch.CONTENT_FIELDS nesta revisão (ordem e tipos), para o
+# hash desta migração não mudar quando o modelo mudar
+CONTENT_FIELDS = [
+    ('nome_switch', sa.String),
+    ('status_funcionamento', sa.String),
+    ('criticidade', sa.String),
+    ('ambiente', sa.String),
+    ('unidade', sa.String),
+    ('local_detalhado', sa.String),
+    ('rack', sa.String),
+    ('posicao_u', sa.String),
+    ('ponto_referencia', sa.String),
+    ('fabricante', sa.String),
+    ('modelo', sa.String),
+    ('numero_serie', sa.String),
+    ('tipo_switch', sa.String),
+    ('stack_id', sa.String),
+    ('qtd_ports_utp', sa.Integer),
+    ('ports_utp_usadas', sa.Integer),
+    ('qtd_ports_fibra', sa.Integer),
+    ('ports_fibra_usadas', sa.Integer),
+    ('suporta_poe', sa.Boolean),
+    ('qtd_ports_poe', sa.Integer),
+    ('capacidade_backplane', sa.String),
+    ('ip_gestao', sa.String),
+    ('mascara_gestao', sa.String),
+    ('gateway_gestao', sa.String),
+    ('vlan_gestao', sa.Integer),
+    ('vlans_configuradas', sa.String),
+    ('uplink_principal', sa.String),
+    ('velocidade_uplink', sa.String),
+    ('versao_so_firmware', sa.String),
+    ('data_ultimo_upgrade', sa.Date),
+    ('backup_config', sa.Boolean),
+    ('data_ultimo_backup', sa.Date),
+    ('metodo_gestao', sa.String),
+    ('telnet_habilitado', sa.Boolean),
+    ('dot1x_habilitado', sa.Boolean),
+    ('stp_habilitado', sa.Boolean),
+    ('port_security', sa.Boolean),
+    ('acl_gestao_resumo', sa.Text),
+    ('ultima_revisao_seg', sa.Date),
+    ('fornecedor', sa.String),
+    ('numero_nota_fiscal', sa.String),
+    ('data_aquisicao', sa.Date),
+    ('valor_aquisicao', sa.Numeric(10, 2)),
+    ('centro_custo', sa.String),
+    ('numero_tombamento', sa.String),
+    ('projeto_origem', sa.String),
+    ('inicio_garantia', sa.Date),
+    ('fim_garantia', sa.Date),
+    ('contrato_suporte', sa.String),
+    ('sla_fornecedor', sa.String),
+    ('responsavel_tecnico', sa.String),
+    ('idade_meses', sa.Integer),
+    ('proximo_upgrade_sugerido', sa.Date),
+    ('proximo_refresh_tecnico', sa.Date),
+    ('observacoes', sa.Text),
+]
+
+
+def _columns(table):
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table(table):
+        return None
+    return {column['name'] for column in inspector.get_columns(table)}
+
+
+def _canonical(valor):
+    if valor is None or valor == '':
+        return ''
+    if isinstance(valor, bool):
+        return '1' if valor else '0'
+    if isinstance(valor, datetime):
+        return valor.date().isoformat()
+    if isinstance(valor, date):
+        return valor.isoformat()
+    if isinstance(valor, (int, float, Decimal)):
+        return format(Decimal(str(valor)).normalize(), 'f')
+    return str(valor).strip()
+
+
+def _content_hash(valores):
+    """Mesmo hash de models.switch.compute_content_hash nesta revisão"""
+    conteudo = '\x1f'.join(_canonical(valor) for valor in valores)
+    return hashlib.sha1(conteudo.encode('utf-8')).hexdigest()
+
+
+def _backfill_hashes():
+    """hash_conteudo das linhas sem hash, em lotes por id (keyset)"""
+    switches = sa.table('switches', sa.column('id', sa.Integer), sa.column('hash_conteudo', sa.String),
+                        *(sa.column(campo, tipo) for campo, tipo in CONTENT_FIELDS))
+    bind = op.get_bind()
+    atualizar = switches.update().where(switches.c.id == sa.bindparam('_id')).values(
+        hash_conteudo=sa.bindparam('hash_conteudo')
+    )
+    consulta = (
+        sa.select(switches.c.id, *(switches.c[campo] for campo, _ in CONTENT_FIELDS))
+        .where(switches.c.hash_conteudo.is_(None))
+        .order_by(switches.c.id)
+        .limit(BACKFILL_BATCH)
+    )
+    ultimo = 0
+    while True:
+        rows = bind.execute(consulta.where(switches.c.id > ultimo)).fetchall()
+        if not rows:
+            break
+        bind.execute(atualizar, [{'_id': row[0], 'hash_conteudo': _content_hash(row[1:])} for row in rows])
+        ultimo = rows[-1][0]
+
+
+def upgrade():
+    colunas = _columns('switches')
+    if colunas is not None:
+        if 'hash_conteudo' not in colunas:
+            op.add_column('switches', sa.Column('hash_conteudo', sa.String(length=40), nullable=True))
+        _backfill_hashes()
+
+    colunas = _columns('import_jobs')
+    if colunas is not None:
+        if 'modo' not in colunas:
+            op.add_column('import_jobs', sa.Column('modo', sa.String(length=20), nullable=False,
+                                                   server_default='inserir'))
+        if 'linhas_atualizadas' not in colunas:
+            op.add_column('import_jobs', sa.Column('linhas_atualizadas', sa.Integer(), nullable=True))
+        if 'linhas_inalteradas' not in colunas:
+            op.add_column('import_jobs', sa.Column('linhas_inalteradas', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('import_jobs') as batch_op:
+        batch_op.drop_column('linhas_inalteradas')
+        batch_op.drop_column('linhas_atualizadas')
+        batch_op.drop_column('modo')
+    with op.batch_alter_table('switches') as batch_op:
+        batch_op.drop_column('hash_conteudo')
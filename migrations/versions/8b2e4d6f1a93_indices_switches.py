@@ -0,0 +1,53 @@
+"""índices dos caminhos de acesso quentes de switches
+
+db.create_all() cria estes índices em bancos novos; esta revisão os
+acrescenta em bancos criados antes dela. Conferir com `flask indexes advise`.
+
+Revision ID: 8b2e4d6f1a93
+Revises: 3f9a1c2b7d40
+Create Date: 2026-10-17 18:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b2e4d6f1a93'
+down_revision = '3f9a1c2b7d40'
+branch_labels = None
+depends_on = None
+
+INDICES = {
+    'ix_switches_status_id_ativo': ['status_funcionamento', 'id_ativo'],
+    'ix_switches_criticidade_id_ativo': ['criticidade', 'id_ativo'],
+    'ix_switches_fabricante_valor': ['fabricante', 'valor_aquisicao'],
+    'ix_switches_fim_garantia_valor': ['fim_garantia', 'valor_aquisicao'],
+    'ix_switches_nome_switch': ['nome_switch'],
+}
+
+
+def _indexes(table):
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table(table):
+        return None
+    return {index['name'] for index in inspector.get_indexes(table)}
+
+
+def upgrade():
+    existentes = _indexes('switches')
+    if existentes is None:
+        return
+    for nome, colunas in INDICES.items():
+        if nome not in existentes:
+            op.create_index(nome, 'switches', colunas)
+    # Estatísticas para o planejador escolher entre os índices novos
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute('ANALYZE switches')
+
+
+def downgrade():
+    existentes = _indexes('switches') or set()
+    for nome in INDICES:
+        if nome in existentes:
+            op.drop_index(nome, table_name='switches')
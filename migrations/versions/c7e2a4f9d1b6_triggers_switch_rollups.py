@@ -0,0 +1,46 @@
+"""triggers de switch_rollups (agregações materializadas da frota)
+
+Cria a tabela, se faltar, e os triggers que a mantêm, e reconstrói as
+agregações a partir de `switches`. Só no SQLite; nos demais bancos as
+estatísticas consultam `switches` diretamente (ver services/fleet_rollups.py).
+
+Revision ID: c7e2a4f9d1b6
+Revises: 8b2e4d6f1a93
+Create Date: 2026-10-17 21:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7e2a4f9d1b6'
+down_revision = '8b2e4d6f1a93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if bind.dialect.name != 'sqlite' or not inspector.has_table('switches'):
+        return
+    if not inspector.has_table('switch_rollups'):
+        op.create_table(
+            'switch_rollups',
+            sa.Column('dimensao', sa.String(length=30), primary_key=True),
+            sa.Column('valor', sa.String(length=200), primary_key=True),
+            sa.Column('quantidade', sa.Integer(), nullable=False),
+            sa.Column('valor_total', sa.Numeric(16, 2), nullable=False),
+        )
+
+    from services.fleet_rollups import create_triggers
+    create_triggers(bind)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    from services.fleet_rollups import TRIGGERS
+    for nome in TRIGGERS:
+        op.execute(f'DROP TRIGGER IF EXISTS {nome}')
@@ -0,0 +1,50 @@
+"""versão do inventário compartilhada entre processos
+
+Cria a tabela `inventory_version` (uma linha) e os triggers que a
+incrementam a cada INSERT/UPDATE/DELETE em `switches`. Só no SQLite; nos
+demais bancos a versão vem da impressão digital de `switches` (ver
+services/inventory_state.py).
+
+Revision ID: d3f8b1a6c5e2
+Revises: c7e2a4f9d1b6
+Create Date: 2026-10-17 23:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd3f8b1a6c5e2'
+down_revision = 'c7e2a4f9d1b6'
+branch_labels = None
+depends_on = None
+
+OPERACOES = ('insert', 'update', 'delete')
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'sqlite' or not sa.inspect(bind).has_table('switches'):
+        return
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS inventory_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            versao INTEGER NOT NULL
+        )""")
+    op.execute('INSERT OR IGNORE INTO inventory_version (id, versao) VALUES (1, 0)')
+    for operacao in OPERACOES:
+        op.execute(f'DROP TRIGGER IF EXISTS trg_inventory_version_{operacao}')
+        op.execute(f"""
+            CREATE TRIGGER trg_inventory_version_{operacao} AFTER {operacao.upper()} ON switches
+            BEGIN
+                UPDATE inventory_version SET versao = versao + 1 WHERE id = 1;
+            END""")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for operacao in OPERACOES:
+        op.execute(f'DROP TRIGGER IF EXISTS trg_inventory_version_{operacao}')
+    op.execute('DROP TABLE IF EXISTS inventory_version')
@@ -0,0 +1,70 @@
+"""índice FTS5 de switches (busca textual da lista e do assistente)
+
+Cria a tabela virtual `switches_fts` (conteúdo externo de `switches`), os
+triggers que a mantêm e reconstrói o índice. Só no SQLite com FTS5; nos
+demais bancos a busca usa `ilike` (ver services/switch_search.py).
+
+Revision ID: e9b4c2d7a1f3
+Revises: d3f8b1a6c5e2
+Create Date: 2026-10-18 00:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e9b4c2d7a1f3'
+down_revision = 'd3f8b1a6c5e2'
+branch_labels = None
+depends_on = None
+
+# Esquema congelado nesta revisão (não importar de services/)
+CAMPOS = ('id_ativo', 'nome_switch', 'local_detalhado', 'modelo', 'numero_serie', 'ip_gestao', 'observacoes')
+COLUNAS = ', '.join(CAMPOS)
+NOVOS = ', '.join(f'NEW.{campo}' for campo in CAMPOS)
+ANTIGOS = ', '.join(f'OLD.{campo}' for campo in CAMPOS)
+
+TRIGGERS = {
+    'trg_switches_fts_insert': f"""
+        CREATE TRIGGER trg_switches_fts_insert AFTER INSERT ON switches BEGIN
+            INSERT INTO switches_fts (rowid, {COLUNAS}) VALUES (NEW.id, {NOVOS});
+        END""",
+    'trg_switches_fts_delete': f"""
+        CREATE TRIGGER trg_switches_fts_delete AFTER DELETE ON switches BEGIN
+            INSERT INTO switches_fts (switches_fts, rowid, {COLUNAS}) VALUES ('delete', OLD.id, {ANTIGOS});
+        END""",
+    'trg_switches_fts_update': f"""
+        CREATE TRIGGER trg_switches_fts_update AFTER UPDATE OF {COLUNAS} ON switches BEGIN
+            INSERT INTO switches_fts (switches_fts, rowid, {COLUNAS}) VALUES ('delete', OLD.id, {ANTIGOS});
+            INSERT INTO switches_fts (rowid, {COLUNAS}) VALUES (NEW.id, {NOVOS});
+        END""",
+}
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'sqlite' or not sa.inspect(bind).has_table('switches'):
+        return
+    if not bind.execute(sa.text("SELECT sqlite_compileoption_used('ENABLE_FTS5')")).scalar():
+        print('⚠️ SQLite sem FTS5: a busca de switches continua com ilike')
+        return
+    if not bind.execute(sa.text("SELECT 1 FROM sqlite_master WHERE name = 'switches_fts'")).first():
+        op.execute(f"""
+            CREATE VIRTUAL TABLE switches_fts USING fts5(
+                {COLUNAS},
+                content='switches', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+            )""")
+    for nome, ddl in TRIGGERS.items():
+        op.execute(f'DROP TRIGGER IF EXISTS {nome}')
+        op.execute(ddl)
+    op.execute("INSERT INTO switches_fts (switches_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for nome in TRIGGERS:
+        op.execute(f'DROP TRIGGER IF EXISTS {nome}')
+    op.execute('DROP TABLE IF EXISTS switches_fts')
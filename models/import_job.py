@@ -0,0 +1,64 @@
+from app import db
+from datetime import datetime
+import json
+
+class ImportJob(db.Model):
+    __tablename__ = 'import_jobs'
+
+    id = db.Column(db.String(32), primary_key=True)  # uuid4 hex
+    arquivo = db.Column(db.String(200), nullable=False)  # nome original enviado
+    caminho_arquivo = db.Column(db.String(300), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='pendente')  # pendente, executando, concluido, erro
+    modo = db.Column(db.String(20), nullable=False, default='inserir')  # inserir, atualizar (upsert)
+    mensagem = db.Column(db.Text)
+
+    # Progresso
+    linhas_lidas = db.Column(db.Integer, default=0)
+    linhas_inseridas = db.Column(db.Integer, default=0)
+    linhas_atualizadas = db.Column(db.Integer, default=0)
+    linhas_inalteradas = db.Column(db.Integer, default=0)
+    linhas_rejeitadas = db.Column(db.Integer, default=0)
+    checkpoint_linha = db.Column(db.Integer, default=0)  # linhas consumidas até o último lote gravado
+    erros = db.Column(db.Text)  # JSON com as primeiras mensagens de erro
+
+    # Controle de execução
+    worker_id = db.Column(db.String(32))
+    criado_por = db.Column(db.Integer, db.ForeignKey('users.id'))
+    criado_em = db.Column(db.DateTime, default=datetime.utcnow)
+    iniciado_em = db.Column(db.DateTime)
+    concluido_em = db.Column(db.DateTime)
+    atualizado_em = db.Column(db.DateTime, default=datetime.utcnow)
+
+    @property
+    def error_list(self):
+        return json.loads(self.erros) if self.erros else []
+
+    @property
+    def rows_per_second(self):
+        if not self.iniciado_em:
+            return 0.0
+        fim = self.concluido_em or datetime.utcnow()
+        segundos = (fim - self.iniciado_em).total_seconds()
+        return round(self.linhas_lidas / segundos, 1) if segundos > 0 else 0.0
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'arquivo': self.arquivo,
+            'status': self.status,
+            'modo': self.modo,
+            'mensagem': self.mensagem,
+            'linhas_lidas': self.linhas_lidas,
+            'linhas_inseridas': self.linhas_inseridas,
+            'linhas_atualizadas': self.linhas_atualizadas,
+            'linhas_inalteradas': self.linhas_inalteradas,
+            'linhas_rejeitadas': self.linhas_rejeitadas,
+            'checkpoint_linha': self.checkpoint_linha,
+            'linhas_por_segundo': self.rows_per_second,
+            'erros': self.error_list,
+            'iniciado_em': self.iniciado_em.isoformat() if self.iniciado_em else None,
+            'concluido_em': self.concluido_em.isoformat() if self.concluido_em else None
+        }
+
+    def __repr__(self):
+        return f'<ImportJob {self.id} - {self.status}>'
\ No newline at end of file
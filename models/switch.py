@@ -1,6 +1,10 @@
 from app import db
-from datetime import datetime
-from sqlalchemy import Numeric
+from datetime import date, datetime
+from decimal import Decimal
+import hashlib
+import threading
+from sqlalchemy import Numeric, event, func
+from sqlalchemy.orm import Session, object_session
 
 class Switch(db.Model):
     __tablename__ = 'switches'
@@ -80,7 +84,22 @@ class Switch(db.Model):
     data_criacao = db.Column(db.DateTime, default=datetime.utcnow)
     data_atualizacao = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     criado_por = db.Column(db.Integer, db.ForeignKey('users.id'))
-    
+    hash_conteudo = db.Column(db.String(40))  # SHA-1 dos campos de conteúdo (importação incremental); nulo = desatualizado
+
+    # Caminhos de acesso quentes (ver `flask indexes advise`); bancos antigos
+    # recebem estes índices pela migração 8b2e4d6f1a93
+    __table_args__ = (
+        # Lista filtrada por status/criticidade na ordem do keyset (o id vem junto no índice)
+        db.Index('ix_switches_status_id_ativo', 'status_funcionamento', 'id_ativo'),
+        db.Index('ix_switches_criticidade_id_ativo', 'criticidade', 'id_ativo'),
+        # Cobre GROUP BY fabricante + SUM(valor_aquisicao) do assistente sem ler a tabela
+        db.Index('ix_switches_fabricante_valor', 'fabricante', 'valor_aquisicao'),
+        # Janela de garantia do dashboard e do assistente (COUNT e SUM só pelo índice)
+        db.Index('ix_switches_fim_garantia_valor', 'fim_garantia', 'valor_aquisicao'),
+        # Listagens do assistente por (nome_switch, id)
+        db.Index('ix_switches_nome_switch', 'nome_switch'),
+    )
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -143,4 +162,116 @@ class Switch(db.Model):
         }
     
     def __repr__(self):
-        return f'<Switch {self.id_ativo} - {self.nome_switch}>'
\ No newline at end of file
+        return f'<Switch {self.id_ativo} - {self.nome_switch}>'
+
+
+# Campos que compõem o hash de conteúdo (tudo exceto chaves e metadados)
+CONTENT_FIELDS = [
+    column.name for column in Switch.__table__.columns
+    if column.name not in ('id', 'id_ativo', 'data_criacao', 'data_atualizacao', 'criado_por', 'hash_conteudo')
+]
+
+
+def _canonical(valor):
+    if valor is None or valor == '':
+        return ''
+    if isinstance(valor, bool):
+        return '1' if valor else '0'
+    if isinstance(valor, datetime):
+        return valor.date().isoformat()
+    if isinstance(valor, date):
+        return valor.isoformat()
+    if isinstance(valor, (int, float, Decimal)):
+        return format(Decimal(str(valor)).normalize(), 'f')
+    return str(valor).strip()
+
+
+def compute_content_hash(values):
+    """Hash estável do conteúdo de um switch (dict de colunas ou objeto `Switch`)"""
+    get = values.get if isinstance(values, dict) else lambda campo: getattr(values, campo)
+    conteudo = '\x1f'.join(_canonical(get(campo)) for campo in CONTENT_FIELDS)
+    return hashlib.sha1(conteudo.encode('utf-8')).hexdigest()
+
+
+@event.listens_for(Switch, 'before_insert')
+@event.listens_for(Switch, 'before_update')
+def _update_content_hash(mapper, connection, target):
+    target.hash_conteudo = compute_content_hash(target)
+
+
+class InventoryVersion:
+    """Contador incrementado a cada alteração confirmada na tabela `switches`
+
+    O contador é do processo: gravações de outros workers (gunicorn -w N) só o
+    alcançam via `sync`, chamado periodicamente pelo KnowledgeRefresher com a
+    impressão digital lida do banco. Serve para acordar threads deste processo;
+    caches que não podem servir dados de antes da gravação de outro worker
+    usam services.inventory_state.current_version(), que inclui a versão do banco.
+    """
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+        self._listeners = []
+        self._fingerprint = None
+
+    def subscribe(self, callback):
+        """`callback(versao)` a cada incremento; deve ser rápido (roda na thread de quem grava)"""
+        self._listeners.append(callback)
+
+    def bump(self):
+        with self._lock:
+            self.value += 1
+            versao = self.value
+        for callback in self._listeners:
+            callback(versao)
+        return versao
+
+    def sync(self, fingerprint):
+        """Sobe o contador se `fingerprint` mudou desde a chamada anterior; True se subiu"""
+        with self._lock:
+            mudou = self._fingerprint is not None and fingerprint != self._fingerprint
+            self._fingerprint = fingerprint
+        if mudou:
+            self.bump()
+        return mudou
+
+
+inventory_version = InventoryVersion()
+
+
+def inventory_fingerprint(session):
+    """(quantidade, maior id, última data_atualizacao) de `switches`
+
+    Muda com inserções, exclusões e alterações feitas por qualquer processo
+    (ORM ou Core preenchem data_atualizacao); SQL manual que não a atualize
+    passa despercebido até a próxima gravação.
+    """
+    return tuple(session.query(func.count(Switch.id), func.max(Switch.id), func.max(Switch.data_atualizacao)).one())
+
+
+def mark_inventory_changed(session):
+    """Registra alteração em `switches` feita pela sessão
+
+    O contador sobe já (invalida o que foi lido até aqui) e de novo no commit
+    ou rollback, para descartar respostas calculadas enquanto a transação
+    ainda não estava visível. INSERT/UPDATE via Core (importação em lote) não
+    disparam os eventos do mapper e chamam esta função diretamente.
+    """
+    if session is not None:
+        session.info['inventario_alterado'] = True
+    inventory_version.bump()
+
+
+@event.listens_for(Switch, 'after_insert')
+@event.listens_for(Switch, 'after_update')
+@event.listens_for(Switch, 'after_delete')
+def _switch_changed(mapper, connection, target):
+    mark_inventory_changed(object_session(target))
+
+
+@event.listens_for(Session, 'after_commit')
+@event.listens_for(Session, 'after_rollback')
+def _session_finished(session):
+    if session.info.pop('inventario_alterado', False):
+        inventory_version.bump()
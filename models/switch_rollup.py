@@ -0,0 +1,18 @@
+from app import db
+from sqlalchemy import Numeric
+
+class SwitchRollup(db.Model):
+    """Contagem e soma de valor_aquisicao por valor de uma dimensão de `switches`
+
+    Mantida por triggers do SQLite (ver services/fleet_rollups.py); a dimensão
+    'total' tem uma única linha com os totais da frota. NULL é gravado como ''.
+    """
+    __tablename__ = 'switch_rollups'
+
+    dimensao = db.Column(db.String(30), primary_key=True)  # fabricante, status_funcionamento, unidade...
+    valor = db.Column(db.String(200), primary_key=True)
+    quantidade = db.Column(db.Integer, nullable=False, default=0)
+    valor_total = db.Column(Numeric(16, 2), nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<SwitchRollup {self.dimensao}={self.valor}: {self.quantidade}>'
@@ -1,174 +1,115 @@
 # network_system_rag.py
 import os
-import re
+import threading
 from datetime import datetime, timedelta
-from sqlalchemy import func, extract, or_, and_
+from sqlalchemy import func, extract
 from app import db
-from models.switch import Switch
+from config_llm import LLMClient, LLMError
+from models.switch import Switch, inventory_version
+from services.assistant_aggregation import (build_conditions, decode_cursor, encode_cursor, list_switches,
+                                           list_switches_page, run_aggregation, switches_by_ids)
+from services.fleet_rollups import STATUS_ATIVOS, STATUS_INATIVOS, fleet_totals, read_rollups
+from services.fleet_snapshot import create_snapshot
+from services.switch_search import switch_search
+from services.result_cache import MISS, ResultCache, cache_key
+from services.intent_parser import IntentParser, normalize
+from services.inventory_state import current_version
+from services.query_metrics import end_trace, query_metrics, stage, start_trace
+from services.vector_index import create_index, fuse_rankings, tokenize
+
+STREAM_BATCH_SIZE = 50     # switches por evento "rows"
+STREAM_PAGE_LIMIT = 500    # switches por resposta; depois disso o cliente usa o cursor
 
 class NetworkRAGSystem:
     def __init__(self):
         self.initialized = True
-        self.last_update = datetime.now()
+        self.last_update = None        # última atualização efetiva da base de conhecimento
+        self.knowledge_base = None
+        self.knowledge_version = None
+        self._knowledge_lock = threading.Lock()
+        self.intent_parser = IntentParser()
+        self.result_cache = ResultCache()
+        self.snapshot = None
+        self.vector_index = None
+        self.llm = LLMClient()
         print("✅ Sistema RAG de Gestão de Rede inicializado")
     
+    def enable_analytics(self):
+        """Ativa o snapshot colunar em memória (requer NumPy; sem ele segue no SQLite)"""
+        self.snapshot = create_snapshot()
+        return self.snapshot is not None
+    
+    def enable_retrieval(self):
+        """Ativa a busca por texto livre (índice TF-IDF local; requer NumPy)"""
+        self.vector_index = create_index()
+        return self.vector_index is not None
+    
     def natural_language_to_sql(self, question: str):
         """Converte linguagem natural em consultas SQL usando análise inteligente"""
-        question_lower = question.lower().strip()
-        
-        # ANÁLISE INTELIGENTE DE INTENÇÃO
-        filters = {
-            "status": [],
-            "localizacao": [], 
-            "fabricante": [],
-            "criticidade": [],
-            "garantia_proxima": False,
-            "valor_min": None,
-            "valor_max": None,
-            "ports_livres": False
-        }
-        aggregations = {
-            "soma_valor": False,
-            "contagem_switches": False,
-            "agrupar_por": None,
-            "mostrar_lista": True
-        }
-        
-        # DETECÇÃO DE INTENÇÃO PRINCIPAL
-        intencoes = {
-            "contagem": any(palavra in question_lower for palavra in 
-                           ['quantos', 'quantas', 'contagem', 'número', 'qtd', 'total']),
-            "lista": any(palavra in question_lower for palavra in 
-                        ['mostre', 'liste', 'exiba', 'mostrar', 'listar']),
-            "valor": any(palavra in question_lower for palavra in 
-                        ['valor', 'preço', 'custo', 'investimento', 'dinheiro']),
-            "localizacao": any(palavra in question_lower for palavra in 
-                              ['sede', 'filial', 'matriz', 'local', 'onde']),
-            "status": any(palavra in question_lower for palavra in 
-                         ['ativo', 'inativo', 'manutenção', 'funcionando', 'parado']),
-            "garantia": any(palavra in question_lower for palavra in 
-                           ['garantia', 'vencimento', 'vencer', 'validade']),
-            "fabricante": any(palavra in question_lower for palavra in 
-                             ['cisco', 'hp', 'dlink', 'tp-link', 'mikrotik', 'fabricante']),
-            "ports": any(palavra in question_lower for palavra in 
-                        ['portas', 'ports', 'conexões', 'livres', 'ocupadas'])
-        }
-        
-        # STATUS - Análise contextual mais inteligente
-        if 'inativo' in question_lower or 'manutenção' in question_lower or 'parado' in question_lower:
-            filters["status"].extend(["Inativo", "Manutenção", "Inativo (Manutenção)"])
-        elif 'ativo' in question_lower or 'produção' in question_lower or 'funcionando' in question_lower:
-            filters["status"].extend(["Em produção", "Ativo"])
-        
-        # LOCALIZAÇÃO - Busca inteligente
-        if 'sede' in question_lower or 'matriz' in question_lower:
-            filters["localizacao"].extend(["Sede", "SEDE", "Matriz"])
-        elif 'filial' in question_lower:
-            filters["localizacao"].extend(["Filial", "Unidade"])
-        
-        # FABRICANTE - Detecção por substring
-        fabricantes = ['cisco', 'hp', 'dlink', 'tp-link', 'mikrotik']
-        for fabricante in fabricantes:
-            if fabricante in question_lower:
-                filters["fabricante"].append(fabricante.title())
-        
-        # GARANTIA - Detecção temporal
-        if any(palavra in question_lower for palavra in ['garantia', 'vencimento', 'vencer']):
-            filters["garantia_proxima"] = True
-        
-        # VALOR - Extração de números
-        valor_match = re.search(r'valor.*?(\d+[\.,]?\d*)', question_lower)
-        if valor_match:
-            filters["valor_min"] = float(valor_match.group(1).replace(',', '.'))
-        
-        # PORTS - Detecção de capacidade
-        if 'portas' in question_lower or 'ports' in question_lower:
-            if 'livres' in question_lower or 'disponíveis' in question_lower:
-                filters["ports_livres"] = True
-        
-        # AGRAGAÇÕES - Lógica inteligente
-        if intencoes["contagem"] and not intencoes["lista"]:
-            aggregations["contagem_switches"] = True
-            aggregations["mostrar_lista"] = False
-        
-        if intencoes["valor"] and ('total' in question_lower or 'soma' in question_lower):
-            aggregations["soma_valor"] = True
-        
-        if 'por fabricante' in question_lower or 'distribuição' in question_lower:
-            aggregations["agrupar_por"] = "fabricante"
-            aggregations["mostrar_lista"] = False
-        
-        return {"filters": filters, "aggregations": aggregations, "intentions": intencoes}
+        return self.intent_parser.parse(question)
     
     def execute_rag_query(self, question: str):
         """Executa consulta inteligente no banco de dados"""
         try:
             # Análise da pergunta
-            query_params = self.natural_language_to_sql(question)
+            with stage('parse'):
+                query_params = self.natural_language_to_sql(question)
             filters = query_params["filters"]
             aggregations = query_params["aggregations"]
             intentions = query_params["intentions"]
             
-            # Construir query base
-            query = Switch.query
+            is_aggregation = aggregations["soma_valor"] or aggregations["contagem_switches"] or aggregations["agrupar_por"]
             
-            # APLICAÇÃO INTELIGENTE DE FILTROS
-            conditions = []
-            
-            # Status
-            if filters["status"]:
-                conditions.append(Switch.status_funcionamento.in_(filters["status"]))
-            
-            # Localização
-            if filters["localizacao"]:
-                loc_conditions = []
-                for local in filters["localizacao"]:
-                    loc_conditions.append(Switch.unidade.ilike(f'%{local}%'))
-                    loc_conditions.append(Switch.local_detalhado.ilike(f'%{local}%'))
-                conditions.append(or_(*loc_conditions))
-            
-            # Fabricante
-            if filters["fabricante"]:
-                fab_conditions = [Switch.fabricante.ilike(f'%{fab}%') for fab in filters["fabricante"]]
-                conditions.append(or_(*fab_conditions))
-            
-            # Garantia
-            if filters["garantia_proxima"]:
-                hoje = datetime.now().date()
-                limite = hoje + timedelta(days=30)
-                conditions.append(Switch.fim_garantia <= limite)
-                conditions.append(Switch.fim_garantia >= hoje)
-            
-            # Valor
-            if filters["valor_min"]:
-                conditions.append(Switch.valor_aquisicao >= filters["valor_min"])
+            # Sem filtros nem pedido de listagem: busca por texto livre (modelo, rack, observações, responsável...)
+            if not is_aggregation:
+                with stage('execute'):
+                    encontrados = self._search_switches(question, query_params)
+                if encontrados:
+                    with stage('format'):
+                        return self._format_search_result(encontrados, question, filters)
+                
+                # Nenhuma intenção reconhecida nem nada encontrado por texto: tentar o LLM.
+                # "Mostre todos os switches" tem intenção (lista) e segue para a listagem
+                if self._wants_llm(query_params):
+                    try:
+                        with stage('execute'):
+                            return self._ask_llm(question)
+                    except LLMError:
+                        pass
             
-            # Portas livres
-            if filters["ports_livres"]:
-                conditions.append(Switch.qtd_ports_utp > Switch.ports_utp_usadas)
+            # Resultado em cache enquanto o inventário não mudar
+            with stage('build'):
+                key = cache_key(filters, aggregations)
+                version = current_version()
+                dados = self.result_cache.get(key, version)
+                conditions = build_conditions(filters) if dados is MISS else None
             
-            # Aplicar todas as condições
-            if conditions:
-                query = query.filter(and_(*conditions))
+            if dados is MISS:
+                with stage('execute'):
+                    if is_aggregation and self.snapshot is not None and not aggregations["mostrar_lista"]:
+                        dados = self.snapshot.aggregate(filters, aggregations)
+                    elif is_aggregation:
+                        dados = run_aggregation(conditions, aggregations)
+                    else:
+                        dados = list_switches(conditions)
+                self.result_cache.put(key, version, dados)
             
             # EXECUÇÃO INTELIGENTE
-            if aggregations["soma_valor"] or aggregations["contagem_switches"] or aggregations["agrupar_por"]:
-                return self._execute_aggregation_query(query, aggregations, filters, question, intentions)
-            else:
-                switches = query.order_by(Switch.nome_switch).all()
-                return self._format_switches_result(switches, question, filters, intentions)
+            with stage('format'):
+                if is_aggregation:
+                    return self._format_aggregation_result(dados, aggregations, filters, question, intentions)
+                else:
+                    return self._format_switches_result(dados, question, filters, intentions)
                 
         except Exception as e:
             return f"❌ Erro na consulta RAG: {str(e)}"
     
-    def _execute_aggregation_query(self, query, aggregations, filters, original_question, intentions):
-        """Executa consultas de agregação de forma inteligente"""
+    def _format_aggregation_result(self, resultado, aggregations, filters, original_question, intentions):
+        """Formata o resultado das agregações (obtido com um único SELECT por pergunta)"""
         results = [f"🎯 **RESULTADO PARA: '{original_question}'**\n"]
         
         # CONTAGEM
         if aggregations["contagem_switches"]:
-            count = query.count()
-            
             # Mensagem contextual
             if filters["status"]:
                 status_msg = f" com status {', '.join(filters['status'])}"
@@ -179,48 +120,33 @@ class NetworkRAGSystem:
             else:
                 status_msg = ""
                 
-            results.append(f"📊 **Total de Switches{status_msg}**: {count}")
+            results.append(f"📊 **Total de Switches{status_msg}**: {resultado.count}")
         
         # SOMA DE VALORES
         if aggregations["soma_valor"]:
-            total_valor = db.session.query(func.sum(Switch.valor_aquisicao)).filter(
-                Switch.id.in_([s.id for s in query.all()])
-            ).scalar() or 0
-            
             context_msg = ""
             if filters["status"]:
                 context_msg = f" ({', '.join(filters['status'])})"
             elif filters["fabricante"]:
                 context_msg = f" (Fabricante: {', '.join(filters['fabricante'])})"
                 
-            results.append(f"💰 **Valor Total{context_msg}**: R$ {total_valor:,.2f}")
+            results.append(f"💰 **Valor Total{context_msg}**: R$ {resultado.total_valor:,.2f}")
         
         # AGRUPAMENTO POR FABRICANTE
-        if aggregations["agrupar_por"] == "fabricante":
-            fabricantes = db.session.query(
-                Switch.fabricante,
-                func.count(Switch.id),
-                func.sum(Switch.valor_aquisicao)
-            ).filter(
-                Switch.id.in_([s.id for s in query.all()])
-            ).group_by(Switch.fabricante).order_by(func.count(Switch.id).desc()).all()
-            
-            if fabricantes:
-                results.append("\n🏭 **Distribuição por Fabricante:**")
-                for fabricante, count, valor in fabricantes:
-                    valor_str = f" | 💰 R$ {valor:,.2f}" if valor else ""
-                    results.append(f"   • **{fabricante}**: {count} switches{valor_str}")
+        if resultado.grupos:
+            results.append("\n🏭 **Distribuição por Fabricante:**")
+            for fabricante, count, valor in resultado.grupos:
+                valor_str = f" | 💰 R$ {valor:,.2f}" if valor else ""
+                results.append(f"   • **{fabricante}**: {count} switches{valor_str}")
         
-        # MOSTRAR LISTA SE SOLICITADO
-        if aggregations["mostrar_lista"] and query.count() <= 10:  # Mostra lista se poucos resultados
-            switches = query.limit(10).all()
-            if switches:
-                results.append("\n📋 **Switches Encontrados:**")
-                for switch in switches:
-                    status_icon = "🟢" if "produção" in switch.status_funcionamento else "🔴"
-                    results.append(f"   {status_icon} **{switch.id_ativo}** - {switch.nome_switch}")
-                    results.append(f"      🏭 {switch.fabricante} | 🏢 {switch.local_detalhado}")
-                    results.append(f"      💰 R$ {switch.valor_aquisicao:,.2f} | 🔌 {switch.ports_utp_usadas}/{switch.qtd_ports_utp} ports")
+        # MOSTRAR LISTA SE SOLICITADO (só quando há poucos resultados)
+        if aggregations["mostrar_lista"] and resultado.switches:
+            results.append("\n📋 **Switches Encontrados:**")
+            for switch in resultado.switches:
+                status_icon = "🟢" if "produção" in switch.status_funcionamento else "🔴"
+                results.append(f"   {status_icon} **{switch.id_ativo}** - {switch.nome_switch}")
+                results.append(f"      🏭 {switch.fabricante} | 🏢 {switch.local_detalhado}")
+                results.append(f"      💰 R$ {switch.valor_aquisicao:,.2f} | 🔌 {switch.ports_utp_usadas}/{switch.qtd_ports_utp} ports")
         
         return "\n".join(results) if len(results) > 1 else "📭 Nenhum dado encontrado para a consulta"
     
@@ -229,6 +155,64 @@ class NetworkRAGSystem:
         if not switches:
             return f"📭 Nenhum switch encontrado para: '{original_question}'"
         
+        resultado = self._format_switches_header(len(switches), original_question, filters)
+        for switch in switches:
+            resultado.extend(self._format_switch_lines(switch, filters))
+        
+        return "\n".join(resultado)
+    
+    def _search_switches(self, question, query_params):
+        """Switches mais parecidos com a pergunta, ou None se a busca por texto não se aplica
+
+        Só para perguntas sem filtros e sem pedido de listagem: "Liste
+        equipamentos com mais de 20 portas ocupadas" segue para a listagem.
+        """
+        if (self.vector_index is None and not switch_search.enabled) or \
+                query_params["intentions"]["lista"] or any(query_params["filters"].values()):
+            return None
+        termos = tokenize(question)
+        if not termos:
+            return None
+        
+        key = ("busca", tuple(termos))
+        version = current_version()
+        encontrados = self.result_cache.get(key, version)
+        if encontrados is MISS:
+            # FTS5 (prefixo, bm25) e índice TF-IDF (cobre firmware, rack, responsável...)
+            # combinados por posição: quem as duas buscas põem no topo vem primeiro
+            rankings = [switch_search.rank_ids(' '.join(termos), operador='OR')]
+            if self.vector_index is not None:
+                rankings.append([switch_id for switch_id, _ in self.vector_index.search(question)])
+            ids = fuse_rankings(*rankings)
+            encontrados = switches_by_ids(ids) if ids else []
+            self.result_cache.put(key, version, encontrados)
+        return encontrados
+    
+    def _wants_llm(self, query_params):
+        """Pergunta sem intenção reconhecida (contagem, lista, agrupamento...) nem filtros, com LLM disponível"""
+        if any(query_params["intentions"].values()) or any(query_params["filters"].values()):
+            return False
+        return self.llm.is_available()
+    
+    def _ask_llm(self, question):
+        """Resposta do LLM com um resumo do inventário como contexto (cache por versão do inventário)"""
+        system = (
+            "Você é o assistente de inventário de switches de rede. Responda em português, "
+            "de forma curta, usando apenas o resumo do inventário abaixo.\n\n" + self._get_system_stats()
+        )
+        resposta = self.llm.complete(question, system=system, version=current_version())
+        return f"🎯 **RESULTADO PARA: '{question}'**\n\n🤖 {resposta}"
+    
+    def _format_search_result(self, switches, original_question, filters):
+        """Formata o resultado da busca por texto (mais relevantes primeiro)"""
+        resultado = [f"🎯 **RESULTADO PARA: '{original_question}'**\n"]
+        resultado.append(f"🔎 **Busca por texto: {len(switches)} switches mais relevantes**\n")
+        for switch in switches:
+            resultado.extend(self._format_switch_lines(switch, filters))
+        return "\n".join(resultado)
+    
+    def _format_switches_header(self, total, original_question, filters):
+        """Cabeçalho da listagem: pergunta, filtros aplicados e total"""
         resultado = [f"🎯 **RESULTADO PARA: '{original_question}'**\n"]
         
         # Informações contextuais
@@ -243,39 +227,140 @@ class NetworkRAGSystem:
         if filter_info:
             resultado.append(f"🔍 **Filtros aplicados**: {', '.join(filter_info)}")
         
-        resultado.append(f"📊 **Total encontrado: {len(switches)} switches**\n")
+        resultado.append(f"📊 **Total encontrado: {total} switches**\n")
+        return resultado
+    
+    def _format_switch_lines(self, switch, filters):
+        """Bloco de linhas de um switch na listagem"""
+        # CORREÇÃO DO ERRO: Verificar se datas são None
+        garantia_str = "N/A"
+        if switch.fim_garantia:
+            garantia_str = switch.fim_garantia.strftime('%d/%m/%Y')
+            
+            if filters["garantia_proxima"]:
+                dias_restantes = (switch.fim_garantia - datetime.now().date()).days
+                garantia_str += f" (⚠️ {dias_restantes} dias)"
+        
+        status_icon = "🟢" if "produção" in switch.status_funcionamento else "🔴"
+        valor_str = f"R$ {switch.valor_aquisicao:,.2f}" if switch.valor_aquisicao is not None else "N/A"
         
-        for switch in switches:
-            # CORREÇÃO DO ERRO: Verificar se datas são None
-            garantia_str = "N/A"
-            if switch.fim_garantia:
-                garantia_str = switch.fim_garantia.strftime('%d/%m/%Y')
-                
-                if filters["garantia_proxima"]:
-                    dias_restantes = (switch.fim_garantia - datetime.now().date()).days
-                    garantia_str += f" (⚠️ {dias_restantes} dias)"
+        return [
+            f"{status_icon} **{switch.id_ativo}** - {switch.nome_switch}",
+            f"   🏭 {switch.fabricante} | 🏢 {switch.local_detalhado}",
+            f"   📍 {switch.unidade} | 🏷️ {switch.criticidade}",
+            f"   🔌 Portas: {switch.ports_utp_usadas}/{switch.qtd_ports_utp} | 💰 {valor_str}",
+            f"   📅 Garantia até: {garantia_str}",
+            "",
+        ]
+    
+    def query_stream(self, question: str, cursor=None, batch_size=STREAM_BATCH_SIZE, limit=STREAM_PAGE_LIMIT):
+        """Resposta em partes: cabeçalho primeiro, depois os switches em lotes
+
+        Gera dicts `{"type": "header" | "rows" | "end", ...}`. Respostas de
+        agregação, ajuda e estatísticas cabem no cabeçalho. Listagens avançam
+        por keyset (nome_switch, id) e param após `limit` switches; o evento
+        `end` traz o `cursor` para buscar a página seguinte (None se acabou).
+        """
+        try:
+            question_lower = normalize(question)
+            if question_lower in ['ajuda', 'help', '?', 'como usar']:
+                yield {"type": "header", "response": self._show_help()}
+                yield {"type": "end", "cursor": None}
+                return
+            if question_lower in ['estatisticas', 'stats', 'dashboard']:
+                yield {"type": "header", "response": self._get_system_stats()}
+                yield {"type": "end", "cursor": None}
+                return
             
-            status_icon = "🟢" if "produção" in switch.status_funcionamento else "🔴"
+            query_params = self.natural_language_to_sql(question)
+            filters = query_params["filters"]
+            aggregations = query_params["aggregations"]
+            if aggregations["soma_valor"] or aggregations["contagem_switches"] or aggregations["agrupar_por"]:
+                yield {"type": "header", "response": self.execute_rag_query(question)}
+                yield {"type": "end", "cursor": None}
+                return
+            
+            if not cursor:
+                encontrados = self._search_switches(question, query_params)
+                if encontrados:
+                    yield {"type": "header", "total": len(encontrados),
+                           "response": self._format_search_result(encontrados, question, filters)}
+                    yield {"type": "end", "cursor": None}
+                    return
+                # Mesma regra de execute_rag_query: LLM só sem nenhuma intenção reconhecida
+                if self._wants_llm(query_params):
+                    try:
+                        resposta = self._ask_llm(question)
+                    except LLMError:
+                        pass
+                    else:
+                        yield {"type": "header", "response": resposta}
+                        yield {"type": "end", "cursor": None}
+                        return
             
-            resultado.append(f"{status_icon} **{switch.id_ativo}** - {switch.nome_switch}")
-            resultado.append(f"   🏭 {switch.fabricante} | 🏢 {switch.local_detalhado}")
-            resultado.append(f"   📍 {switch.unidade} | 🏷️ {switch.criticidade}")
-            resultado.append(f"   🔌 Portas: {switch.ports_utp_usadas}/{switch.qtd_ports_utp} | 💰 R$ {switch.valor_aquisicao:,.2f}")
-            resultado.append(f"   📅 Garantia até: {garantia_str}")
-            resultado.append("")
+            conditions = build_conditions(filters)
+            after = decode_cursor(cursor) if cursor else None
+            if after is None:
+                total = self._count_switches(filters, conditions)
+                if not total:
+                    yield {"type": "header", "total": 0,
+                           "response": f"📭 Nenhum switch encontrado para: '{question}'"}
+                    yield {"type": "end", "cursor": None}
+                    return
+                header = self._format_switches_header(total, question, filters)
+                yield {"type": "header", "total": total, "response": "\n".join(header)}
+            
+            enviados = 0
+            while enviados < limit:
+                tamanho = min(batch_size, limit - enviados)
+                page = list_switches_page(conditions, after, tamanho)
+                if not page:
+                    after = None
+                    break
+                linhas = []
+                for switch in page:
+                    linhas.extend(self._format_switch_lines(switch, filters))
+                enviados += len(page)
+                after = page[-1]
+                yield {"type": "rows", "count": len(page), "response": "\n".join(linhas)}
+                if len(page) < tamanho:
+                    after = None
+                    break
+            
+            yield {"type": "end", "cursor": encode_cursor(after) if after is not None else None}
         
-        return "\n".join(resultado)
+        except Exception as e:
+            yield {"type": "error", "response": f"❌ Erro na consulta RAG: {str(e)}"}
+    
+    def _count_switches(self, filters, conditions):
+        if self.snapshot is not None:
+            return self.snapshot.aggregate(filters, {"agrupar_por": None}).count
+        return run_aggregation(conditions, {"agrupar_por": None, "mostrar_lista": False}).count
     
     def query(self, question: str, user_id=None):
         """Sistema de consultas inteligentes verdadeiro"""
+        return self.query_with_timings(question, user_id)[0]
+    
+    def query_with_timings(self, question: str, user_id=None):
+        """Resposta e `QueryTrace` com os tempos por etapa (também somados às métricas globais)"""
+        trace = start_trace()
         try:
-            question_lower = question.lower().strip()
+            resposta = self._answer(question)
+        finally:
+            end_trace()
+            query_metrics.record(trace)
+        return resposta, trace
+    
+    def _answer(self, question):
+        try:
+            question_lower = normalize(question)
             
             if question_lower in ['ajuda', 'help', '?', 'como usar']:
                 return self._show_help()
             
-            if question_lower in ['estatísticas', 'stats', 'dashboard']:
-                return self._get_system_stats()
+            if question_lower in ['estatisticas', 'stats', 'dashboard']:
+                with stage('execute'):
+                    return self._get_system_stats()
             
             # Consulta inteligente no banco de dados
             return self.execute_rag_query(question)
@@ -286,21 +371,16 @@ class NetworkRAGSystem:
     def _get_system_stats(self):
         """Estatísticas do sistema em tempo real"""
         try:
-            total_switches = Switch.query.count()
-            switches_ativos = Switch.query.filter(
-                Switch.status_funcionamento.in_(["Em produção", "Ativo"])
-            ).count()
-            switches_inativos = Switch.query.filter(
-                Switch.status_funcionamento.in_(["Inativo", "Manutenção"])
-            ).count()
-            
-            total_valor = db.session.query(func.sum(Switch.valor_aquisicao)).scalar() or 0
-            
-            # Distribuição por fabricante
-            fabricantes = db.session.query(
-                Switch.fabricante,
-                func.count(Switch.id)
-            ).group_by(Switch.fabricante).order_by(func.count(Switch.id).desc()).all()
+            # Agregações materializadas: custo proporcional ao número de grupos
+            rollups = read_rollups()
+            total_switches, total_valor = fleet_totals(rollups)
+            por_status = rollups['status_funcionamento']
+            switches_ativos = sum(por_status.get(status, (0, 0))[0] for status in STATUS_ATIVOS)
+            switches_inativos = sum(por_status.get(status, (0, 0))[0] for status in STATUS_INATIVOS)
+            fabricantes = sorted(
+                ((fabricante, count) for fabricante, (count, _) in rollups['fabricante'].items()),
+                key=lambda item: item[1], reverse=True
+            )
             
             stats = [
                 "📊 **ESTATÍSTICAS DO SISTEMA - TEMPO REAL**",
@@ -367,9 +447,34 @@ class NetworkRAGSystem:
 """
         return help_text.strip()
 
-    def update_knowledge_base(self):
-        """Atualiza base de conhecimento"""
-        return self._get_system_stats()
+    def cache_stats(self):
+        """Contadores dos caches de intenção e de resultados"""
+        intent = self.intent_parser.cache_info()
+        return {
+            'intent': {'hits': intent.hits, 'misses': intent.misses, 'size': intent.currsize, 'maxsize': intent.maxsize},
+            'result': self.result_cache.stats(),
+            'llm': self.llm.stats(),
+        }
+    
+    def update_knowledge_base(self, force=False):
+        """Atualiza a base de conhecimento (estatísticas e motores em memória) se o inventário mudou
+
+        Chamada pelo KnowledgeRefresher; `force` recalcula mesmo sem mudança
+        no contador local, inclusive o snapshot e o índice (que comparam as
+        assinaturas das linhas com o banco).
+        """
+        with self._knowledge_lock:
+            version = inventory_version.value
+            if not force and version == self.knowledge_version:
+                return self.knowledge_base
+            if self.snapshot is not None:
+                self.snapshot.refresh(force=force)
+            if self.vector_index is not None:
+                self.vector_index.refresh(force=force)
+            self.knowledge_base = self._get_system_stats()
+            self.knowledge_version = version
+            self.last_update = datetime.now()
+            return self.knowledge_base
 
 # Instância global do sistema inteligente
 network_system = NetworkRAGSystem()
\ No newline at end of file
@@ -1,13 +1,27 @@
-from flask import Blueprint, request, jsonify
+import json
+from datetime import datetime
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from flask_login import login_required, current_user
 from network_system_rag import network_system
+from services.db_routing import read_only, read_router
+from services.intent_parser import normalize
+from services.knowledge_refresh import knowledge_refresher
+from services.live_updates import live_updates
+from services.sse_fanout import sse_fanout
+from services.query_gate import QueryBusy, query_gate
+from services.query_metrics import query_metrics
 
 network_api_bp = Blueprint('network_api', __name__)
 
 @network_api_bp.route('/query', methods=['POST'])
+@read_only
 @login_required
 def query_system():
-    """Endpoint para consultas no sistema inteligente"""
+    """Endpoint para consultas no sistema inteligente
+
+    Com `"stream": true` a resposta é NDJSON em partes; `"cursor"` continua
+    uma listagem a partir do evento `end` anterior.
+    """
     try:
         data = request.get_json()
         question = data.get('question', '').strip()
@@ -18,15 +32,45 @@ def query_system():
                 'message': 'Por favor, forneça uma pergunta'
             })
         
-        # Fazer consulta no sistema
-        response = network_system.query(question, current_user.id)
+        # Modo streaming: NDJSON com cabeçalho, lotes de switches e cursor final
+        if data.get('stream'):
+            query_gate.acquire()
+            eventos = network_system.query_stream(question, cursor=data.get('cursor'))
+            resposta = Response(
+                stream_with_context(json.dumps(evento, ensure_ascii=False) + '\n' for evento in eventos),
+                mimetype='application/x-ndjson',
+                headers={'X-Accel-Buffering': 'no'}
+            )
+            # A vaga fica ocupada até o stream terminar (ou o cliente desconectar)
+            resposta.call_on_close(query_gate.release)
+            return resposta
         
-        return jsonify({
+        # Fazer consulta no sistema: perguntas simultâneas iguais a menos de caixa,
+        # acentos e espaços compartilham a execução
+        user_id = current_user.id
+        (response, trace), compartilhada = query_gate.run(
+            normalize(question), lambda: network_system.query_with_timings(question, user_id)
+        )
+        
+        payload = {
             'success': True,
             'question': question,
             'response': response,
-            'timestamp': network_system.last_update.isoformat()
-        })
+            'timestamp': datetime.now().isoformat()
+        }
+        # Tempos por etapa (parse, build, execute, sql, format) para diagnóstico; só de
+        # quem executou, quem aproveitou a execução de outro pedido não tem tempos próprios
+        if data.get('debug'):
+            payload['coalesced'] = compartilhada
+            payload['timings'] = None if compartilhada else trace.to_dict()
+        return jsonify(payload)
+        
+    except QueryBusy as e:
+        return jsonify({
+            'success': False,
+            'busy': True,
+            'message': f'Sistema ocupado, tente novamente em instantes ({str(e)})'
+        }), 503, {'Retry-After': '1'}
         
     except Exception as e:
         return jsonify({
@@ -35,17 +79,23 @@ def query_system():
         }), 500
 
 @network_api_bp.route('/stats', methods=['GET'])
+@read_only
 @login_required
 def get_system_stats():
     """Endpoint para estatísticas do sistema"""
     try:
-        # Atualizar estatísticas
-        network_system.update_knowledge_base()
-        
+        # Só leitura: a base de conhecimento é atualizada pelo knowledge_refresher
+        last_update = network_system.last_update
         return jsonify({
             'success': True,
             'initialized': network_system.initialized,
-            'last_update': network_system.last_update.isoformat(),
+            'last_update': last_update.isoformat() if last_update else None,
+            'knowledge_version': network_system.knowledge_version,
+            'refresh': knowledge_refresher.stats(),
+            'cache': network_system.cache_stats(),
+            'admission': query_gate.stats(),
+            'live': {**live_updates.stats(), 'fanout': sse_fanout.stats()},
+            'read_routing': read_router.stats(),
             'message': 'Sistema de consultas inteligentes ativo'
         })
         
@@ -53,4 +103,49 @@ def get_system_stats():
         return jsonify({
             'success': False,
             'message': f'Erro ao obter estatísticas: {str(e)}'
-        }), 500
\ No newline at end of file
+        }), 500
+
+@network_api_bp.route('/events', methods=['GET'])
+@login_required
+def inventory_events():
+    """Server-Sent Events: estado inicial (`snapshot`) e depois só as mudanças (`delta`)"""
+    # Sem a thread publicadora (BACKGROUND_SERVICES desligado, comandos da CLI) nada chegaria
+    if not live_updates.running:
+        return jsonify({
+            'success': False,
+            'message': 'Atualizações ao vivo desativadas neste servidor'
+        }), 503, {'Retry-After': '300'}
+    
+    if not live_updates.try_subscribe():
+        return jsonify({
+            'success': False,
+            'busy': True,
+            'message': 'Muitas conexões de atualização abertas'
+        }), 503, {'Retry-After': '30'}
+    
+    last_id = request.headers.get('Last-Event-ID', type=int)
+    # O primeiro evento pode ler o banco: o gerador roda com o contexto da requisição
+    resposta = Response(
+        stream_with_context(live_updates.events(last_id)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+    resposta.call_on_close(live_updates.unsubscribe)
+    return resposta
+
+@network_api_bp.route('/admin/metrics', methods=['GET'])
+@login_required
+def get_query_metrics():
+    """Percentis (p50/p95/p99, em ms) por etapa das últimas consultas do assistente"""
+    if not current_user.is_admin:
+        return jsonify({
+            'success': False,
+            'message': 'Apenas administradores podem ver as métricas'
+        }), 403
+    
+    return jsonify({
+        'success': True,
+        'metrics': query_metrics.snapshot(),
+        'admission': query_gate.stats(),
+        'cache': network_system.cache_stats()
+    })
@@ -0,0 +1,140 @@
+from flask import Blueprint, Response, request, jsonify
+from flask_login import login_required, current_user
+from sqlalchemy.exc import SQLAlchemyError
+from models.switch import Switch
+from services.db_routing import read_only
+from services.switch_bulk import bulk_delete, bulk_update
+from services.switch_pagination import cached_total, switch_page
+from services.switch_search import switch_search
+from services.switch_serializer import columns, dumps, parse_fields, serializer
+
+# API REST versionada (montada em /api/v1)
+switches_api_bp = Blueprint('switches_api', __name__)
+
+PER_PAGE = 100
+MAX_PER_PAGE = 10000
+
+# Filtros por igualdade (?fabricante=Cisco,HP vira IN)
+FILTER_FIELDS = ('status_funcionamento', 'criticidade', 'fabricante', 'unidade', 'tipo_switch', 'ambiente')
+_CURSOR_FIELDS = ('id_ativo', 'id')
+
+
+def _erro(mensagem, status=400):
+    return jsonify({'success': False, 'message': mensagem}), status
+
+
+def _json(payload):
+    return Response(dumps(payload), mimetype='application/json')
+
+
+def _projecao(query, campos):
+    """Só as colunas pedidas (mais id_ativo/id, necessárias ao cursor)"""
+    extras = tuple(campo for campo in _CURSOR_FIELDS if campo not in campos)
+    return query.with_entities(*columns(campos + extras))
+
+
+def _filtros(args):
+    filtros = {}
+    for campo in FILTER_FIELDS:
+        valores = [valor for valor in args.get(campo, '').split(',') if valor]
+        if valores:
+            filtros[campo] = tuple(valores)
+    if args.get('search'):
+        filtros['search'] = args['search']
+    return filtros
+
+
+def _filtrar(query, filtros):
+    for campo, valores in filtros.items():
+        if campo == 'search':
+            query = switch_search.filter(query, valores)
+        else:
+            query = query.filter(getattr(Switch, campo).in_(valores))
+    return query
+
+
+@switches_api_bp.route('/switches', methods=['GET'])
+@read_only
+@login_required
+def list_switches():
+    """Coleção paginada por cursor: ?fields=, filtros por coluna, ?search=, ?limit=, ?cursor=, ?count=1
+
+    Sem ?search= a ordem é (id_ativo, id); com ?search=, a de relevância.
+    """
+    try:
+        campos = parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return _erro(str(e))
+
+    limit = request.args.get('limit', PER_PAGE, type=int)
+    if not 1 <= limit <= MAX_PER_PAGE:
+        return _erro(f'limit deve estar entre 1 e {MAX_PER_PAGE}')
+
+    filtros = _filtros(request.args)
+    query = _filtrar(Switch.query, filtros)
+    try:
+        pagina = switch_page(_projecao(query, campos), request.args.get('cursor'), limit, search='search' in filtros)
+    except ValueError as e:
+        return _erro(str(e))
+
+    payload = {
+        'success': True,
+        'data': serializer(campos)(pagina.items),
+        'next_cursor': pagina.next_cursor,
+        'prev_cursor': pagina.prev_cursor,
+    }
+    if request.args.get('count') == '1':
+        payload['total'] = cached_total(query, {'api': True, **filtros})
+    return _json(payload)
+
+
+@switches_api_bp.route('/switches/<int:id>', methods=['GET'])
+@read_only
+@login_required
+def get_switch(id):
+    """Um switch, com a mesma projeção ?fields= da coleção"""
+    try:
+        campos = parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return _erro(str(e))
+
+    row = Switch.query.filter(Switch.id == id).with_entities(*columns(campos)).first()
+    if row is None:
+        return _erro('Switch não encontrado', 404)
+    return _json({'success': True, 'data': serializer(campos)([row])[0]})
+
+
+def _filtro_em_massa(data):
+    """`filter` do corpo, com `ids` no topo como atalho para {"filter": {"ids": [...]}}"""
+    filtro = data.get('filter') or {}
+    if isinstance(filtro, dict) and 'ids' in data:
+        filtro = {**filtro, 'ids': data['ids']}
+    return filtro
+
+
+def _em_massa(operacao):
+    if not current_user.is_admin:
+        return _erro('Apenas administradores podem alterar switches em massa', 403)
+    try:
+        resultado = operacao(request.get_json(silent=True) or {})
+    except ValueError as e:
+        return _erro(str(e))
+    except SQLAlchemyError as e:
+        return _erro(f'Erro ao gravar: {getattr(e, "orig", None) or e}', 500)
+    return jsonify({'success': True, **resultado})
+
+
+@switches_api_bp.route('/switches/bulk-update', methods=['POST'])
+@login_required
+def bulk_update_switches():
+    """Um UPDATE para todos os switches do filtro: {"filter": {...} | "ids": [...], "set": {...}, "dry_run": true}"""
+    return _em_massa(lambda data: bulk_update(
+        _filtro_em_massa(data), data.get('set'), dry_run=bool(data.get('dry_run'))
+    ))
+
+
+@switches_api_bp.route('/switches/bulk-delete', methods=['POST'])
+@login_required
+def bulk_delete_switches():
+    """Um DELETE para todos os switches do filtro: {"filter": {...} | "ids": [...], "dry_run": true}"""
+    return _em_massa(lambda data: bulk_delete(_filtro_em_massa(data), dry_run=bool(data.get('dry_run'))))
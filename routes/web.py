@@ -1,19 +1,28 @@
-from flask import Blueprint, render_template, request, flash, redirect, url_for, jsonify
+from flask import Blueprint, render_template, request, flash, redirect, url_for, jsonify, Response, stream_with_context
 from flask_login import login_required, current_user, login_user, logout_user
 from app import db
 from models.switch import Switch
 from models.user import User
 from models.data_dictionary import DataDictionary
+from models.import_job import ImportJob
+from services.dashboard_stats import current_etag, fleet_summary
+from services.db_routing import read_only
+from services.import_jobs import import_jobs
+from services.readers import READERS
+from services.switch_import import MODO_INSERIR, MODO_ATUALIZAR
+from services.switch_export import FORMATS as EXPORT_FORMATS, STREAMERS as EXPORT_STREAMERS
+from services.switch_pagination import cached_total, switch_page
+from services.switch_search import switch_search
 import json
-from datetime import datetime, timedelta
-import openpyxl
+from datetime import datetime
 from werkzeug.utils import secure_filename
 import os
+import uuid
 
 web_bp = Blueprint('web', __name__)
 
 # Configurações para upload
-ALLOWED_EXTENSIONS = {'xlsx', 'xls'}
+ALLOWED_EXTENSIONS = set(READERS)
 UPLOAD_FOLDER = 'uploads'
 
 def allowed_file(filename):
@@ -89,61 +98,33 @@ def register():
 
 @web_bp.route('/')
 @web_bp.route('/dashboard')
+@read_only
 @login_required
 def dashboard():
-    # Estatísticas para o dashboard
-    total_switches = Switch.query.count()
-    switches_ativos = Switch.query.filter_by(status_funcionamento='Em produção').count()
-    switches_alta_criticidade = Switch.query.filter_by(criticidade='Alta').count()
-    
-    # Distribuição por fabricante
-    fabricantes = db.session.query(
-        Switch.fabricante,
-        db.func.count(Switch.id)
-    ).group_by(Switch.fabricante).all()
-    
-    # Distribuição por status
-    status_distribution = db.session.query(
-        Switch.status_funcionamento,
-        db.func.count(Switch.id)
-    ).group_by(Switch.status_funcionamento).all()
-    
-    # Switches com garantia próxima do vencimento (30 dias)
-    hoje = datetime.now().date()
-    switches_garantia_proxima = Switch.query.filter(
-        Switch.fim_garantia <= (hoje + timedelta(days=30)),
-        Switch.fim_garantia >= hoje
-    ).count()
+    # Estatísticas para o dashboard (uma passada pela tabela, reaproveitada enquanto o inventário não muda)
+    _, resumo = fleet_summary()
     
     return render_template('dashboard.html',
-                         total_switches=total_switches,
-                         switches_ativos=switches_ativos,
-                         switches_alta_criticidade=switches_alta_criticidade,
-                         fabricantes=fabricantes,
-                         switches_garantia_proxima=switches_garantia_proxima,
-                         status_distribution=status_distribution)
+                         total_switches=resumo['total'],
+                         switches_ativos=resumo['ativos'],
+                         switches_alta_criticidade=resumo['alta_criticidade'],
+                         fabricantes=sorted(resumo['por_fabricante'].items()),
+                         switches_garantia_proxima=resumo['garantia_proxima'],
+                         status_distribution=sorted(resumo['por_status'].items()))
 
-@web_bp.route('/switches')
-@login_required
-def switches():
-    page = request.args.get('page', 1, type=int)
-    per_page = 20
-    
-    # Filtros
-    search = request.args.get('search', '')
-    status = request.args.get('status', '')
-    criticidade = request.args.get('criticidade', '')
+LIST_FILTERS = ('search', 'status', 'criticidade')
+
+def filtered_switch_query(args):
+    """Aplica os filtros da lista de switches (search/status/criticidade)"""
+    search = args.get('search', '')
+    status = args.get('status', '')
+    criticidade = args.get('criticidade', '')
     
     query = Switch.query
     
     if search:
-        query = query.filter(
-            db.or_(
-                Switch.id_ativo.ilike(f'%{search}%'),
-                Switch.nome_switch.ilike(f'%{search}%'),
-                Switch.local_detalhado.ilike(f'%{search}%')
-            )
-        )
+        # FTS5 com prefixo e ranking (ilike nas colunas de sempre fora do SQLite)
+        query = switch_search.filter(query, search)
     
     if status:
         query = query.filter(Switch.status_funcionamento == status)
@@ -151,12 +132,58 @@ def switches():
     if criticidade:
         query = query.filter(Switch.criticidade == criticidade)
     
-    switches = query.order_by(Switch.id_ativo).paginate(
-        page=page, per_page=per_page, error_out=False
-    )
+    return query
+
+@web_bp.route('/switches')
+@read_only
+@login_required
+def switches():
+    per_page = 20
+    query = filtered_switch_query(request.args)
+    
+    # Links antigos com ?page=N continuam com paginate() (COUNT + OFFSET)
+    if 'page' in request.args:
+        switches = query.order_by(Switch.id_ativo).paginate(
+            page=request.args.get('page', 1, type=int), per_page=per_page, error_out=False
+        )
+        return render_template('switches/list.html', switches=switches)
+    
+    # Keyset por (id_ativo, id): qualquer página custa o mesmo que a primeira.
+    # Com busca vale a ordem de relevância, paginada por deslocamento
+    try:
+        switches = switch_page(query, request.args.get('cursor'), per_page, search=bool(request.args.get('search')))
+    except ValueError:
+        flash('Link de paginação inválido, voltando ao início da lista.', 'warning')
+        return redirect(url_for('web.switches', **{campo: request.args[campo] for campo in LIST_FILTERS if request.args.get(campo)}))
+    
+    # Total opcional (?count=0 desliga), em cache até o inventário mudar
+    if request.args.get('count') != '0':
+        switches.total = cached_total(query, {campo: request.args.get(campo, '') for campo in LIST_FILTERS})
     
     return render_template('switches/list.html', switches=switches)
 
+@web_bp.route('/switches/export')
+@read_only
+@login_required
+def export_switches():
+    """Exporta os switches filtrados em streaming (CSV, NDJSON ou XLSX)"""
+    formato = request.args.get('formato', 'csv')
+    if formato not in EXPORT_FORMATS:
+        return jsonify({'success': False, 'message': f'Formato não suportado: {formato}'}), 400
+    
+    mimetype, extensao = EXPORT_FORMATS[formato]
+    query = filtered_switch_query(request.args)
+    nome_arquivo = f"switches_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extensao}"
+    
+    return Response(
+        stream_with_context(EXPORT_STREAMERS[formato](query)),
+        mimetype=mimetype,
+        headers={
+            'Content-Disposition': f'attachment; filename="{nome_arquivo}"',
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
 @web_bp.route('/switches/add', methods=['GET', 'POST'])
 @login_required
 def add_switch():
@@ -263,6 +290,7 @@ def add_switch():
     return render_template('switches/add.html')
 
 @web_bp.route('/switches/<int:id>')
+@read_only
 @login_required
 def view_switch(id):
     switch = Switch.query.get_or_404(id)
@@ -379,129 +407,39 @@ def import_switches():
                     os.makedirs(UPLOAD_FOLDER)
                 
                 filename = secure_filename(file.filename)
-                filepath = os.path.join(UPLOAD_FOLDER, filename)
+                filepath = os.path.join(UPLOAD_FOLDER, f"{uuid.uuid4().hex}_{filename}")
                 file.save(filepath)
                 
-                # Processar arquivo Excel
-                workbook = openpyxl.load_workbook(filepath)
-                sheet = workbook['Inventario Switches']
-                
-                imported = 0
-                errors = []
-                
-                # Pular cabeçalho (linha 1) e começar da linha 2
-                for row in sheet.iter_rows(min_row=2, values_only=True):
-                    try:
-                        # Verificar se já existe pelo ID Ativo
-                        if row[0] and Switch.query.filter_by(id_ativo=row[0]).first():
-                            errors.append(f"Switch {row[0]} já existe")
-                            continue
-                        
-                        switch = Switch(
-                            # Identificação e Status
-                            id_ativo=row[0] or f"SW-{Switch.query.count() + 1:04d}",
-                            nome_switch=row[1] or 'Switch Sem Nome',
-                            status_funcionamento=row[2] or 'Em produção',
-                            criticidade=row[3] or 'Média',
-                            ambiente=row[4] or 'Produção',
-                            
-                            # Localização Física
-                            unidade=row[5] or 'Sede',
-                            local_detalhado=row[6],
-                            rack=row[7],
-                            posicao_u=row[8],
-                            ponto_referencia=row[9],
-                            
-                            # Dados Técnicos
-                            fabricante=row[10] or 'Desconhecido',
-                            modelo=row[11] or 'Desconhecido',
-                            numero_serie=row[12],
-                            tipo_switch=row[13],
-                            stack_id=row[14],
-                            qtd_ports_utp=row[15],
-                            ports_utp_usadas=row[16],
-                            qtd_ports_fibra=row[17],
-                            ports_fibra_usadas=row[18],
-                            suporta_poe=row[19] == 'Sim' if row[19] else False,
-                            qtd_ports_poe=row[20],
-                            capacidade_backplane=row[21],
-                            
-                            # Endereçamento e Rede
-                            ip_gestao=row[22],
-                            mascara_gestao=row[23],
-                            gateway_gestao=row[24],
-                            vlan_gestao=row[25],
-                            vlans_configuradas=row[26],
-                            uplink_principal=row[27],
-                            velocidade_uplink=row[28],
-                            
-                            # Software e Configuração
-                            versao_so_firmware=row[29],
-                            data_ultimo_upgrade=row[30] if isinstance(row[30], datetime) else None,
-                            backup_config=row[31] == 'Sim' if row[31] else False,
-                            data_ultimo_backup=row[32] if isinstance(row[32], datetime) else None,
-                            metodo_gestao=row[33],
-                            telnet_habilitado=row[34] == 'Sim' if row[34] else False,
-                            dot1x_habilitado=row[35] == 'Sim' if row[35] else False,
-                            stp_habilitado=row[36] == 'Sim' if row[36] else False,
-                            port_security=row[37] == 'Sim' if row[37] else False,
-                            acl_gestao_resumo=row[38],
-                            ultima_revisao_seg=row[39] if isinstance(row[39], datetime) else None,
-                            
-                            # Dados Administrativos
-                            fornecedor=row[40],
-                            numero_nota_fiscal=row[41],
-                            data_aquisicao=row[42] if isinstance(row[42], datetime) else None,
-                            valor_aquisicao=float(row[43]) if row[43] else None,
-                            centro_custo=row[44],
-                            numero_tombamento=row[45],
-                            projeto_origem=row[46],
-                            inicio_garantia=row[47] if isinstance(row[47], datetime) else None,
-                            fim_garantia=row[48] if isinstance(row[48], datetime) else None,
-                            contrato_suporte=row[49],
-                            sla_fornecedor=row[50],
-                            responsavel_tecnico=row[51],
-                            idade_meses=row[52],
-                            proximo_upgrade_sugerido=row[53] if isinstance(row[53], datetime) else None,
-                            proximo_refresh_tecnico=row[54] if isinstance(row[54], datetime) else None,
-                            observacoes=row[55],
-                            
-                            criado_por=current_user.id
-                        )
-                        
-                        db.session.add(switch)
-                        imported += 1
-                        
-                    except Exception as e:
-                        errors.append(f"Erro na linha {row[0]}: {str(e)}")
-                        continue
-                
-                db.session.commit()
-                
-                # Limpar arquivo temporário
-                if os.path.exists(filepath):
-                    os.remove(filepath)
-                
-                if imported > 0:
-                    flash(f'✅ {imported} switches importados com sucesso!', 'success')
-                if errors:
-                    flash(f'⚠️ {len(errors)} erros durante a importação. Verifique os dados.', 'warning')
-                    for error in errors[:5]:  # Mostrar apenas os primeiros 5 erros
-                        flash(error, 'error')
-                
-                return redirect(url_for('web.switches'))
+                # Processar arquivo em segundo plano; a página acompanha o progresso do job
+                modo = MODO_ATUALIZAR if request.form.get('modo') == MODO_ATUALIZAR else MODO_INSERIR
+                job = import_jobs.submit(os.path.abspath(filepath), filename, current_user.id, modo)
+                flash(f'📥 Importação de {filename} iniciada', 'info')
+                return redirect(url_for('web.import_switches', job=job.id))
                 
             except Exception as e:
                 flash(f'❌ Erro ao processar arquivo: {str(e)}', 'error')
                 return redirect(request.url)
         
         else:
-            flash('Tipo de arquivo não permitido. Use .xlsx ou .xls', 'error')
+            flash('Tipo de arquivo não permitido. Use .xlsx, .csv, .ndjson ou .parquet', 'error')
             return redirect(request.url)
     
-    return render_template('switches/import.html')
+    job = None
+    job_id = request.args.get('job')
+    if job_id:
+        job = _visible_job(job_id)
+    
+    return render_template('switches/import.html', job=job)
+
+def _visible_job(job_id):
+    """Job de importação do usuário atual (administradores veem todos); None se não houver"""
+    job = db.session.get(ImportJob, job_id)
+    if job is None or current_user.is_admin or job.criado_por == current_user.id:
+        return job
+    return None
 
 @web_bp.route('/data-dictionary')
+@read_only
 @login_required
 def data_dictionary():
     dictionary = DataDictionary.query.filter_by(table_name='switches').order_by(DataDictionary.category, DataDictionary.column_name).all()
@@ -529,6 +467,21 @@ def delete_switch(id):
         db.session.rollback()
         return jsonify({'success': False, 'message': str(e)}), 500
 
+@web_bp.route('/api/import-jobs/<job_id>')
+@read_only
+@login_required
+def import_job_status(job_id):
+    """Progresso de um job de importação (consultado pela página de importação)
+
+    Só leitura: jobs parados são retomados pela varredura do import_jobs.
+    Jobs de outros usuários respondem 404, como se não existissem.
+    """
+    job = _visible_job(job_id)
+    if job is None:
+        return jsonify({'success': False, 'message': 'Job não encontrado'}), 404
+    
+    return jsonify({'success': True, 'job': job.to_dict()})
+
 @web_bp.route('/api/init-system', methods=['POST'])
 def init_system():
     """Inicializa o sistema com usuário admin padrão"""
@@ -647,17 +600,21 @@ def init_dictionary():
         return jsonify({'success': False, 'message': str(e)}), 500
 
 @web_bp.route('/api/switches/stats')
+@read_only
 @login_required
 def switches_stats():
-    stats = {
-        'total': Switch.query.count(),
-        'ativos': Switch.query.filter_by(status_funcionamento='Em produção').count(),
-        'inativos': Switch.query.filter(Switch.status_funcionamento != 'Em produção').count(),
-        'alta_criticidade': Switch.query.filter_by(criticidade='Alta').count(),
-        'por_fabricante': dict(db.session.query(Switch.fabricante, db.func.count(Switch.id)).group_by(Switch.fabricante).all()),
-        'por_tipo': dict(db.session.query(Switch.tipo_switch, db.func.count(Switch.id)).group_by(Switch.tipo_switch).all())
-    }
-    return jsonify(stats)
+    # Painéis que fazem polling mandam If-None-Match e recebem 304 lendo só a versão do inventário
+    etag = current_etag()
+    if request.if_none_match.contains(etag):
+        resposta = Response(status=304)
+    else:
+        etag, resumo = fleet_summary()
+        resposta = jsonify({campo: resumo[campo] for campo in (
+            'total', 'ativos', 'inativos', 'alta_criticidade', 'garantia_proxima', 'por_fabricante', 'por_tipo'
+        )})
+    resposta.set_etag(etag)
+    resposta.headers['Cache-Control'] = 'private, no-cache'
+    return resposta
 # Adicione esta rota no arquivo web.py, junto com as outras rotas:
 
 @web_bp.route('/assistant')
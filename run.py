@@ -1,6 +1,22 @@
+# Desenvolvimento: servidor do Werkzeug (uma thread por requisição); os
+# eventos SSE saem do próprio servidor em /api/events.
+# Produção (ver requirements-optional.txt): gunicorn com workers de threads
+# e os eventos num servidor asyncio à parte (services/sse_fanout.py),
+#
+#     SECRET_KEY=... gunicorn -w 2 -k gthread --threads 16 \
+#         'app:create_app({"LIVE_SSE_PORT": 5001})'
+#
+# O primeiro worker abre LIVE_SSE_PORT e atende todos os navegadores numa
+# única thread; conexões ociosas não prendem threads do gunicorn. O
+# SECRET_KEY fixo é o que permite conferir o cookie de sessão emitido por
+# qualquer worker. Sem LIVE_SSE_PORT, /api/events é o caminho de reserva e
+# cada conexão ocupa uma thread: o limite LIVE_MAX_SUBSCRIBERS fica baixo
+# para não esgotar --threads. Workers gevent não servem aqui: as chamadas
+# ao SQLite e as threads de fundo (importações, base do assistente, eventos
+# SSE) bloqueariam o hub.
 from app import create_app
 
 app = create_app()
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    app.run(debug=True, host='0.0.0.0', port=5000)
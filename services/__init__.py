@@ -0,0 +1 @@
+# Este arquivo torna a pasta 'services' um pacote Python
\ No newline at end of file
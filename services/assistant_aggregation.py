@@ -0,0 +1,164 @@
+# services/assistant_aggregation.py
+"""Planejador de agregações do assistente: filtros da pergunta compilados em um único SELECT"""
+import base64
+import json
+from datetime import datetime, timedelta
+from sqlalchemy import and_, func, or_, tuple_
+from app import db
+from models.switch import Switch
+
+LIST_LIMIT = 10
+
+# Colunas da lista curta exibida junto do valor total
+_COLUNAS_LISTA = (
+    Switch.id_ativo,
+    Switch.nome_switch,
+    Switch.status_funcionamento,
+    Switch.fabricante,
+    Switch.local_detalhado,
+    Switch.valor_aquisicao,
+    Switch.ports_utp_usadas,
+    Switch.qtd_ports_utp,
+)
+
+# Colunas usadas na listagem detalhada (linhas leves, seguras para o cache de resultados)
+_COLUNAS_DETALHE = _COLUNAS_LISTA + (
+    Switch.unidade,
+    Switch.criticidade,
+    Switch.fim_garantia,
+)
+
+
+def build_conditions(filters):
+    """Condições SQL equivalentes aos filtros extraídos da pergunta"""
+    conditions = []
+
+    if filters["status"]:
+        conditions.append(Switch.status_funcionamento.in_(filters["status"]))
+
+    if filters["localizacao"]:
+        loc_conditions = []
+        for local in filters["localizacao"]:
+            loc_conditions.append(Switch.unidade.ilike(f'%{local}%'))
+            loc_conditions.append(Switch.local_detalhado.ilike(f'%{local}%'))
+        conditions.append(or_(*loc_conditions))
+
+    if filters["fabricante"]:
+        conditions.append(or_(*[Switch.fabricante.ilike(f'%{fab}%') for fab in filters["fabricante"]]))
+
+    if filters["garantia_proxima"]:
+        hoje = datetime.now().date()
+        limite = hoje + timedelta(days=30)
+        conditions.append(Switch.fim_garantia <= limite)
+        conditions.append(Switch.fim_garantia >= hoje)
+
+    if filters["valor_min"]:
+        conditions.append(Switch.valor_aquisicao >= filters["valor_min"])
+
+    if filters["ports_livres"]:
+        conditions.append(Switch.qtd_ports_utp > Switch.ports_utp_usadas)
+
+    return conditions
+
+
+class AggregationResult:
+    """Totais, distribuição e lista curta produzidos por um único SELECT"""
+
+    def __init__(self, count=0, total_valor=0, grupos=None, switches=None):
+        self.count = count
+        self.total_valor = total_valor
+        self.grupos = grupos or []
+        self.switches = switches or []
+
+
+def run_aggregation(conditions, aggregations):
+    """Executa a agregação pedida com uma única ida ao banco
+
+    - agrupado: GROUP BY fabricante; os totais gerais saem da soma dos grupos
+    - com lista: as linhas (até LIST_LIMIT + 1) carregam COUNT/SUM como
+      funções de janela, então a lista e os totais vêm do mesmo SELECT
+    - caso contrário: um SELECT COUNT/SUM sem GROUP BY
+    """
+    where = and_(*conditions) if conditions else None
+
+    if aggregations["agrupar_por"] == "fabricante":
+        query = db.session.query(
+            Switch.fabricante,
+            func.count(Switch.id),
+            func.sum(Switch.valor_aquisicao)
+        )
+        if where is not None:
+            query = query.filter(where)
+        grupos = query.group_by(Switch.fabricante).order_by(func.count(Switch.id).desc()).all()
+        return AggregationResult(
+            count=sum(count for _, count, _ in grupos),
+            total_valor=sum(valor or 0 for _, _, valor in grupos),
+            grupos=grupos
+        )
+
+    if aggregations["mostrar_lista"]:
+        query = db.session.query(
+            *_COLUNAS_LISTA,
+            func.count(Switch.id).over().label('total_count'),
+            func.sum(Switch.valor_aquisicao).over().label('total_valor')
+        )
+        if where is not None:
+            query = query.filter(where)
+        rows = query.order_by(Switch.nome_switch).limit(LIST_LIMIT + 1).all()
+        if not rows:
+            return AggregationResult()
+        return AggregationResult(
+            count=rows[0].total_count,
+            total_valor=rows[0].total_valor or 0,
+            switches=rows if len(rows) <= LIST_LIMIT else []
+        )
+
+    query = db.session.query(func.count(Switch.id), func.sum(Switch.valor_aquisicao))
+    if where is not None:
+        query = query.filter(where)
+    count, total_valor = query.one()
+    return AggregationResult(count=count or 0, total_valor=total_valor or 0)
+
+
+def list_switches(conditions):
+    """Switches que atendem às condições, ordenados por nome, apenas com as colunas exibidas"""
+    query = db.session.query(*_COLUNAS_DETALHE)
+    if conditions:
+        query = query.filter(and_(*conditions))
+    return query.order_by(Switch.nome_switch, Switch.id).all()
+
+
+def switches_by_ids(ids):
+    """Switches (colunas exibidas) na ordem de `ids`, ex.: ranking da busca por texto"""
+    rows = {row.id: row for row in db.session.query(*_COLUNAS_DETALHE, Switch.id).filter(Switch.id.in_(ids))}
+    return [rows[switch_id] for switch_id in ids if switch_id in rows]
+
+
+def list_switches_page(conditions, after=None, limit=50):
+    """Próxima página da listagem por keyset (nome_switch, id), a partir da linha `after`"""
+    query = db.session.query(*_COLUNAS_DETALHE, Switch.id)
+    if conditions:
+        query = query.filter(and_(*conditions))
+    if after is not None:
+        query = query.filter(tuple_(Switch.nome_switch, Switch.id) > tuple_(after.nome_switch, after.id))
+    return query.order_by(Switch.nome_switch, Switch.id).limit(limit).all()
+
+
+class _Posicao:
+    def __init__(self, nome_switch, id):
+        self.nome_switch = nome_switch
+        self.id = id
+
+
+def encode_cursor(row):
+    """Cursor opaco com a última posição (nome_switch, id) enviada"""
+    conteudo = json.dumps([row.nome_switch, row.id], ensure_ascii=False).encode('utf-8')
+    return base64.urlsafe_b64encode(conteudo).decode('ascii')
+
+
+def decode_cursor(cursor):
+    try:
+        nome_switch, switch_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except (ValueError, TypeError):
+        raise ValueError('Cursor inválido')
+    return _Posicao(nome_switch, int(switch_id))
@@ -0,0 +1,61 @@
+# services/dashboard_stats.py
+"""Números do dashboard e de /api/switches/stats a partir das agregações materializadas (switch_rollups)"""
+import hashlib
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from app import db
+from models.switch import Switch
+from services.fleet_rollups import fleet_totals, read_rollups
+from services.inventory_state import database_version
+
+STATUS_PRODUCAO = 'Em produção'
+
+_lock = threading.Lock()
+_cache = {'etag': None, 'summary': None}
+
+
+def current_etag():
+    """ETag do resumo atual: muda com o inventário e com a virada do dia (janela de garantia)
+
+    Vem do estado confirmado no banco (linha de `inventory_version`, ou a
+    impressão digital de `switches`), não de um contador do processo: todos
+    os workers dão a mesma ETag e nenhum responde 304 depois que outro gravou.
+    """
+    hoje = datetime.now().date()
+    versao = hashlib.sha1(repr(database_version()).encode('utf-8')).hexdigest()[:16]
+    return f'{versao}-{hoje:%Y%m%d}'
+
+
+def _compute():
+    hoje = datetime.now().date()
+    limite = hoje + timedelta(days=30)
+    rollups = read_rollups()
+    por_status = rollups['status_funcionamento']
+    total = fleet_totals(rollups)[0]
+    ativos = por_status.get(STATUS_PRODUCAO, (0, 0))[0]
+    return {
+        'total': total,
+        'ativos': ativos,
+        'inativos': total - ativos,
+        'alta_criticidade': rollups['criticidade'].get('Alta', (0, 0))[0],
+        # Depende da data de hoje, então não cabe numa agregação materializada
+        'garantia_proxima': db.session.query(func.count(Switch.id)).filter(
+            Switch.fim_garantia.between(hoje, limite)
+        ).scalar(),
+        'por_fabricante': {valor: count for valor, (count, _) in rollups['fabricante'].items()},
+        'por_status': {valor: count for valor, (count, _) in por_status.items()},
+        'por_tipo': {valor: count for valor, (count, _) in rollups['tipo_switch'].items()},
+    }
+
+
+def fleet_summary():
+    """(etag, resumo); recalculado só quando a ETag muda"""
+    etag = current_etag()
+    with _lock:
+        if _cache['etag'] == etag:
+            return etag, _cache['summary']
+    summary = _compute()
+    with _lock:
+        _cache['etag'], _cache['summary'] = etag, summary
+    return etag, summary
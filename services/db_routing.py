@@ -0,0 +1,139 @@
+# services/db_routing.py
+"""Roteamento leitura/escrita do `db.session`
+
+Views marcadas como somente leitura (decorador `read_only`, ou as listas
+READ_ONLY_ENDPOINTS / READ_ONLY_BLUEPRINTS) consultam um engine de leitura:
+SQLALCHEMY_READ_URI (réplica) ou, sem ela, um pool próprio de conexões
+somente leitura ao mesmo arquivo SQLite (em WAL leem sem disputar com a
+escrita). Flush, DML e tudo fora dessas views continuam no primário.
+
+"Ler o que escrevi": depois de uma requisição que gravou, o mesmo usuário
+lê do primário por READ_YOUR_WRITES_SECONDS (cobre réplicas atrasadas no
+redirect pós-edição); `read_your_writes()` força o primário no resto da
+requisição atual.
+"""
+import time
+from functools import wraps
+from flask import current_app, g, has_request_context, request, session as flask_session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+
+READ_YOUR_WRITES_SECONDS = 5
+READ_POOL_SIZE = 8
+# Exportações em streaming seguram uma conexão até o fim do download: o excedente
+# atende as demais páginas, e quem passar disso espera até READ_POOL_TIMEOUT
+READ_MAX_OVERFLOW = 16
+READ_POOL_TIMEOUT = 10
+_CHAVE_PRIMARIO = 'ler_primario_ate'
+
+
+def read_only(view):
+    """Marca a view como somente leitura (usa o engine de leitura quando houver)"""
+    view.somente_leitura = True
+    return view
+
+
+def read_your_writes():
+    """Força o primário até o fim da requisição atual"""
+    if has_request_context():
+        g.usar_leitura = False
+
+
+def primary(view):
+    """View que sempre lê do primário, mesmo num blueprint somente leitura"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        read_your_writes()
+        return view(*args, **kwargs)
+    return wrapper
+
+
+class ReadRouter:
+    def __init__(self):
+        self.engine = None
+        self.read_endpoints = set()
+        self.read_blueprints = set()
+        self.window = READ_YOUR_WRITES_SECONDS
+        self.routed = 0
+
+    def init_app(self, app, db):
+        if not app.config.get('READ_ROUTING', True):
+            return
+        self.read_endpoints = set(app.config.get('READ_ONLY_ENDPOINTS', ()))
+        self.read_blueprints = set(app.config.get('READ_ONLY_BLUEPRINTS', ()))
+        self.window = app.config.get('READ_YOUR_WRITES_SECONDS', READ_YOUR_WRITES_SECONDS)
+        with app.app_context():
+            self.engine = self._create_engine(app, db.engine)
+        if self.engine is None:
+            return
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+
+    def _create_engine(self, app, primario):
+        from services.sqlite_profile import install_profile, sqlite_profile
+        opcoes = {
+            'pool_size': app.config.get('READ_POOL_SIZE', READ_POOL_SIZE),
+            'max_overflow': app.config.get('READ_MAX_OVERFLOW', READ_MAX_OVERFLOW),
+            'pool_timeout': app.config.get('READ_POOL_TIMEOUT', READ_POOL_TIMEOUT),
+        }
+        if app.config.get('SQLALCHEMY_READ_URI'):
+            return create_engine(app.config['SQLALCHEMY_READ_URI'], **opcoes)
+
+        # Sem réplica: conexões somente leitura ao mesmo arquivo SQLite
+        url = primario.url
+        if url.get_backend_name() != 'sqlite' or not url.database or url.database == ':memory:':
+            return None
+        url_leitura = make_url(f'sqlite:///file:{url.database}?mode=ro&uri=true')
+        engine = create_engine(url_leitura, connect_args={'check_same_thread': False}, **opcoes)
+        perfil = sqlite_profile(app) or {}
+        # journal_mode exige escrita; query_only barra qualquer gravação acidental
+        perfil = {pragma: valor for pragma, valor in perfil.items() if pragma != 'journal_mode'}
+        install_profile(engine, {**perfil, 'query_only': 1})
+        return engine
+
+    def _before_request(self):
+        view = current_app.view_functions.get(request.endpoint)
+        marcada = (
+            getattr(view, 'somente_leitura', False)
+            or request.endpoint in self.read_endpoints
+            or request.blueprint in self.read_blueprints
+        )
+        g.usar_leitura = bool(marcada) and flask_session.get(_CHAVE_PRIMARIO, 0) < time.time()
+
+    def _after_request(self, resposta):
+        from app import db
+        if db.session().info.get('escreveu'):
+            flask_session[_CHAVE_PRIMARIO] = time.time() + self.window
+        return resposta
+
+    def should_read(self, sessao):
+        if self.engine is None or sessao.info.get('escreveu'):
+            return False
+        if not has_request_context() or not g.get('usar_leitura', False):
+            return False
+        self.routed += 1
+        return True
+
+    def stats(self):
+        return {
+            'enabled': self.engine is not None,
+            'read_url': self.engine.url.render_as_string(hide_password=True) if self.engine is not None else None,
+            'routed': self.routed,
+        }
+
+
+# Instância global configurada em create_app
+read_router = ReadRouter()
+
+
+class RoutingSession(Session):
+    """`db.session` que manda as leituras das views somente leitura ao engine de leitura"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if self._flushing or (clause is not None and getattr(clause, 'is_dml', False)):
+            # Gravou: o resto da requisição lê do primário e o after_request abre a janela
+            self.info['escreveu'] = True
+        elif bind is None and read_router.should_read(self):
+            return read_router.engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
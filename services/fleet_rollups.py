@@ -0,0 +1,205 @@
+# services/fleet_rollups.py
+"""Agregações materializadas da frota (tabela `switch_rollups`), mantidas por triggers do SQLite
+
+Os triggers cobrem qualquer escrita em `switches` (ORM, executemany da
+importação em lote, SQL manual). Leituras de estatística passam a custar
+O(número de grupos) em vez de O(tamanho da frota).
+
+Os triggers são criados pela migração c7e2a4f9d1b6 (ou por `flask rollups
+rebuild`), não a cada inicialização. Sem eles, e em qualquer banco que não
+seja SQLite, `read_rollups` calcula as mesmas agregações direto de `switches`.
+"""
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import text
+from app import db
+
+# Dimensões agregadas; 'total' é a frota inteira (valor '')
+DIMENSIONS = ('fabricante', 'status_funcionamento', 'unidade', 'criticidade', 'tipo_switch')
+TOTAL = 'total'
+STATUS_ATIVOS = ('Em produção', 'Ativo')
+STATUS_INATIVOS = ('Inativo', 'Manutenção')
+_CAMPOS_GATILHO = DIMENSIONS + ('valor_aquisicao',)
+
+
+def _entra(linha):
+    # Soma a linha NEW/OLD em cada dimensão (cria o grupo se não existir)
+    comandos = [f"""
+        INSERT INTO switch_rollups (dimensao, valor, quantidade, valor_total)
+        VALUES ('{TOTAL}', '', 1, COALESCE({linha}.valor_aquisicao, 0))
+        ON CONFLICT (dimensao, valor) DO UPDATE SET
+            quantidade = quantidade + 1, valor_total = valor_total + excluded.valor_total;"""]
+    for dimensao in DIMENSIONS:
+        comandos.append(f"""
+        INSERT INTO switch_rollups (dimensao, valor, quantidade, valor_total)
+        VALUES ('{dimensao}', COALESCE({linha}.{dimensao}, ''), 1, COALESCE({linha}.valor_aquisicao, 0))
+        ON CONFLICT (dimensao, valor) DO UPDATE SET
+            quantidade = quantidade + 1, valor_total = valor_total + excluded.valor_total;""")
+    return ''.join(comandos)
+
+
+def _sai(linha):
+    comandos = [f"""
+        UPDATE switch_rollups SET quantidade = quantidade - 1,
+            valor_total = valor_total - COALESCE({linha}.valor_aquisicao, 0)
+        WHERE dimensao = '{TOTAL}' AND valor = '';"""]
+    for dimensao in DIMENSIONS:
+        comandos.append(f"""
+        UPDATE switch_rollups SET quantidade = quantidade - 1,
+            valor_total = valor_total - COALESCE({linha}.valor_aquisicao, 0)
+        WHERE dimensao = '{dimensao}' AND valor = COALESCE({linha}.{dimensao}, '');""")
+    comandos.append("""
+        DELETE FROM switch_rollups WHERE quantidade <= 0;""")
+    return ''.join(comandos)
+
+
+TRIGGERS = {
+    'trg_switch_rollups_insert': f"""
+    CREATE TRIGGER trg_switch_rollups_insert AFTER INSERT ON switches
+    BEGIN{_entra('NEW')}
+    END""",
+    'trg_switch_rollups_delete': f"""
+    CREATE TRIGGER trg_switch_rollups_delete AFTER DELETE ON switches
+    BEGIN{_sai('OLD')}
+    END""",
+    'trg_switch_rollups_update': f"""
+    CREATE TRIGGER trg_switch_rollups_update AFTER UPDATE OF {', '.join(_CAMPOS_GATILHO)} ON switches
+    BEGIN{_sai('OLD')}{_entra('NEW')}
+    END""",
+}
+
+
+def _expected(conn):
+    """Agregações calculadas direto de `switches` (mesmo formato de `read_rollups`)"""
+    consultas = [f"SELECT '{TOTAL}', '', COUNT(*), COALESCE(SUM(valor_aquisicao), 0) FROM switches HAVING COUNT(*) > 0"]
+    consultas += [
+        f"SELECT '{dimensao}', COALESCE({dimensao}, ''), COUNT(*), COALESCE(SUM(valor_aquisicao), 0) "
+        f"FROM switches GROUP BY COALESCE({dimensao}, '')"
+        for dimensao in DIMENSIONS
+    ]
+    return conn.execute(text(' UNION ALL '.join(consultas))).fetchall()
+
+
+def rebuild(conn=None):
+    """Recalcula `switch_rollups` a partir de `switches` (na transação de `conn`, ou numa nova)"""
+    if conn is None:
+        with db.engine.begin() as conn:
+            return rebuild(conn)
+    linhas = _expected(conn)
+    conn.execute(text('DELETE FROM switch_rollups'))
+    if linhas:
+        conn.execute(
+            text('INSERT INTO switch_rollups (dimensao, valor, quantidade, valor_total) '
+                 'VALUES (:dimensao, :valor, :quantidade, :valor_total)'),
+            [{'dimensao': d, 'valor': v, 'quantidade': q, 'valor_total': t} for d, v, q, t in linhas]
+        )
+    return len(linhas)
+
+
+def installed(conn):
+    """True se os três triggers existem (só no SQLite)"""
+    if conn.dialect.name != 'sqlite':
+        return False
+    existentes = {
+        nome for (nome,) in conn.execute(text(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'trg_switch_rollups_%'"
+        ))
+    }
+    return existentes >= TRIGGERS.keys()
+
+
+def create_triggers(conn):
+    """(Re)cria os triggers e reconstrói as agregações na transação de `conn`"""
+    for nome, ddl in TRIGGERS.items():
+        conn.execute(text(f'DROP TRIGGER IF EXISTS {nome}'))
+        conn.execute(text(ddl))
+    rebuild(conn)
+
+
+def install_rollups():
+    """Cria os triggers que faltarem (só no SQLite); True se os criou"""
+    if db.engine.dialect.name != 'sqlite':
+        return False
+    with db.engine.begin() as conn:
+        if installed(conn):
+            return False
+        create_triggers(conn)
+    current_app.extensions['fleet_rollups'] = True
+    return True
+
+
+def init_app(app):
+    """Usa switch_rollups só se os triggers existirem; nada é criado aqui"""
+    with app.app_context():
+        with db.engine.connect() as conn:
+            app.extensions['fleet_rollups'] = installed(conn)
+
+
+def enabled():
+    return current_app.extensions.get('fleet_rollups', False)
+
+
+def verify():
+    """Diferenças [(dimensao, valor, esperado, gravado)] entre `switch_rollups` e `switches`"""
+    with db.engine.connect() as conn:
+        esperado = {(d, v): (q, round(float(t), 2)) for d, v, q, t in _expected(conn)}
+        gravado = {
+            (d, v): (q, round(float(t), 2))
+            for d, v, q, t in conn.execute(text(
+                'SELECT dimensao, valor, quantidade, valor_total FROM switch_rollups'
+            ))
+        }
+    return [
+        (chave[0], chave[1], esperado.get(chave), gravado.get(chave))
+        for chave in sorted(esperado.keys() | gravado.keys())
+        if esperado.get(chave) != gravado.get(chave)
+    ]
+
+
+def read_rollups():
+    """{dimensao: {valor: (quantidade, valor_total)}}; '' volta a ser None
+
+    Sem os triggers a tabela não é mantida: as agregações saem de `switches`.
+    """
+    if enabled():
+        linhas = db.session.execute(text('SELECT dimensao, valor, quantidade, valor_total FROM switch_rollups'))
+    else:
+        linhas = _expected(db.session)
+    rollups = {dimensao: {} for dimensao in DIMENSIONS + (TOTAL,)}
+    for dimensao, valor, quantidade, valor_total in linhas:
+        rollups.setdefault(dimensao, {})[valor if valor != '' else None] = (quantidade, valor_total or 0)
+    return rollups
+
+
+def fleet_totals(rollups):
+    """(quantidade, valor_total) da frota inteira"""
+    return rollups[TOTAL].get(None, (0, 0))
+
+
+rollups_cli = AppGroup('rollups', help='Agregações materializadas da frota (switch_rollups)')
+
+
+@rollups_cli.command('rebuild')
+def rebuild_command():
+    """Reconstrói switch_rollups e confere com a tabela switches"""
+    if db.engine.dialect.name != 'sqlite':
+        click.echo('switch_rollups só é mantida no SQLite; as estatísticas consultam switches diretamente')
+        raise SystemExit(0)
+    install_rollups()
+    grupos = rebuild()
+    diferencas = verify()
+    click.echo(f'✅ {grupos} grupos reconstruídos' if not diferencas else f'❌ {len(diferencas)} diferenças após reconstruir')
+    raise SystemExit(1 if diferencas else 0)
+
+
+@rollups_cli.command('verify')
+def verify_command():
+    """Confere switch_rollups com a tabela switches sem alterar nada"""
+    if not enabled():
+        click.echo('⚠️ Triggers de switch_rollups ausentes: rode `flask db upgrade` ou `flask rollups rebuild`')
+    diferencas = verify()
+    for dimensao, valor, esperado, gravado in diferencas:
+        click.echo(f'❌ {dimensao}={valor!r}: esperado {esperado}, gravado {gravado}')
+    click.echo('✅ Agregações consistentes' if not diferencas else f'{len(diferencas)} diferenças')
+    raise SystemExit(1 if diferencas else 0)
@@ -0,0 +1,240 @@
+# services/fleet_snapshot.py
+"""Snapshot colunar (NumPy) da tabela `switches` para as perguntas analíticas do assistente
+
+Opcional: sem NumPy instalado o assistente continua consultando o SQLite.
+"""
+import threading
+from datetime import datetime, timedelta
+from app import db
+from models.switch import Switch
+from services.assistant_aggregation import AggregationResult
+from services.inventory_state import current_version
+
+# Colunas categóricas (códigos inteiros + vocabulário) e numéricas
+_CATEGORICAS = ('fabricante', 'status_funcionamento', 'unidade', 'local_detalhado', 'criticidade')
+_NUMERICAS = ('qtd_ports_utp', 'ports_utp_usadas', 'valor_aquisicao')
+_DATAS = ('fim_garantia',)
+
+_CAMPOS = _CATEGORICAS + _NUMERICAS + _DATAS
+_COLUNAS = [Switch.id] + [getattr(Switch, campo) for campo in _CAMPOS]
+
+# Ordinal usado para datas nulas: falha em qualquer comparação de janela
+_SEM_DATA = -1
+
+
+def diff_signatures(anteriores):
+    """Assinaturas atuais {id: (hash_conteudo, data_atualizacao)}, ids removidos e ids novos/alterados
+
+    Lê só três colunas estreitas; quem mantém uma cópia derivada da tabela
+    recarrega apenas as linhas retornadas em `alterados`.
+    """
+    assinaturas = {
+        switch_id: (hash_conteudo, data_atualizacao)
+        for switch_id, hash_conteudo, data_atualizacao in db.session.query(
+            Switch.id, Switch.hash_conteudo, Switch.data_atualizacao
+        )
+    }
+    removidos = anteriores.keys() - assinaturas.keys()
+    alterados = [
+        switch_id for switch_id, assinatura in assinaturas.items()
+        if anteriores.get(switch_id) != assinatura
+    ]
+    return assinaturas, removidos, alterados
+
+
+class _Vocabulario:
+    """Valores distintos de uma coluna categórica; o código é a posição na lista"""
+
+    def __init__(self):
+        self.valores = []
+        self._codigos = {}
+
+    def codigo(self, valor):
+        codigo = self._codigos.get(valor)
+        if codigo is None:
+            codigo = self._codigos[valor] = len(self.valores)
+            self.valores.append(valor)
+        return codigo
+
+    def codigos_exatos(self, valores):
+        return [self._codigos[valor] for valor in valores if valor in self._codigos]
+
+    def codigos_contendo(self, trecho):
+        # Equivalente ao ILIKE '%trecho%' aplicado ao vocabulário, não às linhas
+        trecho = trecho.lower()
+        return [codigo for codigo, valor in enumerate(self.valores) if valor and trecho in valor.lower()]
+
+
+class FleetSnapshot:
+    """Colunas do inventário em arrays NumPy, respondidas com máscaras vetorizadas
+
+    A atualização é incremental: quando a versão do inventário muda (inclusive
+    por gravação de outro worker, ver inventory_state), lê-se só
+    (id, hash_conteudo, data_atualizacao) e recarregam-se as linhas cuja
+    assinatura mudou; linhas removidas saem do snapshot por compactação.
+    Consultas e atualização compartilham `lock`.
+    """
+
+    def __init__(self, np):
+        self.np = np
+        self.version = None
+        self.lock = threading.RLock()
+        self._vocabularios = {campo: _Vocabulario() for campo in _CATEGORICAS}
+        self._assinaturas = {}
+        self._posicoes = {}
+        self.ids = np.empty(0, dtype=np.int64)
+        self.colunas = {campo: np.empty(0, dtype=np.int32) for campo in _CATEGORICAS}
+        self.colunas.update({campo: np.empty(0, dtype=np.float64) for campo in _NUMERICAS})
+        self.colunas.update({campo: np.empty(0, dtype=np.int64) for campo in _DATAS})
+
+    def __len__(self):
+        return len(self.ids)
+
+    # ------------------------------------------------------------------ carga
+
+    def refresh(self, force=False):
+        """Sincroniza com o banco se o inventário mudou desde a última leitura (ou sempre, com `force`)"""
+        version = current_version()
+        if not force and version == self.version:
+            return
+        with self.lock:
+            if not force and version == self.version:
+                return
+            assinaturas, removidos, alterados = diff_signatures(self._assinaturas)
+            if removidos:
+                self._remove(removidos)
+            if alterados:
+                self._upsert(alterados)
+            self._assinaturas = assinaturas
+            self.version = version
+
+    def _remove(self, removidos):
+        np = self.np
+        manter = np.ones(len(self.ids), dtype=bool)
+        manter[[self._posicoes[switch_id] for switch_id in removidos]] = False
+        self.ids = self.ids[manter]
+        for campo, coluna in self.colunas.items():
+            self.colunas[campo] = coluna[manter]
+        self._posicoes = {int(switch_id): posicao for posicao, switch_id in enumerate(self.ids)}
+
+    def _upsert(self, alterados):
+        np = self.np
+        novos = {campo: [] for campo in _CAMPOS}
+        novos_ids = []
+        # Em lotes para respeitar o limite de variáveis do SQLite
+        for inicio in range(0, len(alterados), 500):
+            lote = alterados[inicio:inicio + 500]
+            for row in db.session.query(*_COLUNAS).filter(Switch.id.in_(lote)):
+                valores = self._encode(row)
+                posicao = self._posicoes.get(row.id)
+                if posicao is None:
+                    novos_ids.append(row.id)
+                    for campo, valor in valores.items():
+                        novos[campo].append(valor)
+                else:
+                    for campo, valor in valores.items():
+                        self.colunas[campo][posicao] = valor
+
+        if novos_ids:
+            inicio = len(self.ids)
+            self.ids = np.concatenate([self.ids, np.array(novos_ids, dtype=np.int64)])
+            for campo, coluna in self.colunas.items():
+                self.colunas[campo] = np.concatenate([coluna, np.array(novos[campo], dtype=coluna.dtype)])
+            for deslocamento, switch_id in enumerate(novos_ids):
+                self._posicoes[switch_id] = inicio + deslocamento
+
+    def _encode(self, row):
+        valores = {}
+        for campo in _CATEGORICAS:
+            valores[campo] = self._vocabularios[campo].codigo(getattr(row, campo))
+        for campo in _NUMERICAS:
+            valor = getattr(row, campo)
+            valores[campo] = float(valor) if valor is not None else float('nan')
+        for campo in _DATAS:
+            valor = getattr(row, campo)
+            valores[campo] = valor.toordinal() if valor is not None else _SEM_DATA
+        return valores
+
+    # -------------------------------------------------------------- consultas
+
+    def _in(self, campo, codigos):
+        return self.np.isin(self.colunas[campo], self.np.array(codigos, dtype=self.np.int32))
+
+    def mask(self, filters):
+        """Máscara booleana equivalente a `build_conditions(filters)`"""
+        np = self.np
+        mask = np.ones(len(self.ids), dtype=bool)
+
+        if filters["status"]:
+            mask &= self._in('status_funcionamento',
+                             self._vocabularios['status_funcionamento'].codigos_exatos(filters["status"]))
+
+        if filters["localizacao"]:
+            local = np.zeros(len(self.ids), dtype=bool)
+            for trecho in filters["localizacao"]:
+                local |= self._in('unidade', self._vocabularios['unidade'].codigos_contendo(trecho))
+                local |= self._in('local_detalhado', self._vocabularios['local_detalhado'].codigos_contendo(trecho))
+            mask &= local
+
+        if filters["fabricante"]:
+            codigos = set()
+            for trecho in filters["fabricante"]:
+                codigos.update(self._vocabularios['fabricante'].codigos_contendo(trecho))
+            mask &= self._in('fabricante', sorted(codigos))
+
+        if filters["garantia_proxima"]:
+            hoje = datetime.now().date()
+            fim = self.colunas['fim_garantia']
+            mask &= (fim >= hoje.toordinal()) & (fim <= (hoje + timedelta(days=30)).toordinal())
+
+        if filters["valor_min"]:
+            mask &= self.colunas['valor_aquisicao'] >= filters["valor_min"]
+
+        if filters["ports_livres"]:
+            mask &= self.colunas['qtd_ports_utp'] > self.colunas['ports_utp_usadas']
+
+        return mask
+
+    def totals(self, mask=None):
+        """(contagem, soma de valor_aquisicao) das linhas selecionadas"""
+        valores = self.colunas['valor_aquisicao'] if mask is None else self.colunas['valor_aquisicao'][mask]
+        count = len(self.ids) if mask is None else int(mask.sum())
+        return count, float(self.np.nansum(valores))
+
+    def group_by(self, campo, mask=None):
+        """[(valor, contagem, soma de valor_aquisicao)] por valor da coluna, maior contagem primeiro"""
+        np = self.np
+        codigos = self.colunas[campo] if mask is None else self.colunas[campo][mask]
+        valores = self.colunas['valor_aquisicao'] if mask is None else self.colunas['valor_aquisicao'][mask]
+        vocabulario = self._vocabularios[campo].valores
+        contagens = np.bincount(codigos, minlength=len(vocabulario))
+        somas = np.bincount(codigos, weights=np.nan_to_num(valores), minlength=len(vocabulario))
+        ordem = np.argsort(-contagens, kind='stable')
+        return [
+            (vocabulario[codigo], int(contagens[codigo]), float(somas[codigo]))
+            for codigo in ordem if contagens[codigo]
+        ]
+
+    def aggregate(self, filters, aggregations):
+        """Mesmo resultado de `run_aggregation` para perguntas sem lista de switches"""
+        with self.lock:
+            self.refresh()
+            mask = self.mask(filters)
+            if aggregations["agrupar_por"] == "fabricante":
+                grupos = self.group_by('fabricante', mask)
+                return AggregationResult(
+                    count=sum(count for _, count, _ in grupos),
+                    total_valor=sum(valor for _, _, valor in grupos),
+                    grupos=grupos
+                )
+            count, total_valor = self.totals(mask)
+            return AggregationResult(count=count, total_valor=total_valor)
+
+
+def create_snapshot():
+    """Snapshot vazio, ou None se o NumPy não estiver disponível"""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return FleetSnapshot(numpy)
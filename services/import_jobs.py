@@ -0,0 +1,212 @@
+# services/import_jobs.py
+"""Execução das importações em segundo plano, com progresso e checkpoints por lote
+
+Um job pertence ao worker gravado em `worker_id`. Outro processo só o
+assume (`claim`) com um UPDATE condicional, quando ninguém é dono ou o dono
+parou de dar sinal de vida (`atualizado_em`). O dono confere a posse antes
+de começar e a cada checkpoint; se a perdeu, o lote em andamento é desfeito
+e o job segue com quem o assumiu. Jobs parados são retomados por uma
+varredura periódica (`resume_stale`), nunca por quem só consulta o progresso.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from app import db
+from models.import_job import ImportJob
+from services.readers import iter_rows
+from services.switch_import import (CHUNK_SIZE, ImportResult, SwitchImporter,
+                                    MAX_ERROR_MESSAGES, MODO_INSERIR)
+
+STATUS_ATIVOS = ('pendente', 'executando')
+
+
+class JobLost(Exception):
+    """O job foi assumido por outro worker"""
+
+
+class ImportJobManager:
+    """Pool de workers que executa `ImportJob` e retoma jobs interrompidos"""
+
+    def __init__(self):
+        self.app = None
+        self.executor = None
+        self.worker_id = uuid.uuid4().hex
+        self.stale_seconds = 120
+        self.sweep_seconds = 60
+        self.chunk_size = CHUNK_SIZE
+        self._futures = {}
+        self._sweeper = None
+
+    def init_app(self, app, resume=True):
+        """Configura o pool; com `resume`, uma thread retoma os jobs de processos que morreram no meio
+
+        A varredura roda ao iniciar e a cada IMPORT_JOB_SWEEP_SECONDS. create_app
+        passa resume=False nos comandos da CLI (`flask db upgrade`...): eles não
+        devem assumir importações de outros processos.
+        """
+        self.app = app
+        self.executor = ThreadPoolExecutor(
+            max_workers=app.config.get('IMPORT_WORKERS', 2),
+            thread_name_prefix='import-job'
+        )
+        self.stale_seconds = app.config.get('IMPORT_JOB_STALE_SECONDS', 120)
+        self.sweep_seconds = app.config.get('IMPORT_JOB_SWEEP_SECONDS', 60)
+        self.chunk_size = app.config.get('IMPORT_CHUNK_SIZE', CHUNK_SIZE)
+
+        if resume and self._sweeper is None:
+            self._sweeper = threading.Thread(target=self._sweep_loop, name='import-job-sweep', daemon=True)
+            self._sweeper.start()
+
+    def submit(self, filepath, filename, user_id, modo=MODO_INSERIR):
+        """Registra um novo job e o coloca na fila do pool"""
+        job = ImportJob(
+            id=uuid.uuid4().hex,
+            arquivo=filename,
+            caminho_arquivo=filepath,
+            status='pendente',
+            modo=modo,
+            worker_id=self.worker_id,
+            criado_por=user_id
+        )
+        db.session.add(job)
+        db.session.commit()
+        self._schedule(job.id)
+        return job
+
+    def is_running_here(self, job_id):
+        future = self._futures.get(job_id)
+        return future is not None and not future.done()
+
+    def claim(self, job_id):
+        """Assume um job ativo sem dono ou cujo worker parou de dar sinal de vida
+
+        UPDATE ... WHERE worker_id IS NULL OR atualizado_em < limite: entre
+        dois processos disputando o mesmo job, só um altera a linha.
+        """
+        limite = datetime.utcnow() - timedelta(seconds=self.stale_seconds)
+        claimed = ImportJob.query.filter(
+            ImportJob.id == job_id,
+            ImportJob.status.in_(STATUS_ATIVOS),
+            db.or_(ImportJob.worker_id.is_(None), ImportJob.atualizado_em < limite)
+        ).update({'worker_id': self.worker_id, 'atualizado_em': datetime.utcnow()},
+                 synchronize_session=False)
+        db.session.commit()
+        return claimed == 1
+
+    def _owned(self, job_id, **valores):
+        """UPDATE do job só se este worker ainda for o dono (sem commit); JobLost se não for"""
+        atualizado = ImportJob.query.filter(
+            ImportJob.id == job_id,
+            ImportJob.worker_id == self.worker_id,
+            ImportJob.status.in_(STATUS_ATIVOS)
+        ).update({**valores, 'atualizado_em': datetime.utcnow()}, synchronize_session=False)
+        if atualizado != 1:
+            raise JobLost(job_id)
+
+    def resume(self, job_id):
+        """Retoma o job a partir do último lote gravado, se estiver parado"""
+        if self.is_running_here(job_id) or not self.claim(job_id):
+            return False
+        self._schedule(job_id)
+        return True
+
+    def resume_stale(self):
+        limite = datetime.utcnow() - timedelta(seconds=self.stale_seconds)
+        parados = ImportJob.query.filter(
+            ImportJob.status.in_(STATUS_ATIVOS),
+            ImportJob.atualizado_em < limite
+        ).all()
+        return [job.id for job in parados if self.resume(job.id)]
+
+    def _sweep_loop(self):
+        while True:
+            with self.app.app_context():
+                try:
+                    retomados = self.resume_stale()
+                    if retomados:
+                        print(f'🔁 Importações retomadas: {", ".join(retomados)}')
+                except Exception as e:
+                    print(f'❌ Erro ao retomar importações paradas: {e}')
+                finally:
+                    db.session.remove()
+            time.sleep(self.sweep_seconds)
+
+    def _schedule(self, job_id):
+        self._futures[job_id] = self.executor.submit(self._run, job_id)
+
+    def _run(self, job_id):
+        with self.app.app_context():
+            try:
+                # Na fila, o job pode ter sido assumido por outro processo
+                self._owned(job_id, status='executando')
+                db.session.commit()
+                self._execute(db.session.get(ImportJob, job_id))
+            except JobLost:
+                db.session.rollback()
+                print(f'⚠️ Importação {job_id} assumida por outro worker; lote em andamento descartado')
+            except Exception as e:
+                db.session.rollback()
+                job = db.session.get(ImportJob, job_id)
+                if job.worker_id == self.worker_id:
+                    job.status = 'erro'
+                    job.mensagem = f'Erro ao processar arquivo: {str(e)}'
+                    job.concluido_em = job.atualizado_em = datetime.utcnow()
+                    db.session.commit()
+                    if os.path.exists(job.caminho_arquivo):
+                        os.remove(job.caminho_arquivo)
+            finally:
+                self._futures.pop(job_id, None)
+                db.session.remove()
+
+    def _execute(self, job):
+        job_id = job.id
+        skip = job.checkpoint_linha or 0
+
+        # Restaurar contadores do último checkpoint
+        result = ImportResult()
+        result.rows = skip
+        result.imported = job.linhas_inseridas or 0
+        result.updated = job.linhas_atualizadas or 0
+        result.unchanged = job.linhas_inalteradas or 0
+        result.rejected = job.linhas_rejeitadas or 0
+        result.errors = job.error_list
+
+        if job.iniciado_em is None:
+            job.iniciado_em = datetime.utcnow()
+            db.session.commit()
+        filepath = job.caminho_arquivo
+        criado_por = job.criado_por
+        modo = job.modo
+
+        def checkpoint(result):
+            # Gravado na mesma transação do lote: o lote e o checkpoint persistem juntos,
+            # e um worker que perdeu o job desfaz o lote em vez de gravá-lo
+            self._owned(
+                job_id,
+                linhas_lidas=result.rows,
+                linhas_inseridas=result.imported,
+                linhas_atualizadas=result.updated,
+                linhas_inalteradas=result.unchanged,
+                linhas_rejeitadas=result.rejected,
+                checkpoint_linha=result.rows,
+                erros=json.dumps(result.errors[:MAX_ERROR_MESSAGES], ensure_ascii=False),
+            )
+
+        importer = SwitchImporter(criado_por, self.chunk_size, result=result,
+                                  on_chunk=checkpoint, modo=modo)
+        importer.run(iter_rows(filepath), skip=skip)
+
+        self._owned(job_id, status='concluido', mensagem=result.timing_summary(), concluido_em=datetime.utcnow())
+        db.session.commit()
+
+        # Limpar arquivo temporário
+        if os.path.exists(filepath):
+            os.remove(filepath)
+
+
+# Instância global do gerenciador de importações
+import_jobs = ImportJobManager()
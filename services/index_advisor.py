@@ -0,0 +1,145 @@
+# services/index_advisor.py
+"""Conselheiro de índices: EXPLAIN QUERY PLAN sobre as consultas que o app emite
+
+Cada cenário executa o código de verdade (lista, dashboard, assistente)
+enquanto um listener de `before_cursor_execute` captura os SELECTs
+emitidos; cada SELECT passa por EXPLAIN QUERY PLAN e varreduras completas
+das tabelas monitoradas são sinalizadas. Só SQLite.
+
+    flask indexes advise          # ❌ e código 1 se houver varredura inesperada
+    flask indexes advise --plans  # mostra o plano de todas as consultas
+"""
+import re
+import click
+from flask.cli import AppGroup
+from sqlalchemy import event
+from app import db
+
+# Tabelas cujas varreduras completas são sinalizadas
+TABELAS = ('switches',)
+STATUS_PRODUCAO = 'Em produção'
+
+_SCAN_RE = re.compile(r'^SCAN (?:TABLE )?(\w+)$')
+_COLUNAS_RE = re.compile(r'SELECT (.*?) FROM')
+
+
+def _lista(**filtros):
+    from routes.web import filtered_switch_query
+    from services.switch_pagination import switch_page
+    return lambda: switch_page(filtered_switch_query(filtros), search=bool(filtros.get('search')))
+
+
+def _total(**filtros):
+    from routes.web import filtered_switch_query
+    return lambda: filtered_switch_query(filtros).order_by(None).count()
+
+
+def _dashboard():
+    from services.dashboard_stats import _compute
+    return _compute
+
+
+def _assistente(pergunta, paginado=False):
+    """Plano SQL do assistente para `pergunta` (o mesmo de quando o snapshot está desligado)"""
+    from services.assistant_aggregation import build_conditions, list_switches_page, run_aggregation
+    from services.intent_parser import IntentParser
+    intencao = IntentParser().parse(pergunta)
+    conditions = build_conditions(intencao['filters'])
+    if paginado:
+        return lambda: list_switches_page(conditions)
+    return lambda: run_aggregation(conditions, intencao['aggregations'])
+
+
+# (nome, fábrica do cenário, motivo quando a varredura completa é esperada)
+CENARIOS = [
+    ('lista: status', lambda: _lista(status=STATUS_PRODUCAO), None),
+    ('lista: criticidade', lambda: _lista(criticidade='Alta'), None),
+    ('lista: status + criticidade', lambda: _lista(status=STATUS_PRODUCAO, criticidade='Alta'), None),
+    ('lista: total por status', lambda: _total(status=STATUS_PRODUCAO), None),
+    ('lista: total por criticidade', lambda: _total(criticidade='Alta'), None),
+    ('lista: busca', lambda: _lista(search='core'), None),
+    ('dashboard', _dashboard, None),
+    ('assistente: switches ativos', lambda: _assistente('listar switches ativos', paginado=True), None),
+    ('assistente: garantia vencendo', lambda: _assistente('quantos switches com garantia vencendo'), None),
+    ('assistente: distribuição por fabricante', lambda: _assistente('distribuição por fabricante'), None),
+    ('assistente: valor total cisco', lambda: _assistente('valor total dos switches cisco'), None),
+    ('assistente: switches da sede', lambda: _assistente('quantos switches na sede'),
+     "ILIKE '%termo%' em unidade/local_detalhado não usa índice B-tree"),
+]
+
+
+def capture(executar):
+    """SELECTs (statement, parâmetros) emitidos por `executar()` no engine primário"""
+    capturadas = []
+
+    def _capturar(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            capturadas.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', _capturar)
+    try:
+        executar()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', _capturar)
+        db.session.remove()
+    return capturadas
+
+
+def explain(statement, parameters):
+    """Linhas `detail` do EXPLAIN QUERY PLAN"""
+    with db.engine.connect() as conn:
+        return [linha[-1] for linha in conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters)]
+
+
+def compact(statement):
+    """SQL numa linha, com as listas longas de colunas do ORM abreviadas"""
+    statement = ' '.join(statement.split())
+    return _COLUNAS_RE.sub(lambda m: m.group(0) if len(m.group(1)) <= 60 else 'SELECT … FROM', statement)
+
+
+def full_scans(plano):
+    """Tabelas monitoradas lidas por inteiro no plano"""
+    return [m.group(1) for m in map(_SCAN_RE.match, plano) if m and m.group(1) in TABELAS]
+
+
+def advise():
+    """[(cenário, motivo esperado, [(statement, plano, varreduras)])] para todos os CENARIOS"""
+    relatorio = []
+    for nome, fabrica, esperado in CENARIOS:
+        consultas = []
+        for statement, parameters in capture(fabrica()):
+            plano = explain(statement, parameters)
+            consultas.append((statement, plano, full_scans(plano)))
+        relatorio.append((nome, esperado, consultas))
+    return relatorio
+
+
+indexes_cli = AppGroup('indexes', help='Índices da tabela switches')
+
+
+@indexes_cli.command('advise')
+@click.option('--plans', is_flag=True, help='Mostra o plano de todas as consultas, não só das sinalizadas')
+def advise_command(plans):
+    """Roda EXPLAIN QUERY PLAN nas consultas do app e sinaliza varreduras completas"""
+    if db.engine.dialect.name != 'sqlite':
+        click.echo('⚠️ O conselheiro usa EXPLAIN QUERY PLAN do SQLite')
+        raise SystemExit(0)
+
+    inesperadas = 0
+    for nome, esperado, consultas in advise():
+        varreduras = sorted({tabela for _, _, scans in consultas for tabela in scans})
+        if not varreduras:
+            click.echo(f'✅ {nome} ({len(consultas)} consultas)')
+        elif esperado:
+            click.echo(f'⚠️ {nome}: SCAN {", ".join(varreduras)} (esperado: {esperado})')
+        else:
+            inesperadas += 1
+            click.echo(f'❌ {nome}: SCAN {", ".join(varreduras)}')
+        for statement, plano, scans in consultas:
+            if plans or (scans and not esperado):
+                click.echo(f'    {compact(statement)}')
+                for detalhe in plano:
+                    click.echo(f'      {detalhe}')
+    click.echo('✅ Nenhuma varredura completa inesperada' if not inesperadas
+               else f'{inesperadas} cenários com varredura completa')
+    raise SystemExit(1 if inesperadas else 0)
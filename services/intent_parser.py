@@ -0,0 +1,147 @@
+# services/intent_parser.py
+"""Analisador de intenção do assistente: palavras-chave compiladas em uma única regex"""
+import copy
+import re
+import unicodedata
+from functools import lru_cache
+
+CACHE_SIZE = 512
+
+# Palavras-chave já normalizadas (minúsculas, sem acento) por intenção
+INTENCOES = {
+    "contagem": ('quantos', 'quantas', 'contagem', 'numero', 'qtd', 'total'),
+    "lista": ('mostre', 'liste', 'exiba', 'mostrar', 'listar'),
+    "valor": ('valor', 'preco', 'custo', 'investimento', 'dinheiro'),
+    "localizacao": ('sede', 'filial', 'matriz', 'local', 'onde'),
+    "status": ('ativo', 'inativo', 'manutencao', 'funcionando', 'parado'),
+    "garantia": ('garantia', 'vencimento', 'vencer', 'validade'),
+    "fabricante": ('cisco', 'hp', 'dlink', 'tp-link', 'mikrotik', 'fabricante'),
+    "ports": ('portas', 'ports', 'conexoes', 'livres', 'ocupadas'),
+}
+
+FABRICANTES = ('cisco', 'hp', 'dlink', 'tp-link', 'mikrotik')
+
+# Demais termos usados na montagem dos filtros e agregações
+OUTROS_TERMOS = ('producao', 'disponiveis', 'soma', 'por fabricante', 'distribuicao')
+
+# Grafias alternativas -> palavra-chave canônica
+SINONIMOS = {
+    'd-link': 'dlink',
+    'd link': 'dlink',
+    'tplink': 'tp-link',
+    'tp link': 'tp-link',
+}
+
+_VALOR_RE = re.compile(r'valor.*?(\d+[\.,]?\d*)')
+_ESPACOS_RE = re.compile(r'\s+')
+
+
+def normalize(text):
+    """Minúsculas, sem acentos e com espaços colapsados"""
+    decomposto = unicodedata.normalize('NFKD', text.lower())
+    sem_acento = ''.join(c for c in decomposto if not unicodedata.combining(c))
+    return _ESPACOS_RE.sub(' ', sem_acento).strip()
+
+
+class IntentParser:
+    """Encontra todas as palavras-chave da pergunta em uma única varredura
+
+    A regex é uma alternância com lookahead, então testa todas as posições do
+    texto; em cada posição fica o termo mais longo, e os termos contidos nele
+    (ex.: "ativo" dentro de "inativo") entram pelo fecho pré-calculado. O
+    resultado equivale aos antigos testes `palavra in pergunta`, um por termo.
+    """
+
+    def __init__(self, cache_size=CACHE_SIZE):
+        termos = {palavra for palavras in INTENCOES.values() for palavra in palavras}
+        termos.update(OUTROS_TERMOS)
+        canonicos = {termo: termo for termo in termos}
+        canonicos.update(SINONIMOS)
+
+        # Termo encontrado -> palavras-chave canônicas que ele implica
+        self._implica = {
+            termo: frozenset(canonicos[outro] for outro in canonicos if outro in termo)
+            for termo in canonicos
+        }
+        alternancia = '|'.join(re.escape(termo) for termo in sorted(canonicos, key=len, reverse=True))
+        self._pattern = re.compile(f'(?=({alternancia}))')
+        self._cached_parse = lru_cache(maxsize=cache_size)(self._parse_normalized)
+
+    def keywords(self, normalized):
+        encontrados = set()
+        for match in self._pattern.finditer(normalized):
+            encontrados |= self._implica[match.group(1)]
+        return encontrados
+
+    def parse(self, question):
+        """Filtros, agregações e intenções da pergunta (cache LRU pela pergunta normalizada)"""
+        # Cópia para que quem chama não altere o resultado guardado no cache
+        return copy.deepcopy(self._cached_parse(normalize(question)))
+
+    def cache_info(self):
+        return self._cached_parse.cache_info()
+
+    def _parse_normalized(self, pergunta):
+        k = self.keywords(pergunta)
+
+        filters = {
+            "status": [],
+            "localizacao": [],
+            "fabricante": [],
+            "criticidade": [],
+            "garantia_proxima": False,
+            "valor_min": None,
+            "valor_max": None,
+            "ports_livres": False
+        }
+        aggregations = {
+            "soma_valor": False,
+            "contagem_switches": False,
+            "agrupar_por": None,
+            "mostrar_lista": True
+        }
+        intencoes = {nome: not k.isdisjoint(palavras) for nome, palavras in INTENCOES.items()}
+
+        # STATUS
+        if k & {'inativo', 'manutencao', 'parado'}:
+            filters["status"].extend(["Inativo", "Manutenção", "Inativo (Manutenção)"])
+        elif k & {'ativo', 'producao', 'funcionando'}:
+            filters["status"].extend(["Em produção", "Ativo"])
+
+        # LOCALIZAÇÃO
+        if k & {'sede', 'matriz'}:
+            filters["localizacao"].extend(["Sede", "SEDE", "Matriz"])
+        elif 'filial' in k:
+            filters["localizacao"].extend(["Filial", "Unidade"])
+
+        # FABRICANTE
+        for fabricante in FABRICANTES:
+            if fabricante in k:
+                filters["fabricante"].append(fabricante.title())
+
+        # GARANTIA
+        if k & {'garantia', 'vencimento', 'vencer'}:
+            filters["garantia_proxima"] = True
+
+        # VALOR
+        valor_match = _VALOR_RE.search(pergunta)
+        if valor_match:
+            filters["valor_min"] = float(valor_match.group(1).replace(',', '.'))
+
+        # PORTS
+        if k & {'portas', 'ports'} and k & {'livres', 'disponiveis'}:
+            filters["ports_livres"] = True
+
+        # AGREGAÇÕES
+        if intencoes["contagem"] and not intencoes["lista"]:
+            aggregations["contagem_switches"] = True
+            aggregations["mostrar_lista"] = False
+
+        if intencoes["valor"] and k & {'total', 'soma'}:
+            aggregations["soma_valor"] = True
+
+        if k & {'por fabricante', 'distribuicao'}:
+            aggregations["agrupar_por"] = "fabricante"
+            aggregations["mostrar_lista"] = False
+
+        return {"filters": filters, "aggregations": aggregations, "intentions": intencoes}
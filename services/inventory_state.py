@@ -0,0 +1,105 @@
+# services/inventory_state.py
+"""Versão do inventário visível a todos os processos
+
+O contador de models.switch.inventory_version é do processo: um worker não
+vê as gravações de outro até o próximo `sync`. Caches que precisam valer
+entre workers (respostas do assistente, ETag do dashboard) usam
+`current_version()`, que junta o contador local à versão lida do banco:
+
+* no SQLite, a linha única de `inventory_version`, incrementada por triggers
+  em qualquer INSERT/UPDATE/DELETE de `switches` (criados pela migração
+  d3f8b1a6c5e2 ou por `install_version`);
+* sem os triggers (outros bancos, banco sem a migração), a impressão digital
+  de `switches` (`inventory_fingerprint`). Ela percorre a tabela, então é
+  reaproveitada por até INVENTORY_FINGERPRINT_TTL segundos enquanto o
+  contador local não mudar: gravações de outro processo aparecem com esse atraso.
+"""
+import time
+from flask import current_app
+from sqlalchemy import text
+from app import db
+from models.switch import inventory_fingerprint, inventory_version
+
+FINGERPRINT_TTL = 1.0
+
+TABLE = """
+    CREATE TABLE IF NOT EXISTS inventory_version (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        versao INTEGER NOT NULL
+    )"""
+
+_INCREMENTA = """
+    UPDATE inventory_version SET versao = versao + 1 WHERE id = 1;"""
+
+TRIGGERS = {
+    f'trg_inventory_version_{operacao.lower()}': f"""
+    CREATE TRIGGER trg_inventory_version_{operacao.lower()} AFTER {operacao} ON switches
+    BEGIN{_INCREMENTA}
+    END"""
+    for operacao in ('INSERT', 'UPDATE', 'DELETE')
+}
+
+
+def installed(conn):
+    """True se a tabela e os três triggers existem (só no SQLite)"""
+    if conn.dialect.name != 'sqlite':
+        return False
+    existentes = {
+        nome for (nome,) in conn.execute(text(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'trg_inventory_version_%'"
+        ))
+    }
+    return existentes >= TRIGGERS.keys()
+
+
+def create_triggers(conn):
+    """Cria a tabela (com a linha única) e (re)cria os triggers na transação de `conn`"""
+    conn.execute(text(TABLE))
+    conn.execute(text('INSERT OR IGNORE INTO inventory_version (id, versao) VALUES (1, 0)'))
+    for nome, ddl in TRIGGERS.items():
+        conn.execute(text(f'DROP TRIGGER IF EXISTS {nome}'))
+        conn.execute(text(ddl))
+
+
+def install_version():
+    """Cria a tabela e os triggers se faltarem (só no SQLite; bancos temporários); True se os criou"""
+    if db.engine.dialect.name != 'sqlite':
+        return False
+    with db.engine.begin() as conn:
+        if installed(conn):
+            return False
+        create_triggers(conn)
+    current_app.extensions['inventory_state'] = True
+    return True
+
+
+def init_app(app):
+    """Usa a linha de `inventory_version` só se a migração já criou os triggers; nada é criado aqui"""
+    with app.app_context():
+        with db.engine.connect() as conn:
+            app.extensions['inventory_state'] = installed(conn)
+
+
+def enabled():
+    return current_app.extensions.get('inventory_state', False)
+
+
+def database_version():
+    """Versão de `switches` confirmada no banco, igual em todos os processos"""
+    if enabled():
+        return db.session.execute(text('SELECT versao FROM inventory_version WHERE id = 1')).scalar()
+    # (contador local, instante, impressão digital) da última leitura, por app
+    local, lida_em, impressao = current_app.extensions.get('inventory_state_impressao', (None, 0.0, None))
+    agora = time.monotonic()
+    ttl = current_app.config.get('INVENTORY_FINGERPRINT_TTL', FINGERPRINT_TTL)
+    if local != inventory_version.value or agora - lida_em >= ttl:
+        local = inventory_version.value
+        impressao = inventory_fingerprint(db.session)
+        current_app.extensions['inventory_state_impressao'] = (local, agora, impressao)
+    return impressao
+
+
+def current_version():
+    """Chave de versão para caches: muda com gravações deste processo (inclusive
+    a transação em andamento) e com as já confirmadas por qualquer outro"""
+    return (database_version(), inventory_version.value)
@@ -0,0 +1,98 @@
+# services/knowledge_refresh.py
+"""Atualização da base de conhecimento do assistente fora do caminho das requisições
+
+Uma única thread acorda quando o inventário muda (com uma pequena espera
+para agrupar rajadas de commits) ou a cada `KNOWLEDGE_REFRESH_INTERVAL`
+segundos. O contador de versão é por processo; na rodada periódica a
+thread lê a impressão digital de `switches` no banco (`inventory_fingerprint`)
+e, se outro processo gravou, sobe o contador, o que também invalida o cache
+de resultados, a ETag do dashboard e publica o delta SSE. A rodada periódica
+ainda força a atualização do snapshot e do índice. Com o intervalo 0 não há
+thread, e gravações de outros processos só aparecem após uma gravação local.
+"""
+import threading
+import time
+from datetime import datetime
+from app import db
+from models.switch import inventory_fingerprint, inventory_version
+
+REFRESH_INTERVAL = 60.0
+REFRESH_DEBOUNCE = 0.5
+
+
+class KnowledgeRefresher:
+    def __init__(self):
+        self.app = None
+        self.system = None
+        self.interval = REFRESH_INTERVAL
+        self.debounce = REFRESH_DEBOUNCE
+        self.refreshes = 0
+        self.last_error = None
+        self.last_duration = 0.0
+        self._acordar = threading.Event()
+        self._thread = None
+
+    def init_app(self, app, system):
+        """Inicia a thread, se houver intervalo; a primeira atualização é dela, não de create_app"""
+        self.app = app
+        self.system = system
+        self.interval = app.config.get('KNOWLEDGE_REFRESH_INTERVAL', REFRESH_INTERVAL)
+        self.debounce = app.config.get('KNOWLEDGE_REFRESH_DEBOUNCE', REFRESH_DEBOUNCE)
+
+        # Intervalo 0/None desliga a thread (a base só muda via update_knowledge_base)
+        if self.interval and self._thread is None:
+            inventory_version.subscribe(self.notify)
+            self._thread = threading.Thread(target=self._loop, name='knowledge-refresh', daemon=True)
+            self._thread.start()
+
+    def notify(self, versao=None):
+        self._acordar.set()
+
+    def refresh(self, force=False):
+        inicio = time.perf_counter()
+        with self.app.app_context():
+            try:
+                self.system.update_knowledge_base(force=force)
+                self.last_error = None
+            except Exception as e:
+                self.last_error = f'{datetime.now().isoformat()}: {e}'
+            finally:
+                db.session.remove()
+        self.refreshes += 1
+        self.last_duration = time.perf_counter() - inicio
+
+    def sync(self):
+        """Sobe o contador de versão se `switches` mudou no banco (gravações de outros processos)"""
+        with self.app.app_context():
+            try:
+                return inventory_version.sync(inventory_fingerprint(db.session))
+            except Exception as e:
+                self.last_error = f'{datetime.now().isoformat()}: {e}'
+                return False
+            finally:
+                db.session.remove()
+
+    def stats(self):
+        return {
+            'interval': self.interval,
+            'running': self._thread is not None and self._thread.is_alive(),
+            'refreshes': self.refreshes,
+            'last_duration_ms': round(self.last_duration * 1000, 3),
+            'last_error': self.last_error,
+        }
+
+    def _loop(self):
+        self.sync()
+        self.refresh(force=True)
+        while True:
+            mudou = self._acordar.wait(self.interval)
+            if mudou:
+                time.sleep(self.debounce)
+            else:
+                self.sync()
+            self._acordar.clear()
+            self.refresh(force=not mudou)
+
+
+# Instância global configurada em create_app
+knowledge_refresher = KnowledgeRefresher()
@@ -0,0 +1,219 @@
+# services/live_updates.py
+"""Eventos SSE do inventário (dashboard e painel do assistente)
+
+Uma thread calcula cada evento uma única vez quando `switches` muda: só os
+contadores que mudaram, as contagens por fabricante/status alteradas e as
+garantias que entraram na janela de 30 dias. O texto SSE já serializado vai
+para um histórico curto compartilhado por todos os assinantes.
+
+Quem entrega os eventos é o servidor asyncio de services/sse_fanout.py
+(LIVE_SSE_PORT), sem thread por conexão. /api/events, no servidor WSGI, é
+a alternativa quando ele não está configurado: ali cada conexão ocupa uma
+thread, por isso LIVE_MAX_SUBSCRIBERS é baixo.
+"""
+import json
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from app import db
+from models.switch import Switch, inventory_version
+from services.dashboard_stats import fleet_summary
+
+HISTORY = 256
+KEEPALIVE = 15.0
+DEBOUNCE = 0.5
+MAX_SUBSCRIBERS = 50
+# Sem mudanças, recalcula a cada minuto: a janela de garantia anda com o relógio
+TICK = 60.0
+
+CONTADORES = ('total', 'ativos', 'inativos', 'alta_criticidade', 'garantia_proxima')
+MAPAS = ('por_fabricante', 'por_status')
+
+
+def _sse(seq, tipo, dados):
+    return f'id: {seq}\nevent: {tipo}\ndata: {json.dumps(dados, ensure_ascii=False, default=str)}\n\n'.encode('utf-8')
+
+
+def _garantias_na_janela():
+    hoje = datetime.now().date()
+    rows = db.session.query(Switch.id, Switch.id_ativo, Switch.nome_switch, Switch.fim_garantia).filter(
+        Switch.fim_garantia.between(hoje, hoje + timedelta(days=30))
+    )
+    return {row.id: {'id': row.id, 'id_ativo': row.id_ativo, 'nome_switch': row.nome_switch,
+                     'fim_garantia': row.fim_garantia.isoformat()} for row in rows}
+
+
+def compute_delta(anterior, atual):
+    """Campos de `atual` que diferem de `anterior` (mapas: só as chaves alteradas; 0 = removida)"""
+    delta = {campo: atual[campo] for campo in CONTADORES if atual[campo] != anterior[campo]}
+    for mapa in MAPAS:
+        chaves = anterior[mapa].keys() | atual[mapa].keys()
+        mudou = {chave: atual[mapa].get(chave, 0) for chave in chaves
+                 if atual[mapa].get(chave, 0) != anterior[mapa].get(chave, 0)}
+        if mudou:
+            delta[mapa] = mudou
+    return delta
+
+
+class LiveUpdates:
+    def __init__(self):
+        self.app = None
+        self.keepalive = KEEPALIVE
+        self.debounce = DEBOUNCE
+        self.max_subscribers = MAX_SUBSCRIBERS
+        self.subscribers = 0
+        self.published = 0
+        self._cond = threading.Condition()
+        self._eventos = deque(maxlen=HISTORY)   # (seq, bytes SSE)
+        self._seq = 0
+        self._resumo = None
+        self._garantias = {}
+        self._snapshot = None                   # (seq, bytes SSE do estado completo)
+        self._acordar = threading.Event()
+        self._ouvintes = []
+        self._thread = None
+
+    def init_app(self, app):
+        self.app = app
+        self.keepalive = app.config.get('LIVE_KEEPALIVE', KEEPALIVE)
+        self.debounce = app.config.get('LIVE_DEBOUNCE', DEBOUNCE)
+        self.max_subscribers = app.config.get('LIVE_MAX_SUBSCRIBERS', MAX_SUBSCRIBERS)
+        # O estado inicial é lido pela thread (ou pelo primeiro assinante), nunca em create_app
+        if self._thread is None:
+            inventory_version.subscribe(self.notify)
+            self._thread = threading.Thread(target=self._loop, name='live-updates', daemon=True)
+            self._thread.start()
+
+    def notify(self, versao=None):
+        self._acordar.set()
+
+    def add_listener(self, callback):
+        """`callback()` a cada evento publicado (e quando o estado inicial fica pronto); roda na thread publicadora"""
+        self._ouvintes.append(callback)
+
+    def _avisar(self):
+        for callback in self._ouvintes:
+            callback()
+
+    @property
+    def running(self):
+        """True se a thread que publica os eventos está de pé (sem ela nada chega aos assinantes)"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def try_subscribe(self):
+        """Ocupa uma vaga de assinante se houver (verificação e incremento sob o mesmo lock)"""
+        with self._cond:
+            if self.subscribers >= self.max_subscribers:
+                return False
+            self.subscribers += 1
+            return True
+
+    def unsubscribe(self):
+        with self._cond:
+            self.subscribers -= 1
+
+    def _baseline(self):
+        """Primeira leitura do inventário: referência para os deltas seguintes"""
+        _, resumo = fleet_summary()
+        garantias = _garantias_na_janela()
+        with self._cond:
+            if self._resumo is None:
+                self._resumo, self._garantias = resumo, garantias
+        self._avisar()
+
+    def snapshot_event(self):
+        """(seq, bytes SSE) do estado completo, serializado uma vez por sequência; None antes do estado inicial"""
+        with self._cond:
+            if self._resumo is None:
+                return None
+            if self._snapshot is None or self._snapshot[0] != self._seq:
+                dados = {campo: self._resumo[campo] for campo in CONTADORES + MAPAS}
+                self._snapshot = (self._seq, _sse(self._seq, 'snapshot', dados))
+            return self._snapshot
+
+    def full_event(self):
+        """Estado completo (primeiro evento de cada conexão); lê o banco se ainda não houver estado inicial"""
+        if self._resumo is None:
+            self._baseline()
+        return self.snapshot_event()
+
+    def resume_point(self, last_id):
+        """`last_id` se os eventos seguintes a ele ainda estão no histórico, senão None (manda o estado completo)"""
+        if last_id is None:
+            return None
+        with self._cond:
+            mais_antigo = self._eventos[0][0] if self._eventos else self._seq + 1
+            return last_id if mais_antigo - 1 <= last_id <= self._seq else None
+
+    def pending(self, visto):
+        """Eventos [(seq, bytes SSE)] publicados depois de `visto`"""
+        with self._cond:
+            return [(seq, dados) for seq, dados in self._eventos if seq > visto]
+
+    def events(self, last_id=None):
+        """Gerador de bytes SSE para um assinante; retoma a partir de `last_id` se ainda no histórico
+
+        A vaga é de quem chamou `try_subscribe`, que a devolve com
+        `unsubscribe` quando a resposta fecha (mesmo se o gerador nem começar).
+        """
+        yield f'retry: {int(self.keepalive * 1000)}\n\n'.encode('utf-8')
+        visto = self.resume_point(last_id)
+        if visto is None:
+            visto, dados = self.full_event()
+            yield dados
+        while True:
+            with self._cond:
+                if self._seq == visto:
+                    self._cond.wait(self.keepalive)
+                pendentes = [(seq, dados) for seq, dados in self._eventos if seq > visto]
+            if pendentes:
+                for seq, dados in pendentes:
+                    yield dados
+                visto = pendentes[-1][0]
+            else:
+                # Comentário SSE: mantém proxies abertos e detecta cliente desconectado
+                yield b': keepalive\n\n'
+
+
+    def stats(self):
+        return {'subscribers': self.subscribers, 'published': self.published, 'sequence': self._seq}
+
+    def publish(self):
+        """Calcula o delta desde o último evento e o distribui (nada é publicado se nada mudou)"""
+        if self._resumo is None:
+            self._baseline()
+            return None
+        _, atual = fleet_summary()
+        garantias = _garantias_na_janela()
+        delta = compute_delta(self._resumo, atual)
+        novas = [garantias[switch_id] for switch_id in sorted(garantias.keys() - self._garantias.keys())]
+        if novas:
+            delta['garantias_novas'] = novas
+        with self._cond:
+            self._resumo, self._garantias = atual, garantias
+            if not delta:
+                return None
+            self._seq += 1
+            self._eventos.append((self._seq, _sse(self._seq, 'delta', delta)))
+            self.published += 1
+            self._cond.notify_all()
+        self._avisar()
+        return delta
+
+    def _loop(self):
+        while True:
+            with self.app.app_context():
+                try:
+                    self.publish()
+                except Exception as e:
+                    print(f'❌ Erro ao publicar atualização do inventário: {e}')
+                finally:
+                    db.session.remove()
+            if self._acordar.wait(TICK):
+                time.sleep(self.debounce)
+            self._acordar.clear()
+
+
+# Instância global configurada em create_app
+live_updates = LiveUpdates()
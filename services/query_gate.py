@@ -0,0 +1,134 @@
+# services/query_gate.py
+"""Controle de carga do assistente: coalescência de perguntas idênticas e limite de concorrência"""
+import threading
+import time
+
+MAX_CONCURRENT = 4
+MAX_QUEUE = 32
+QUEUE_TIMEOUT = 2.0
+
+
+class QueryBusy(Exception):
+    """Fila cheia ou tempo de espera esgotado antes de obter uma vaga"""
+
+
+class _Chamada:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.followers = 0
+
+
+class QueryGate:
+    """Single-flight por chave + semáforo com fila limitada e timeout
+
+    Perguntas idênticas em andamento compartilham uma única execução; só o
+    líder disputa uma vaga no semáforo. Quem não consegue vaga dentro de
+    `queue_timeout` (ou encontra a fila cheia) recebe `QueryBusy`.
+    """
+
+    def __init__(self, max_concurrent=MAX_CONCURRENT, max_queue=MAX_QUEUE, queue_timeout=QUEUE_TIMEOUT):
+        self._lock = threading.Lock()
+        self._chamadas = {}
+        self.configure(max_concurrent, max_queue, queue_timeout)
+
+    def configure(self, max_concurrent, max_queue, queue_timeout):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._vagas = threading.BoundedSemaphore(max_concurrent)
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.coalesced = 0
+        self.waits = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def init_app(self, app):
+        self.configure(
+            app.config.get('QUERY_MAX_CONCURRENT', MAX_CONCURRENT),
+            app.config.get('QUERY_MAX_QUEUE', MAX_QUEUE),
+            app.config.get('QUERY_QUEUE_TIMEOUT', QUEUE_TIMEOUT)
+        )
+
+    def acquire(self):
+        """Ocupa uma vaga (aguardando na fila até `queue_timeout`) ou levanta `QueryBusy`"""
+        with self._lock:
+            if self.waiting >= self.max_queue:
+                self.rejected += 1
+                raise QueryBusy('Fila de consultas cheia')
+            self.waiting += 1
+        inicio = time.perf_counter()
+        obtida = self._vagas.acquire(timeout=self.queue_timeout)
+        espera = time.perf_counter() - inicio
+        with self._lock:
+            self.waiting -= 1
+            self.waits += 1
+            self.wait_total += espera
+            self.wait_max = max(self.wait_max, espera)
+            if not obtida:
+                self.rejected += 1
+                raise QueryBusy('Tempo de espera por uma vaga esgotado')
+            self.admitted += 1
+            self.in_flight += 1
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+        self._vagas.release()
+
+    def run(self, key, func):
+        """Executa `func()` sob o limite de concorrência, compartilhando execuções com a mesma `key`
+
+        Retorna (resultado, compartilhado): `compartilhado` é True para quem
+        esperou a execução de outro pedido em vez de executar.
+        """
+        with self._lock:
+            chamada = self._chamadas.get(key)
+            lider = chamada is None
+            if lider:
+                chamada = self._chamadas[key] = _Chamada()
+            else:
+                chamada.followers += 1
+                self.coalesced += 1
+
+        if not lider:
+            chamada.done.wait()
+            if chamada.error is not None:
+                raise chamada.error
+            return chamada.result, True
+
+        try:
+            self.acquire()
+            try:
+                chamada.result = func()
+            finally:
+                self.release()
+        except Exception as e:
+            chamada.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._chamadas[key]
+            chamada.done.set()
+        return chamada.result, False
+
+    def stats(self):
+        with self._lock:
+            return {
+                'max_concurrent': self.max_concurrent,
+                'in_flight': self.in_flight,
+                'queue_depth': self.waiting,
+                'admitted': self.admitted,
+                'rejected': self.rejected,
+                'coalesced': self.coalesced,
+                'wait_avg_ms': round(1000 * self.wait_total / max(self.waits, 1), 2),
+                'wait_max_ms': round(1000 * self.wait_max, 2),
+            }
+
+
+# Instância global usada pelas rotas do assistente
+query_gate = QueryGate()
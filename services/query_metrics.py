@@ -0,0 +1,124 @@
+# services/query_metrics.py
+"""Tempos por etapa das consultas do assistente e percentis em janela móvel"""
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+STAGES = ('parse', 'build', 'execute', 'format')
+WINDOW = 1000
+
+_local = threading.local()
+
+
+class QueryTrace:
+    """Tempos de uma consulta; `sql` é a parte de `execute` (e demais etapas) gasta no cursor do banco"""
+
+    def __init__(self):
+        self.timings = {etapa: 0.0 for etapa in STAGES}
+        self.sql_time = 0.0
+        self.sql_statements = 0
+        self.total = 0.0
+        self._inicio = time.perf_counter()
+
+    def finish(self):
+        self.total = time.perf_counter() - self._inicio
+
+    def to_dict(self):
+        tempos = {f'{etapa}_ms': round(segundos * 1000, 3) for etapa, segundos in self.timings.items()}
+        tempos['sql_ms'] = round(self.sql_time * 1000, 3)
+        tempos['sql_statements'] = self.sql_statements
+        tempos['total_ms'] = round(self.total * 1000, 3)
+        return tempos
+
+
+def start_trace():
+    trace = _local.trace = QueryTrace()
+    return trace
+
+
+def end_trace():
+    trace = getattr(_local, 'trace', None)
+    _local.trace = None
+    if trace is not None:
+        trace.finish()
+    return trace
+
+
+@contextmanager
+def stage(nome):
+    """Soma o tempo do bloco na etapa `nome` da consulta em andamento nesta thread (se houver)"""
+    trace = getattr(_local, 'trace', None)
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        if trace is not None:
+            trace.timings[nome] += time.perf_counter() - inicio
+
+
+# O início fica no contexto da execução (descartado junto com ela): um comando
+# que falha não chega a after_cursor_execute e não deixa nada para trás
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context.query_metrics_inicio = time.perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    inicio = getattr(context, 'query_metrics_inicio', None)
+    trace = getattr(_local, 'trace', None)
+    if trace is not None and inicio is not None:
+        trace.sql_time += time.perf_counter() - inicio
+        trace.sql_statements += 1
+
+
+class QueryMetrics:
+    """Últimas `window` consultas por etapa, para p50/p95/p99"""
+
+    def __init__(self, window=WINDOW):
+        self.window = window
+        self.count = 0
+        self._lock = threading.Lock()
+        self._amostras = {
+            nome: deque(maxlen=window)
+            for nome in STAGES + ('sql', 'sql_statements', 'total')
+        }
+
+    def record(self, trace):
+        with self._lock:
+            self.count += 1
+            for etapa, segundos in trace.timings.items():
+                self._amostras[etapa].append(segundos * 1000)
+            self._amostras['sql'].append(trace.sql_time * 1000)
+            self._amostras['sql_statements'].append(trace.sql_statements)
+            self._amostras['total'].append(trace.total * 1000)
+
+    def snapshot(self):
+        with self._lock:
+            amostras = {nome: sorted(valores) for nome, valores in self._amostras.items()}
+            count = self.count
+        resumo = {'queries': count, 'window': self.window, 'stages': {}}
+        for nome, valores in amostras.items():
+            if not valores:
+                continue
+            resumo['stages'][nome] = {
+                'p50': _percentil(valores, 50),
+                'p95': _percentil(valores, 95),
+                'p99': _percentil(valores, 99),
+                'max': round(valores[-1], 3),
+            }
+        return resumo
+
+
+def _percentil(ordenados, p):
+    # Nearest-rank sobre a janela já ordenada
+    indice = max(0, -(-len(ordenados) * p // 100) - 1)
+    return round(ordenados[int(indice)], 3)
+
+
+# Instância global alimentada por NetworkRAGSystem.query
+query_metrics = QueryMetrics()
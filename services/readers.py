@@ -0,0 +1,180 @@
+# services/readers.py
+"""Leitores em streaming dos arquivos de inventário (XLSX, CSV, NDJSON, Parquet)
+
+Todo leitor produz tuplas posicionais de `TOTAL_COLUNAS` valores na ordem da
+planilha "Inventario Switches", para que a validação e a gravação em lotes de
+`services.switch_import` sejam as mesmas para qualquer formato.
+"""
+import csv
+import json
+import os
+import re
+import unicodedata
+import openpyxl
+
+SHEET_NAME = 'Inventario Switches'
+
+# Ordem das colunas da planilha: (cabeçalho da planilha, campo de `Switch`)
+COLUMNS = [
+    ('ID_Ativo', 'id_ativo'), ('Nome_Switch', 'nome_switch'),
+    ('Status_Funcionamento', 'status_funcionamento'), ('Criticidade', 'criticidade'),
+    ('Ambiente', 'ambiente'), ('Unidade', 'unidade'), ('Local_Detalhado', 'local_detalhado'),
+    ('Rack', 'rack'), ('Posição_U', 'posicao_u'), ('Ponto_Referencia', 'ponto_referencia'),
+    ('Fabricante', 'fabricante'), ('Modelo', 'modelo'), ('Nº_Série', 'numero_serie'),
+    ('Tipo_Switch', 'tipo_switch'), ('Stack_ID', 'stack_id'), ('Qtd_Ports_UTP', 'qtd_ports_utp'),
+    ('Ports_UTP_Usadas', 'ports_utp_usadas'), ('Qtd_Ports_Fibra', 'qtd_ports_fibra'),
+    ('Ports_Fibra_Usadas', 'ports_fibra_usadas'), ('Suporta_PoE', 'suporta_poe'),
+    ('Qtd_Ports_PoE', 'qtd_ports_poe'), ('Capacidade_Backplane', 'capacidade_backplane'),
+    ('IP_Gestão', 'ip_gestao'), ('Máscara_Gestão', 'mascara_gestao'),
+    ('Gateway_Gestão', 'gateway_gestao'), ('VLAN_Gestão', 'vlan_gestao'),
+    ('VLANs_Configuradas', 'vlans_configuradas'), ('Uplink_Principal', 'uplink_principal'),
+    ('Velocidade_Uplink', 'velocidade_uplink'), ('Versão_SO_Firmware', 'versao_so_firmware'),
+    ('Data_Último_Upgrade', 'data_ultimo_upgrade'), ('Backup_Config', 'backup_config'),
+    ('Data_Último_Backup', 'data_ultimo_backup'), ('Método_Gestão', 'metodo_gestao'),
+    ('Telnet_Habilitado', 'telnet_habilitado'), ('8021X_Habilitado', 'dot1x_habilitado'),
+    ('STP_Habilitado', 'stp_habilitado'), ('Port_Security', 'port_security'),
+    ('ACL_Gestão_Resumo', 'acl_gestao_resumo'), ('Última_Revisao_Seg', 'ultima_revisao_seg'),
+    ('Fornecedor', 'fornecedor'), ('Nº_Nota_Fiscal', 'numero_nota_fiscal'),
+    ('Data_Aquisição', 'data_aquisicao'), ('Valor_Aquisição', 'valor_aquisicao'),
+    ('Centro_Custo', 'centro_custo'), ('Nº Tombamento', 'numero_tombamento'),
+    ('Projeto_Origem', 'projeto_origem'), ('Início_Garantia', 'inicio_garantia'),
+    ('Fim_Garantia', 'fim_garantia'), ('Contrato_Suporte', 'contrato_suporte'),
+    ('SLA_Fornecedor', 'sla_fornecedor'), ('Responsável_Técnico', 'responsavel_tecnico'),
+    ('Idade_Meses', 'idade_meses'), ('Proximo_Upgrade_Sugerido', 'proximo_upgrade_sugerido'),
+    ('Proximo_Refresh_Tecnico', 'proximo_refresh_tecnico'), ('Observações', 'observacoes'),
+]
+TOTAL_COLUNAS = len(COLUMNS)
+FIELD_ORDER = [campo for _, campo in COLUMNS]
+
+
+def normalize_header(nome):
+    """'Nº_Série' -> 'nserie'; 'numero_serie' -> 'numeroserie'"""
+    nome = unicodedata.normalize('NFKD', str(nome)).encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'[^a-z0-9]', '', nome.lower())
+
+
+# Cabeçalho da planilha ou nome do campo -> posição na tupla
+HEADER_INDEX = {}
+for _posicao, (_cabecalho, _campo) in enumerate(COLUMNS):
+    HEADER_INDEX[normalize_header(_cabecalho)] = _posicao
+    HEADER_INDEX[normalize_header(_campo)] = _posicao
+
+
+def _empty_to_none(valor):
+    if isinstance(valor, str):
+        valor = valor.strip()
+        return valor or None
+    return valor
+
+
+def _pad(row):
+    if len(row) < TOTAL_COLUNAS:
+        return tuple(row) + (None,) * (TOTAL_COLUNAS - len(row))
+    return tuple(row)
+
+
+def _is_header(row):
+    return isinstance(row[0], str) and normalize_header(row[0]) == 'idativo'
+
+
+class _Projection:
+    """Reordena colunas nomeadas para a ordem posicional da planilha"""
+
+    def __init__(self, nomes):
+        self.posicoes = [HEADER_INDEX.get(normalize_header(nome)) for nome in nomes]
+        if 0 not in self.posicoes:
+            raise ValueError('Coluna ID_Ativo não encontrada no cabeçalho')
+
+    def __call__(self, valores):
+        row = [None] * TOTAL_COLUNAS
+        for posicao, valor in zip(self.posicoes, valores):
+            if posicao is not None:
+                row[posicao] = _empty_to_none(valor)
+        return tuple(row)
+
+
+def read_xlsx(filepath):
+    """Lê a planilha linha a linha em modo somente leitura (memória constante)"""
+    workbook = openpyxl.load_workbook(filepath, read_only=True, data_only=True)
+    try:
+        sheet = workbook[SHEET_NAME]
+        # Pular cabeçalho (linha 1) e começar da linha 2
+        for row in sheet.iter_rows(min_row=2, values_only=True):
+            if not any(valor is not None for valor in row) or _is_header(row):
+                continue
+            yield _pad(row)
+    finally:
+        workbook.close()
+
+
+def read_csv(filepath):
+    """CSV com cabeçalho (nomes da planilha ou dos campos); `,` ou `;` como separador"""
+    with open(filepath, newline='', encoding='utf-8-sig') as arquivo:
+        amostra = arquivo.read(4096)
+        arquivo.seek(0)
+        delimitador = ';' if amostra.count(';') > amostra.count(',') else ','
+        reader = csv.reader(arquivo, delimiter=delimitador)
+        cabecalho = next(reader, None)
+        if cabecalho is None:
+            return
+        projetar = _Projection(cabecalho)
+        for valores in reader:
+            if not any(valores):
+                continue
+            yield projetar(valores)
+
+
+def read_ndjson(filepath):
+    """Um objeto JSON por linha, com chaves de cabeçalho ou de campo"""
+    projecoes = {}
+    with open(filepath, encoding='utf-8') as arquivo:
+        for numero, linha in enumerate(arquivo, start=1):
+            linha = linha.strip()
+            if not linha:
+                continue
+            try:
+                registro = json.loads(linha)
+            except ValueError as e:
+                raise ValueError(f'JSON inválido na linha {numero}: {e}')
+            # Exportações do CMDB repetem sempre o mesmo conjunto de chaves
+            chaves = tuple(registro)
+            projetar = projecoes.get(chaves)
+            if projetar is None:
+                projetar = projecoes[chaves] = _Projection(chaves)
+            yield projetar(registro.values())
+
+
+def read_parquet(filepath, batch_size=10000):
+    """Parquet lido por row groups/lotes com pyarrow (dependência opcional)"""
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValueError('Leitura de Parquet requer o pacote pyarrow')
+    arquivo = pq.ParquetFile(filepath)
+    projetar = _Projection(arquivo.schema_arrow.names)
+    for lote in arquivo.iter_batches(batch_size=batch_size):
+        colunas = [coluna.to_pylist() for coluna in lote.columns]
+        for valores in zip(*colunas):
+            yield projetar(valores)
+
+
+READERS = {
+    'xlsx': read_xlsx,
+    'xls': read_xlsx,
+    'csv': read_csv,
+    'ndjson': read_ndjson,
+    'jsonl': read_ndjson,
+    'parquet': read_parquet,
+}
+
+
+def file_extension(filename):
+    return filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
+
+
+def iter_rows(filepath):
+    """Escolhe o leitor pela extensão do arquivo"""
+    reader = READERS.get(file_extension(os.path.basename(filepath)))
+    if reader is None:
+        raise ValueError(f'Formato de arquivo não suportado: {os.path.basename(filepath)}')
+    return reader(filepath)
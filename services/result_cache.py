@@ -0,0 +1,67 @@
+# services/result_cache.py
+"""Cache de resultados do assistente, invalidado pela versão do inventário"""
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+CACHE_SIZE = 256
+
+MISS = object()
+
+
+def cache_key(filters, aggregations):
+    """Chave hashável da estrutura filtros/agregações de uma pergunta"""
+    def congelar(valor):
+        return tuple(valor) if isinstance(valor, list) else valor
+
+    key = (
+        tuple(sorted((nome, congelar(valor)) for nome, valor in filters.items())),
+        tuple(sorted((nome, congelar(valor)) for nome, valor in aggregations.items())),
+    )
+    if filters.get("garantia_proxima"):
+        # A janela de garantia é relativa ao dia corrente
+        key += (datetime.now().date(),)
+    return key
+
+
+class ResultCache:
+    """LRU limitado por `maxsize`; entradas de versões anteriores do inventário são descartadas"""
+
+    def __init__(self, maxsize=CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return MISS
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, version, value):
+        with self._lock:
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+            }
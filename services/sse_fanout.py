@@ -0,0 +1,224 @@
+# services/sse_fanout.py
+"""Entrega dos eventos SSE do inventário num laço asyncio, sem uma thread por conexão
+
+LiveUpdates calcula e serializa cada evento uma vez (thread `live-updates`).
+Com LIVE_SSE_PORT configurado, uma única thread roda aqui um servidor HTTP
+mínimo nessa porta: cada assinante é uma corrotina esperando o próximo
+evento, e centenas de conexões ociosas custam só memória. Nada neste laço
+toca o SQLite: o estado completo é o que o publicador já calculou, e quem
+conecta antes disso espera o primeiro aviso.
+
+Com vários workers, só o primeiro a abrir a porta distribui; os demais
+seguem sem o servidor (o publicador de cada um percebe gravações dos
+outros pela versão do inventário). O navegador conecta em
+http://<host>:LIVE_SSE_PORT/events, ou em LIVE_EVENTS_URL quando um proxy
+reverso encaminha um caminho do site para a porta. A sessão do Flask-Login
+é conferida pelo cookie assinado, sem consulta ao banco.
+"""
+import asyncio
+import socket
+import threading
+from http.cookies import SimpleCookie
+from urllib.parse import urlsplit
+from itsdangerous import BadSignature
+from services.live_updates import live_updates
+
+MAX_SUBSCRIBERS = 2000
+REQUEST_TIMEOUT = 10.0
+DRAIN_TIMEOUT = 30.0
+MAX_HEADER_LINES = 100
+
+
+def _resposta(status, motivo, headers=(), corpo=b''):
+    linhas = [f'HTTP/1.1 {status} {motivo}', *(f'{nome}: {valor}' for nome, valor in headers)]
+    if status != 200:
+        linhas += [f'Content-Length: {len(corpo)}', 'Connection: close']
+    return ('\r\n'.join(linhas) + '\r\n\r\n').encode('latin-1') + corpo
+
+
+async def _ler_pedido(reader):
+    """(método, caminho, {cabeçalho: valor}) da requisição, ou None se malformada"""
+    partes = (await reader.readline()).decode('latin-1').split()
+    if len(partes) != 3:
+        return None
+    headers = {}
+    for _ in range(MAX_HEADER_LINES):
+        linha = (await reader.readline()).decode('latin-1').strip()
+        if not linha:
+            return partes[0], urlsplit(partes[1]).path, headers
+        nome, _, valor = linha.partition(':')
+        headers[nome.strip().lower()] = valor.strip()
+    return None
+
+
+class SSEFanout:
+    """Servidor asyncio em thread própria que repassa os eventos de um LiveUpdates"""
+
+    def __init__(self, live):
+        self.live = live
+        self.app = None
+        self.port = None
+        self.max_subscribers = MAX_SUBSCRIBERS
+        self.subscribers = 0
+        self._loop = None
+        self._sinal = None
+        self._thread = None
+
+    def init_app(self, app, start=True):
+        """Publica a URL dos eventos para os templates e, com `start`, abre o servidor em LIVE_SSE_PORT
+
+        Retorna True se este processo ficou com a porta.
+        """
+        self.app = app
+        self.max_subscribers = app.config.get('LIVE_SSE_MAX_SUBSCRIBERS', MAX_SUBSCRIBERS)
+        porta = app.config.get('LIVE_SSE_PORT')
+        app.jinja_env.globals['live_events'] = {
+            'url': app.config.get('LIVE_EVENTS_URL') or (None if porta else '/api/events'),
+            'port': porta,
+        }
+        if not start or porta is None or self._thread is not None:
+            return False
+        try:
+            sock = socket.create_server((app.config.get('LIVE_SSE_HOST', '0.0.0.0'), int(porta)))
+        except OSError as e:
+            print(f'ℹ️ Eventos SSE na porta {porta} ficam com outro processo ({e})')
+            return False
+        self.port = sock.getsockname()[1]
+        pronto = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(sock, pronto), name='sse-fanout', daemon=True)
+        self._thread.start()
+        pronto.wait()
+        self.live.add_listener(self._avisar)
+        return True
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def stats(self):
+        return {'running': self.running, 'port': self.port, 'subscribers': self.subscribers}
+
+    # ------------------------------------------------------------------ laço
+
+    def _run(self, sock, pronto):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._sinal = self._loop.create_future()
+        self._loop.run_until_complete(asyncio.start_server(self._cliente, sock=sock))
+        pronto.set()
+        self._loop.run_forever()
+
+    def _avisar(self):
+        # Thread do publicador -> laço: acorda todos os assinantes de uma vez
+        self._loop.call_soon_threadsafe(self._sinalizar)
+
+    def _sinalizar(self):
+        sinal, self._sinal = self._sinal, self._loop.create_future()
+        sinal.set_result(None)
+
+    async def _esperar(self, sinal):
+        """True se chegou evento, False se passou `keepalive` sem nada"""
+        try:
+            await asyncio.wait_for(asyncio.shield(sinal), self.live.keepalive)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def _escrever(self, writer, dados):
+        writer.write(dados)
+        # Cliente que não lê (rede parada) sai em vez de acumular buffer
+        await asyncio.wait_for(writer.drain(), DRAIN_TIMEOUT)
+
+    # ------------------------------------------------------------- conexões
+
+    def _autorizado(self, headers):
+        """Sessão do Flask-Login no cookie assinado (sem consultar o banco)"""
+        if self.app.config.get('LOGIN_DISABLED'):
+            return True
+        cookie = SimpleCookie()
+        try:
+            cookie.load(headers.get('cookie', ''))
+        except Exception:
+            return False
+        morsel = cookie.get(self.app.config['SESSION_COOKIE_NAME'])
+        serializer = self.app.session_interface.get_signing_serializer(self.app)
+        if morsel is None or serializer is None:
+            return False
+        try:
+            sessao = serializer.loads(morsel.value, max_age=int(self.app.permanent_session_lifetime.total_seconds()))
+        except BadSignature:
+            return False
+        return '_user_id' in sessao
+
+    def _cors(self, headers):
+        """Página servida pelo WSGI na mesma máquina (outra porta): libera a origem com cookies"""
+        origem = headers.get('origin')
+        host = headers.get('host', '').rsplit(':', 1)[0]
+        if origem and urlsplit(origem).hostname == host:
+            return [('Access-Control-Allow-Origin', origem), ('Access-Control-Allow-Credentials', 'true'),
+                    ('Vary', 'Origin')]
+        return []
+
+    async def _cliente(self, reader, writer):
+        inscrito = False
+        try:
+            pedido = await asyncio.wait_for(_ler_pedido(reader), REQUEST_TIMEOUT)
+            if pedido is None:
+                writer.write(_resposta(400, 'Bad Request'))
+                return
+            metodo, caminho, headers = pedido
+            if metodo != 'GET' or caminho.rstrip('/') not in ('/events', '/api/events'):
+                writer.write(_resposta(404, 'Not Found'))
+                return
+            cors = self._cors(headers)
+            if not self._autorizado(headers):
+                writer.write(_resposta(401, 'Unauthorized', cors))
+                return
+            if self.subscribers >= self.max_subscribers:
+                writer.write(_resposta(503, 'Service Unavailable', cors + [('Retry-After', '30')]))
+                return
+            # Tudo no mesmo laço: verificar e ocupar a vaga não tem corrida
+            self.subscribers += 1
+            inscrito = True
+
+            writer.write(_resposta(200, 'OK', cors + [
+                ('Content-Type', 'text/event-stream; charset=utf-8'),
+                ('Cache-Control', 'no-cache'),
+                ('X-Accel-Buffering', 'no'),
+            ]))
+            await self._escrever(writer, f'retry: {int(self.live.keepalive * 1000)}\n\n'.encode('utf-8'))
+            await self._transmitir(writer, headers.get('last-event-id'))
+        except (ConnectionError, asyncio.TimeoutError, asyncio.IncompleteReadError, UnicodeDecodeError):
+            pass
+        finally:
+            if inscrito:
+                self.subscribers -= 1
+            writer.close()
+
+    async def _transmitir(self, writer, last_id):
+        try:
+            visto = self.live.resume_point(int(last_id)) if last_id else None
+        except ValueError:
+            visto = None
+        while visto is None:
+            sinal = self._sinal
+            evento = self.live.snapshot_event()
+            if evento is not None:
+                visto, dados = evento
+                await self._escrever(writer, dados)
+            elif not await self._esperar(sinal):
+                await self._escrever(writer, b': keepalive\n\n')
+        while True:
+            # Pega o sinal antes de olhar o histórico: um evento entre os dois não se perde
+            sinal = self._sinal
+            pendentes = self.live.pending(visto)
+            if pendentes:
+                await self._escrever(writer, b''.join(dados for _, dados in pendentes))
+                visto = pendentes[-1][0]
+            elif not await self._esperar(sinal):
+                # Comentário SSE: mantém proxies abertos e detecta cliente desconectado
+                await self._escrever(writer, b': keepalive\n\n')
+
+
+# Instância global configurada em create_app
+sse_fanout = SSEFanout(live_updates)
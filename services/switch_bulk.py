@@ -0,0 +1,171 @@
+# services/switch_bulk.py
+"""Alteração e exclusão em massa de switches, por filtro ou lista de ids
+
+Cada operação é um único UPDATE/DELETE com o WHERE montado a partir do
+vocabulário de filtros da lista (search, status, criticidade) e do
+assistente (localizacao, fabricante, garantia_proxima, valor_min,
+ports_livres), ou de `ids`. As agregações (switch_rollups) e o índice FTS
+acompanham pelos triggers e o contador de versão do inventário invalida os
+caches. O hash de conteúdo não é recalculado: o próprio UPDATE o anula
+(desatualizado), e a próxima importação trata a linha como alterada e grava
+o hash novo.
+"""
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from sqlalchemy import Boolean, Date, DateTime, Integer, Numeric, String, delete, func, update
+from app import db
+from models.switch import Switch, mark_inventory_changed
+from services.assistant_aggregation import build_conditions
+from services.switch_search import switch_search
+
+MAX_IDS = 10000
+SAMPLE_SIZE = 10
+
+# Chaves e metadados ficam fora da alteração em massa
+READONLY_FIELDS = ('id', 'id_ativo', 'criado_por', 'data_criacao', 'data_atualizacao', 'hash_conteudo')
+EDITABLE_FIELDS = tuple(coluna.key for coluna in Switch.__table__.columns if coluna.key not in READONLY_FIELDS)
+
+FILTER_KEYS = ('ids', 'search', 'status', 'criticidade', 'localizacao', 'fabricante',
+               'garantia_proxima', 'valor_min', 'ports_livres')
+# Filtros do assistente, montados por build_conditions (mesma semântica das perguntas)
+_FILTROS_ASSISTENTE = {
+    'status': [], 'localizacao': [], 'fabricante': [],
+    'garantia_proxima': False, 'valor_min': None, 'ports_livres': False,
+}
+
+def _lista(valor):
+    """'a' ou ['a', 'b'] -> ['a', 'b'] (sem vazios)"""
+    valores = valor if isinstance(valor, (list, tuple)) else [valor]
+    return [str(item) for item in valores if item not in (None, '')]
+
+
+def build_where(filtro):
+    """Condição SQL do filtro; ValueError se houver chave desconhecida ou o filtro estiver vazio"""
+    if not isinstance(filtro, dict):
+        raise ValueError('O filtro deve ser um objeto')
+    desconhecidas = [chave for chave in filtro if chave not in FILTER_KEYS]
+    if desconhecidas:
+        raise ValueError(f'Filtros desconhecidos: {", ".join(desconhecidas)}')
+
+    conditions = []
+    if filtro.get('ids'):
+        try:
+            ids = [int(switch_id) for switch_id in filtro['ids']]
+        except (TypeError, ValueError):
+            raise ValueError('ids deve ser uma lista de números')
+        if len(ids) > MAX_IDS:
+            raise ValueError(f'No máximo {MAX_IDS} ids por operação')
+        conditions.append(Switch.id.in_(ids))
+
+    if filtro.get('search'):
+        busca = switch_search.filter(db.session.query(Switch.id), str(filtro['search'])).order_by(None)
+        conditions.append(Switch.id.in_(busca.scalar_subquery()))
+
+    if filtro.get('criticidade'):
+        conditions.append(Switch.criticidade.in_(_lista(filtro['criticidade'])))
+
+    assistente = dict(_FILTROS_ASSISTENTE)
+    for chave in ('status', 'localizacao', 'fabricante'):
+        assistente[chave] = _lista(filtro.get(chave) or [])
+    assistente['garantia_proxima'] = bool(filtro.get('garantia_proxima'))
+    assistente['ports_livres'] = bool(filtro.get('ports_livres'))
+    if filtro.get('valor_min') not in (None, ''):
+        try:
+            assistente['valor_min'] = float(filtro['valor_min'])
+        except (TypeError, ValueError):
+            raise ValueError('valor_min deve ser numérico')
+    conditions.extend(build_conditions(assistente))
+
+    if not conditions:
+        # Nunca altera a tabela inteira por engano
+        raise ValueError('Informe ao menos um filtro ou uma lista de ids')
+    return db.and_(*conditions)
+
+
+def _converter(coluna, valor):
+    tipo = coluna.type
+    if isinstance(tipo, Boolean):
+        if not isinstance(valor, bool):
+            raise ValueError(f'{coluna.key} deve ser true ou false')
+        return valor
+    if isinstance(tipo, DateTime):
+        return datetime.fromisoformat(str(valor))
+    if isinstance(tipo, Date):
+        return date.fromisoformat(str(valor)[:10])
+    if isinstance(tipo, Integer):
+        return int(valor)
+    if isinstance(tipo, Numeric):
+        return Decimal(str(valor))
+    valor = str(valor).strip()
+    if isinstance(tipo, String) and tipo.length and len(valor) > tipo.length:
+        raise ValueError(f'{coluna.key} aceita no máximo {tipo.length} caracteres')
+    return valor
+
+
+def coerce_values(valores):
+    """Valores do SET validados e convertidos pelo tipo da coluna"""
+    if not isinstance(valores, dict) or not valores:
+        raise ValueError('Informe os campos a alterar')
+    convertidos = {}
+    for campo, valor in valores.items():
+        if campo not in EDITABLE_FIELDS:
+            raise ValueError(f'Campo não pode ser alterado em massa: {campo}')
+        coluna = Switch.__table__.c[campo]
+        if valor is None or valor == '':
+            if not coluna.nullable:
+                raise ValueError(f'{campo} é obrigatório')
+            convertidos[campo] = None
+            continue
+        try:
+            convertidos[campo] = _converter(coluna, valor)
+        except (TypeError, ValueError, InvalidOperation) as e:
+            raise ValueError(str(e) if str(e).startswith(campo) else f'Valor inválido para {campo}: {valor!r}')
+    return convertidos
+
+
+def preview(where):
+    """Quantidade afetada e uma amostra de id_ativo (dry run)"""
+    total = db.session.query(func.count(Switch.id)).filter(where).scalar()
+    amostra = [id_ativo for (id_ativo,) in db.session.query(Switch.id_ativo).filter(where)
+               .order_by(Switch.id_ativo).limit(SAMPLE_SIZE)]
+    return {'dry_run': True, 'affected': total, 'sample': amostra}
+
+
+def bulk_update(filtro, valores, dry_run=False):
+    """UPDATE único dos switches do filtro; o hash de conteúdo das linhas alteradas fica nulo"""
+    where = build_where(filtro)
+    valores = coerce_values(valores)
+    if dry_run:
+        return preview(where)
+
+    # Hash nulo no mesmo UPDATE: reimportar a planilha antiga não pode ser tomado como "inalterado"
+    statement = (
+        update(Switch).where(where).values(**valores, hash_conteudo=None)
+        .execution_options(synchronize_session=False)
+    )
+    try:
+        resultado = db.session.execute(statement)
+        if resultado.rowcount:
+            mark_inventory_changed(db.session)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return {'dry_run': False, 'affected': resultado.rowcount}
+
+
+def bulk_delete(filtro, dry_run=False):
+    """DELETE único dos switches do filtro"""
+    where = build_where(filtro)
+    if dry_run:
+        return preview(where)
+
+    try:
+        resultado = db.session.execute(delete(Switch).where(where).execution_options(synchronize_session=False))
+        if resultado.rowcount:
+            mark_inventory_changed(db.session)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return {'dry_run': False, 'affected': resultado.rowcount}
@@ -0,0 +1,110 @@
+# services/switch_export.py
+"""Exportação do inventário em streaming (CSV, NDJSON e XLSX em modo write-only)"""
+import csv
+import io
+import json
+import os
+import tempfile
+from datetime import date
+from decimal import Decimal
+import openpyxl
+from sqlalchemy import Boolean
+from models.switch import Switch
+from services.readers import COLUMNS, FIELD_ORDER
+
+BATCH_SIZE = 1000
+XLSX_READ_CHUNK = 64 * 1024
+
+FORMATS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx'),
+}
+
+_COLUNAS = [getattr(Switch, campo) for campo in FIELD_ORDER]
+_BOOLEANOS = {campo for campo in FIELD_ORDER if isinstance(Switch.__table__.c[campo].type, Boolean)}
+
+
+def _iter_rows(query, batch_size):
+    """Linhas como tuplas, buscadas do cursor do servidor em lotes de `batch_size`"""
+    return query.order_by(None).order_by(Switch.id_ativo).with_entities(*_COLUNAS).yield_per(batch_size)
+
+
+def _sheet_value(campo, valor):
+    # Mesma representação aceita pelo importador (Sim/Não, dd/mm/aaaa)
+    if valor is None:
+        return None
+    if campo in _BOOLEANOS:
+        return 'Sim' if valor else 'Não'
+    if isinstance(valor, date):
+        return valor.strftime('%d/%m/%Y')
+    if isinstance(valor, Decimal):
+        return float(valor)
+    return valor
+
+
+def _json_value(valor):
+    if isinstance(valor, date):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return float(valor)
+    return valor
+
+
+def stream_csv(query, batch_size=BATCH_SIZE):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([cabecalho for cabecalho, _ in COLUMNS])
+    # Cabeçalho sai antes da primeira linha do banco
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    for numero, row in enumerate(_iter_rows(query, batch_size), start=1):
+        writer.writerow([_sheet_value(campo, valor) for campo, valor in zip(FIELD_ORDER, row)])
+        if numero % batch_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def stream_ndjson(query, batch_size=BATCH_SIZE):
+    linhas = []
+    for row in _iter_rows(query, batch_size):
+        registro = {campo: _json_value(valor) for campo, valor in zip(FIELD_ORDER, row)}
+        linhas.append(json.dumps(registro, ensure_ascii=False))
+        if len(linhas) >= batch_size:
+            yield '\n'.join(linhas) + '\n'
+            linhas = []
+    if linhas:
+        yield '\n'.join(linhas) + '\n'
+
+
+def stream_xlsx(query, batch_size=BATCH_SIZE):
+    """Planilha no mesmo layout da importação, gerada em modo write-only
+
+    O arquivo XLSX é um ZIP que só fica completo no final; as linhas vão para
+    disco à medida que chegam do cursor e o resultado é enviado em blocos.
+    """
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet('Inventario Switches')
+    sheet.append(['Inventário de Switches'])
+    sheet.append([cabecalho for cabecalho, _ in COLUMNS])
+    for row in _iter_rows(query, batch_size):
+        sheet.append([_sheet_value(campo, valor) for campo, valor in zip(FIELD_ORDER, row)])
+
+    descritor, caminho = tempfile.mkstemp(suffix='.xlsx')
+    os.close(descritor)
+    try:
+        workbook.save(caminho)
+        with open(caminho, 'rb') as arquivo:
+            while True:
+                bloco = arquivo.read(XLSX_READ_CHUNK)
+                if not bloco:
+                    break
+                yield bloco
+    finally:
+        os.remove(caminho)
+
+
+STREAMERS = {'csv': stream_csv, 'ndjson': stream_ndjson, 'xlsx': stream_xlsx}
@@ -0,0 +1,314 @@
+# services/switch_import.py
+"""Motor de importação em streaming das planilhas de inventário de switches"""
+import itertools
+import time
+from datetime import date, datetime
+from sqlalchemy import bindparam
+from sqlalchemy.exc import SQLAlchemyError
+from app import db
+from models.switch import Switch, compute_content_hash, mark_inventory_changed
+from services.readers import iter_rows
+
+CHUNK_SIZE = 1000
+MAX_ERROR_MESSAGES = 50
+
+# Modos de importação
+MODO_INSERIR = 'inserir'      # rejeita id_ativo já cadastrado
+MODO_ATUALIZAR = 'atualizar'  # upsert: insere novos e atualiza apenas os alterados
+
+
+def _sim(valor):
+    if isinstance(valor, bool):
+        return valor
+    return valor == 'Sim' if valor else False
+
+
+def _data(valor):
+    if isinstance(valor, (datetime, date)):
+        return valor
+    if isinstance(valor, str):
+        # Datas como texto (CSV/NDJSON ou células não formatadas)
+        for formato in ('%d/%m/%Y', '%Y-%m-%d'):
+            try:
+                return datetime.strptime(valor.strip()[:10], formato).date()
+            except ValueError:
+                continue
+    return None
+
+
+def _inteiro(valor):
+    if valor is None or valor == '':
+        return None
+    if isinstance(valor, str):
+        return int(float(valor.replace(',', '.')))
+    return int(valor)
+
+
+def _decimal(valor):
+    if not valor:
+        return None
+    if isinstance(valor, str) and ',' in valor:
+        # Formato brasileiro: 18.500,00
+        valor = valor.replace('.', '').replace(',', '.')
+    return float(valor)
+
+
+def row_to_mapping(row, criado_por, id_ativo):
+    """Converte uma linha da planilha no dicionário de colunas de `Switch`"""
+    return {
+        # Identificação e Status
+        'id_ativo': id_ativo,
+        'nome_switch': row[1] or 'Switch Sem Nome',
+        'status_funcionamento': row[2] or 'Em produção',
+        'criticidade': row[3] or 'Média',
+        'ambiente': row[4] or 'Produção',
+
+        # Localização Física
+        'unidade': row[5] or 'Sede',
+        'local_detalhado': row[6],
+        'rack': row[7],
+        'posicao_u': row[8],
+        'ponto_referencia': row[9],
+
+        # Dados Técnicos
+        'fabricante': row[10] or 'Desconhecido',
+        'modelo': row[11] or 'Desconhecido',
+        'numero_serie': row[12],
+        'tipo_switch': row[13],
+        'stack_id': row[14],
+        'qtd_ports_utp': _inteiro(row[15]),
+        'ports_utp_usadas': _inteiro(row[16]),
+        'qtd_ports_fibra': _inteiro(row[17]),
+        'ports_fibra_usadas': _inteiro(row[18]),
+        'suporta_poe': _sim(row[19]),
+        'qtd_ports_poe': _inteiro(row[20]),
+        'capacidade_backplane': row[21],
+
+        # Endereçamento e Rede
+        'ip_gestao': row[22],
+        'mascara_gestao': row[23],
+        'gateway_gestao': row[24],
+        'vlan_gestao': _inteiro(row[25]),
+        'vlans_configuradas': row[26],
+        'uplink_principal': row[27],
+        'velocidade_uplink': row[28],
+
+        # Software e Configuração
+        'versao_so_firmware': row[29],
+        'data_ultimo_upgrade': _data(row[30]),
+        'backup_config': _sim(row[31]),
+        'data_ultimo_backup': _data(row[32]),
+        'metodo_gestao': row[33],
+        'telnet_habilitado': _sim(row[34]),
+        'dot1x_habilitado': _sim(row[35]),
+        'stp_habilitado': _sim(row[36]),
+        'port_security': _sim(row[37]),
+        'acl_gestao_resumo': row[38],
+        'ultima_revisao_seg': _data(row[39]),
+
+        # Dados Administrativos
+        'fornecedor': row[40],
+        'numero_nota_fiscal': row[41],
+        'data_aquisicao': _data(row[42]),
+        'valor_aquisicao': _decimal(row[43]),
+        'centro_custo': row[44],
+        'numero_tombamento': row[45],
+        'projeto_origem': row[46],
+        'inicio_garantia': _data(row[47]),
+        'fim_garantia': _data(row[48]),
+        'contrato_suporte': row[49],
+        'sla_fornecedor': row[50],
+        'responsavel_tecnico': row[51],
+        'idade_meses': _inteiro(row[52]),
+        'proximo_upgrade_sugerido': _data(row[53]),
+        'proximo_refresh_tecnico': _data(row[54]),
+        'observacoes': row[55],
+
+        'criado_por': criado_por,
+    }
+
+
+class ImportResult:
+    """Contadores, erros e tempos por fase de uma importação"""
+
+    def __init__(self):
+        self.imported = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.rejected = 0
+        self.rows = 0
+        self.errors = []
+        self.timings = {'ids_existentes': 0.0, 'leitura': 0.0, 'mapeamento': 0.0, 'gravacao': 0.0}
+
+    def add_error(self, message):
+        self.rejected += 1
+        if len(self.errors) < MAX_ERROR_MESSAGES:
+            self.errors.append(message)
+
+    @property
+    def total_time(self):
+        return sum(self.timings.values())
+
+    def timing_summary(self):
+        fases = ' | '.join(f"{fase}: {segundos:.2f}s" for fase, segundos in self.timings.items())
+        return f"⏱️ {self.rows} linhas em {self.total_time:.2f}s ({fases})"
+
+
+_INSERT = Switch.__table__.insert()
+_UPDATE = Switch.__table__.update().where(Switch.__table__.c.id == bindparam('_id'))
+
+
+class SwitchImporter:
+    """Importa linhas em lotes: um SELECT inicial de IDs e um executemany por lote
+
+    No modo `atualizar` (upsert), linhas de switches existentes só geram UPDATE
+    quando o hash de conteúdo difere do armazenado.
+    """
+
+    def __init__(self, criado_por, chunk_size=CHUNK_SIZE, result=None, on_chunk=None, modo=MODO_INSERIR):
+        self.criado_por = criado_por
+        self.chunk_size = chunk_size
+        self.modo = modo
+        self.result = result or ImportResult()
+        # Chamado dentro da transação de cada lote, antes do commit (checkpoint)
+        self.on_chunk = on_chunk
+        self.existentes = {}  # id_ativo -> (id, hash_conteudo)
+        self._inserts = []
+        self._updates = []
+        self._proximo_numero = 1
+
+    def load_existing_ids(self):
+        inicio = time.perf_counter()
+        if self.modo == MODO_ATUALIZAR:
+            query = db.session.query(Switch.id_ativo, Switch.id, Switch.hash_conteudo)
+            self.existentes = {id_ativo: (id, hash_conteudo) for id_ativo, id, hash_conteudo in query}
+        else:
+            self.existentes = dict.fromkeys(id_ativo for (id_ativo,) in db.session.query(Switch.id_ativo))
+        self._proximo_numero = len(self.existentes) + 1
+        self.result.timings['ids_existentes'] += time.perf_counter() - inicio
+
+    def _generate_id(self):
+        while True:
+            id_ativo = f"SW-{self._proximo_numero:04d}"
+            self._proximo_numero += 1
+            if id_ativo not in self.existentes:
+                return id_ativo
+
+    def map_row(self, row):
+        """Valida, mapeia e enfileira uma linha para INSERT ou UPDATE"""
+        existente = self.existentes.get(row[0]) if row[0] else None
+        if row[0] in self.existentes and self.modo != MODO_ATUALIZAR:
+            self.result.add_error(f"Switch {row[0]} já existe")
+            return
+        try:
+            mapping = row_to_mapping(row, self.criado_por, row[0] or self._generate_id())
+            mapping['hash_conteudo'] = compute_content_hash(mapping)
+        except Exception as e:
+            self.result.add_error(f"Erro na linha {row[0]}: {str(e)}")
+            return
+
+        if existente is None:
+            self._inserts.append(mapping)
+            self.existentes[mapping['id_ativo']] = (None, mapping['hash_conteudo'])
+            return
+
+        switch_id, hash_atual = existente
+        # Hash nulo (alteração em massa) nunca casa: a linha é regravada com o hash novo
+        if hash_atual == mapping['hash_conteudo']:
+            self.result.unchanged += 1
+            return
+        if switch_id is None:
+            # Inserido nesta mesma importação
+            self.result.add_error(f"Switch {row[0]} repetido na planilha")
+            return
+
+        del mapping['criado_por']  # manter o autor original
+        mapping['_id'] = switch_id
+        mapping['data_atualizacao'] = datetime.utcnow()
+        self._updates.append(mapping)
+        self.existentes[mapping['id_ativo']] = (switch_id, mapping['hash_conteudo'])
+
+    def _checkpoint(self):
+        if self.on_chunk:
+            self.on_chunk(self.result)
+
+    def _write_rows_one_by_one(self, statement, mappings, contador):
+        """Grava linha a linha na transação corrente, descartando só as linhas com erro
+
+        Sem commit aqui: as linhas gravadas e o checkpoint persistem juntos,
+        então uma retomada após queda não repete linhas já gravadas. No SQLite
+        um comando que falha desfaz só a si mesmo; nos demais bancos cada linha
+        vai num SAVEPOINT.
+        """
+        savepoint = db.engine.dialect.name != 'sqlite'
+        for mapping in mappings:
+            try:
+                if savepoint:
+                    with db.session.begin_nested():
+                        db.session.execute(statement, [mapping])
+                else:
+                    db.session.execute(statement, [mapping])
+                setattr(self.result, contador, getattr(self.result, contador) + 1)
+            except SQLAlchemyError as e:
+                self.result.add_error(f"Erro na linha {mapping['id_ativo']}: {str(getattr(e, 'orig', None) or e)}")
+
+    def flush_chunk(self):
+        """Grava o lote com um executemany por operação e faz commit junto com o checkpoint"""
+        inicio = time.perf_counter()
+        inserts, updates = self._inserts, self._updates
+        self._inserts, self._updates = [], []
+        importados, atualizados = self.result.imported, self.result.updated
+        try:
+            if inserts:
+                db.session.execute(_INSERT, inserts)
+            if updates:
+                db.session.execute(_UPDATE, updates)
+            self.result.imported += len(inserts)
+            self.result.updated += len(updates)
+            self._checkpoint()
+            mark_inventory_changed(db.session)
+            db.session.commit()
+        except SQLAlchemyError:
+            db.session.rollback()
+            # A falha pode vir antes ou depois dos contadores avançarem
+            self.result.imported, self.result.updated = importados, atualizados
+            # Isolar as linhas problemáticas do lote, ainda numa única transação com o checkpoint
+            self._write_rows_one_by_one(_INSERT, inserts, 'imported')
+            self._write_rows_one_by_one(_UPDATE, updates, 'updated')
+            self._checkpoint()
+            mark_inventory_changed(db.session)
+            db.session.commit()
+        self.result.timings['gravacao'] += time.perf_counter() - inicio
+
+    def run(self, rows, skip=0):
+        """Consome um iterável de linhas e grava em lotes de `chunk_size`
+
+        `skip` descarta as linhas já gravadas por uma execução anterior.
+        """
+        self.load_existing_ids()
+        consumidas = 0
+        rows = itertools.islice(rows, skip, None)
+        while True:
+            inicio = time.perf_counter()
+            row = next(rows, None)
+            self.result.timings['leitura'] += time.perf_counter() - inicio
+            if row is None:
+                break
+
+            self.result.rows += 1
+            consumidas += 1
+            inicio = time.perf_counter()
+            self.map_row(row)
+            self.result.timings['mapeamento'] += time.perf_counter() - inicio
+
+            # Um lote a cada `chunk_size` linhas lidas, mesmo que rejeitadas ou inalteradas
+            if consumidas % self.chunk_size == 0:
+                self.flush_chunk()
+
+        self.flush_chunk()
+        return self.result
+
+
+def import_file(filepath, criado_por, chunk_size=CHUNK_SIZE, modo=MODO_INSERIR):
+    """Importa um arquivo de inventário (qualquer formato de `services.readers`) em streaming"""
+    return SwitchImporter(criado_por, chunk_size, modo=modo).run(iter_rows(filepath))
@@ -0,0 +1,132 @@
+# services/switch_pagination.py
+"""Paginação por keyset (id_ativo, id) da lista de switches
+
+Cada página busca `per_page + 1` linhas a partir da chave da borda da
+página anterior, então a página N custa o mesmo que a primeira. O total é
+opcional e fica em cache por filtro enquanto o inventário não muda.
+
+Com busca textual a ordem é a de relevância (bm25) de `switch_search.filter`,
+que não é uma chave estável para o keyset: essas páginas avançam por
+deslocamento, com o mesmo formato de cursor opaco.
+"""
+import base64
+import json
+from sqlalchemy import tuple_
+from models.switch import Switch
+from services.inventory_state import current_version
+from services.result_cache import MISS, ResultCache
+
+PER_PAGE = 20
+COUNT_CACHE_SIZE = 128
+
+_totais = ResultCache(COUNT_CACHE_SIZE)
+
+
+class KeysetPage:
+    """Página da lista: itens, cursores opacos de próxima/anterior e total (ou None)"""
+    keyset = True
+
+    def __init__(self, items, next_cursor, prev_cursor, total=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.total = total
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+
+def _encode(conteudo):
+    return base64.urlsafe_b64encode(json.dumps(conteudo, ensure_ascii=False).encode('utf-8')).decode('ascii')
+
+
+def encode_cursor(direcao, switch):
+    """Cursor opaco: direção ('>' próxima, '<' anterior) e chave (id_ativo, id) da borda"""
+    return _encode([direcao, switch.id_ativo, switch.id])
+
+
+def encode_offset_cursor(offset):
+    """Cursor opaco de uma página por relevância: '#' e o deslocamento"""
+    return _encode(['#', offset])
+
+
+def decode_cursor(cursor):
+    """(direção, (id_ativo, id)) ou ('#', deslocamento); ValueError se o cursor não for válido"""
+    try:
+        conteudo = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        if conteudo[0] == '#':
+            _, offset = conteudo
+            if int(offset) < 0:
+                raise ValueError(offset)
+            return '#', int(offset)
+        direcao, id_ativo, switch_id = conteudo
+        if direcao not in ('>', '<'):
+            raise ValueError(direcao)
+        return direcao, (str(id_ativo), int(switch_id))
+    except (ValueError, TypeError, LookupError):
+        raise ValueError('Cursor inválido')
+
+
+def keyset_page(query, cursor=None, per_page=PER_PAGE):
+    """Página de `query` (sobre Switch, com os filtros já aplicados) na ordem (id_ativo, id)"""
+    chave = tuple_(Switch.id_ativo, Switch.id)
+    query = query.order_by(None)
+    direcao, posicao = decode_cursor(cursor) if cursor else ('>', None)
+    if direcao == '#':
+        raise ValueError('Cursor inválido')
+
+    if direcao == '>':
+        if posicao is not None:
+            query = query.filter(chave > tuple_(*posicao))
+        linhas = query.order_by(Switch.id_ativo, Switch.id).limit(per_page + 1).all()
+        items = linhas[:per_page]
+        tem_proxima, tem_anterior = len(linhas) > per_page, posicao is not None
+    else:
+        linhas = query.filter(chave < tuple_(*posicao)).order_by(
+            Switch.id_ativo.desc(), Switch.id.desc()
+        ).limit(per_page + 1).all()
+        items = linhas[:per_page][::-1]
+        tem_proxima, tem_anterior = True, len(linhas) > per_page
+
+    return KeysetPage(
+        items,
+        encode_cursor('>', items[-1]) if items and tem_proxima else None,
+        encode_cursor('<', items[0]) if items and tem_anterior else None,
+    )
+
+
+def ranked_page(query, cursor=None, per_page=PER_PAGE):
+    """Página de `query` na ordem que ela já tem (relevância da busca), desempatada por id"""
+    direcao, offset = decode_cursor(cursor) if cursor else ('#', 0)
+    if direcao != '#':
+        raise ValueError('Cursor inválido')
+    linhas = query.order_by(Switch.id).offset(offset).limit(per_page + 1).all()
+    items = linhas[:per_page]
+    return KeysetPage(
+        items,
+        encode_offset_cursor(offset + per_page) if len(linhas) > per_page else None,
+        encode_offset_cursor(max(offset - per_page, 0)) if offset else None,
+    )
+
+
+def switch_page(query, cursor=None, per_page=PER_PAGE, search=False):
+    """Keyset na lista sem busca; com busca, a ordem de relevância por deslocamento"""
+    if search:
+        return ranked_page(query, cursor, per_page)
+    return keyset_page(query, cursor, per_page)
+
+
+def cached_total(query, filtros):
+    """COUNT(*) de `query`, em cache por `filtros` até a próxima alteração do inventário (de qualquer processo)"""
+    key = tuple(sorted(filtros.items()))
+    version = current_version()
+    total = _totais.get(key, version)
+    if total is MISS:
+        total = query.order_by(None).count()
+        _totais.put(key, version, total)
+    return total
@@ -0,0 +1,137 @@
+# services/switch_search.py
+"""Busca textual de switches com FTS5 (SQLite): prefixo e ranking bm25
+
+A tabela virtual `switches_fts` espelha as colunas pesquisáveis de
+`switches` (conteúdo externo, sem duplicar o texto) e é mantida por
+triggers. Índice e triggers são criados pela migração e9b4c2d7a1f3 (ou por
+`install` em bancos temporários), não a cada inicialização. Sem eles, em
+outros bancos ou num SQLite sem FTS5, a busca volta ao `ilike('%termo%')`
+de sempre.
+"""
+import re
+from sqlalchemy import column, table, text
+from sqlalchemy.exc import OperationalError
+from app import db
+from models.switch import Switch
+from services.intent_parser import normalize
+
+SEARCH_LIMIT = 20
+
+# Colunas espelhadas no índice
+FTS_FIELDS = ('id_ativo', 'nome_switch', 'local_detalhado', 'modelo', 'numero_serie', 'ip_gestao', 'observacoes')
+# Colunas da busca antiga (fallback sem FTS5)
+LIKE_FIELDS = ('id_ativo', 'nome_switch', 'local_detalhado')
+
+_COLUNAS = ', '.join(FTS_FIELDS)
+_NOVOS = ', '.join(f'NEW.{campo}' for campo in FTS_FIELDS)
+_ANTIGOS = ', '.join(f'OLD.{campo}' for campo in FTS_FIELDS)
+
+FTS_TABLE = f"""
+    CREATE VIRTUAL TABLE switches_fts USING fts5(
+        {_COLUNAS},
+        content='switches', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )"""
+
+TRIGGERS = {
+    'trg_switches_fts_insert': f"""
+    CREATE TRIGGER trg_switches_fts_insert AFTER INSERT ON switches BEGIN
+        INSERT INTO switches_fts (rowid, {_COLUNAS}) VALUES (NEW.id, {_NOVOS});
+    END""",
+    'trg_switches_fts_delete': f"""
+    CREATE TRIGGER trg_switches_fts_delete AFTER DELETE ON switches BEGIN
+        INSERT INTO switches_fts (switches_fts, rowid, {_COLUNAS}) VALUES ('delete', OLD.id, {_ANTIGOS});
+    END""",
+    'trg_switches_fts_update': f"""
+    CREATE TRIGGER trg_switches_fts_update AFTER UPDATE OF {_COLUNAS} ON switches BEGIN
+        INSERT INTO switches_fts (switches_fts, rowid, {_COLUNAS}) VALUES ('delete', OLD.id, {_ANTIGOS});
+        INSERT INTO switches_fts (rowid, {_COLUNAS}) VALUES (NEW.id, {_NOVOS});
+    END""",
+}
+
+_fts = table('switches_fts', column('rowid'), column('rank'))
+_TERMO_RE = re.compile(r'[a-z0-9]+')
+
+
+def match_query(texto, operador='AND'):
+    """Expressão MATCH: cada palavra vira uma frase com prefixo ("10 0 1"* casa com 10.0.1.x)"""
+    frases = []
+    for palavra in texto.split():
+        tokens = _TERMO_RE.findall(normalize(palavra))
+        if tokens:
+            frases.append('"' + ' '.join(tokens) + '"*')
+    return f' {operador} '.join(frases) or None
+
+
+def installed(conn):
+    """True se o índice e os três triggers existem (só no SQLite)"""
+    if conn.dialect.name != 'sqlite':
+        return False
+    existentes = {
+        nome for (nome,) in conn.execute(text(
+            "SELECT name FROM sqlite_master WHERE name = 'switches_fts' OR name LIKE 'trg_switches_fts_%'"
+        ))
+    }
+    return existentes >= TRIGGERS.keys() | {'switches_fts'}
+
+
+def create_index(conn):
+    """Cria o índice se faltar, (re)cria os triggers e reconstrói o índice na transação de `conn`"""
+    if not conn.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'switches_fts'")).first():
+        conn.execute(text(FTS_TABLE))
+    for nome, ddl in TRIGGERS.items():
+        conn.execute(text(f'DROP TRIGGER IF EXISTS {nome}'))
+        conn.execute(text(ddl))
+    conn.execute(text("INSERT INTO switches_fts (switches_fts) VALUES ('rebuild')"))
+
+
+class SwitchSearch:
+    def __init__(self):
+        self.enabled = False
+
+    def init_app(self, app):
+        """Usa a FTS só se a migração já criou índice e triggers; nada é criado aqui"""
+        with app.app_context():
+            with db.engine.connect() as conn:
+                self.enabled = installed(conn)
+
+    def install(self):
+        """Cria índice e triggers que faltarem (só no SQLite; bancos temporários); True se os criou"""
+        if db.engine.dialect.name != 'sqlite':
+            return False
+        try:
+            with db.engine.begin() as conn:
+                if installed(conn):
+                    self.enabled = True
+                    return False
+                create_index(conn)
+        except OperationalError as e:
+            # SQLite compilado sem FTS5
+            print(f"⚠️ Busca FTS5 indisponível, usando busca simples: {e}")
+            return False
+        self.enabled = True
+        return True
+
+    def filter(self, query, termo):
+        """Restringe `query` (sobre Switch) ao `termo`, ordenando por relevância quando há FTS"""
+        match = match_query(termo) if self.enabled else None
+        if match is None:
+            return query.filter(db.or_(*(getattr(Switch, campo).ilike(f'%{termo}%') for campo in LIKE_FIELDS)))
+        return query.join(_fts, _fts.c.rowid == Switch.id).filter(
+            text('switches_fts MATCH :match').bindparams(match=match)
+        ).order_by(_fts.c.rank)
+
+    def rank_ids(self, texto, limit=SEARCH_LIMIT, operador='AND'):
+        """Ids dos switches mais relevantes para `texto` (vazio sem FTS)"""
+        match = match_query(texto, operador) if self.enabled else None
+        if match is None:
+            return []
+        rows = db.session.execute(
+            text('SELECT rowid FROM switches_fts WHERE switches_fts MATCH :match ORDER BY rank LIMIT :limit'),
+            {'match': match, 'limit': limit}
+        )
+        return [switch_id for (switch_id,) in rows]
+
+
+# Instância global configurada em create_app
+switch_search = SwitchSearch()
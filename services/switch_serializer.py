@@ -0,0 +1,75 @@
+# services/switch_serializer.py
+"""Serialização enxuta de switches para a API v1
+
+`fields=` vira a lista de colunas do SELECT (sem carregar objetos do ORM) e,
+para cada combinação de campos, é gerada uma vez uma função que monta os
+dicts direto das tuplas do banco numa list comprehension, convertendo só o
+que o codificador JSON não aceita. Com o orjson (dependência opcional)
+instalado, datas saem direto do codificador.
+"""
+import json
+from functools import lru_cache
+from sqlalchemy import Date, DateTime, Numeric
+from models.switch import Switch
+
+SERIALIZER_CACHE = 64
+
+# Campos expostos pela API; sem `fields=` saem os mesmos de Switch.to_dict()
+FIELDS = tuple(coluna.key for coluna in Switch.__table__.columns if coluna.key not in ('criado_por', 'hash_conteudo'))
+DEFAULT_FIELDS = tuple(campo for campo in FIELDS if campo not in ('data_criacao', 'data_atualizacao'))
+
+_DATAS = {coluna.key for coluna in Switch.__table__.columns if isinstance(coluna.type, (Date, DateTime))}
+_DECIMAIS = {coluna.key for coluna in Switch.__table__.columns if isinstance(coluna.type, Numeric)}
+
+
+def _carregar_orjson():
+    """Módulo orjson, ou None se não estiver instalado"""
+    try:
+        import orjson
+    except ImportError:
+        return None
+    return orjson
+
+
+_orjson = _carregar_orjson()
+ORJSON = _orjson is not None
+
+
+def parse_fields(texto):
+    """Tupla de campos de `fields=a,b,c` (None/vazio = DEFAULT_FIELDS); ValueError se algum não existir"""
+    if not texto:
+        return DEFAULT_FIELDS
+    campos = tuple(dict.fromkeys(campo.strip() for campo in texto.split(',') if campo.strip()))
+    desconhecidos = [campo for campo in campos if campo not in FIELDS]
+    if desconhecidos:
+        raise ValueError(f'Campos desconhecidos: {", ".join(desconhecidos)}')
+    return campos or DEFAULT_FIELDS
+
+
+def columns(campos):
+    """Colunas do SELECT para `campos`"""
+    return [getattr(Switch, campo) for campo in campos]
+
+
+@lru_cache(maxsize=SERIALIZER_CACHE)
+def serializer(campos, datas_nativas=ORJSON):
+    """Função gerada `f(rows) -> [dict]` para tuplas cujas primeiras colunas são `campos`"""
+    itens = []
+    for posicao, campo in enumerate(campos):
+        valor = f'row[{posicao}]'
+        if campo in _DECIMAIS:
+            valor = f'(None if {valor} is None else float({valor}))'
+        elif campo in _DATAS and not datas_nativas:
+            valor = f'(None if {valor} is None else {valor}.isoformat())'
+        itens.append(f'{campo!r}: {valor}')
+    codigo = f"def serializar(rows):\n    return [{{{', '.join(itens)}}} for row in rows]\n"
+    namespace = {}
+    exec(compile(codigo, f'<serializer {",".join(campos)}>', 'exec'), namespace)
+    return namespace['serializar']
+
+
+def dumps(payload, usar_orjson=ORJSON):
+    """JSON em bytes (orjson quando disponível, senão o json da biblioteca padrão)"""
+    if usar_orjson:
+        return _orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
@@ -0,0 +1,216 @@
+# services/vector_index.py
+"""Índice de recuperação local (TF-IDF com hashing, NumPy) sobre os campos de texto dos switches
+
+Sem rede e sem serviço de modelo: os termos da pergunta viram buckets de
+hash e a busca é um top-k por similaridade de cosseno sobre listas invertidas.
+"""
+import math
+import re
+import threading
+import zlib
+from app import db
+from models.switch import Switch
+from services.fleet_snapshot import diff_signatures
+from services.intent_parser import normalize
+from services.inventory_state import current_version
+
+TOP_K = 20
+N_BUCKETS = 1 << 20
+# Constante da fusão por posição (RRF): amortece a diferença entre 1º e 2º lugar
+RRF_K = 60
+
+# Campos de texto indexados
+TEXT_FIELDS = (
+    'id_ativo', 'nome_switch', 'fabricante', 'modelo', 'tipo_switch', 'unidade', 'local_detalhado',
+    'rack', 'ponto_referencia', 'ip_gestao', 'versao_so_firmware', 'uplink_principal',
+    'observacoes', 'acl_gestao_resumo', 'responsavel_tecnico', 'fornecedor', 'centro_custo',
+    'projeto_origem', 'contrato_suporte',
+)
+_COLUNAS = [Switch.id] + [getattr(Switch, campo) for campo in TEXT_FIELDS]
+
+# Palavras que não distinguem um switch de outro
+STOPWORDS = frozenset('''
+    a o as os um uma uns umas de da do das dos em na no nas nos com sem por para pra que qual quais
+    quem onde como e ou ao aos se sao esta estao estes essas esse essa isso temos tem ha me mim
+    meu minha seu sua todos todas todo toda switch switches equipamento equipamentos ativo ativos
+    mostre mostrar liste listar exiba exibir busque buscar encontre procure sobre
+'''.split())
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+def tokenize(text):
+    return [token for token in _TOKEN_RE.findall(normalize(text)) if token not in STOPWORDS]
+
+
+def _bucket(token):
+    return zlib.crc32(token.encode('utf-8')) % N_BUCKETS
+
+
+class VectorIndex:
+    """Listas invertidas por bucket, com pesos já normalizados por documento
+
+    O documento guarda (1 + log tf) / ||d|| por termo; o IDF entra na hora da
+    consulta, então inserir documentos não exige repesar o índice. Switches
+    editados ganham uma nova linha e a antiga é marcada como morta; o índice
+    é compactado quando as linhas mortas passam de 30%.
+    """
+
+    def __init__(self, np):
+        self.np = np
+        self.version = None
+        self.lock = threading.RLock()
+        self._assinaturas = {}
+        self._linha_do_switch = {}
+        self._switch_ids = []
+        self._vivas = []
+        self._termos = []           # por linha: {bucket: peso}
+        self._postings = {}         # bucket -> ([linhas], [pesos])
+        self._arrays = {}           # bucket -> (np linhas, np pesos), cache das listas
+        self._df = {}               # bucket -> nº de linhas vivas com o termo
+        self._mortas = 0
+        self._vivas_np = None
+
+    def __len__(self):
+        return len(self._linha_do_switch)
+
+    # ------------------------------------------------------------------ carga
+
+    def refresh(self, force=False):
+        """Indexa só os switches novos/alterados desde a última versão do inventário (`force`: confere mesmo assim)"""
+        version = current_version()
+        if not force and version == self.version:
+            return
+        with self.lock:
+            if not force and version == self.version:
+                return
+            assinaturas, removidos, alterados = diff_signatures(self._assinaturas)
+            for switch_id in removidos:
+                self._remove(switch_id)
+            for inicio in range(0, len(alterados), 500):
+                lote = alterados[inicio:inicio + 500]
+                for row in db.session.query(*_COLUNAS).filter(Switch.id.in_(lote)):
+                    self._remove(row.id)
+                    self._add(row.id, ' '.join(str(valor) for valor in row[1:] if valor))
+            if self._mortas > 0.3 * len(self._switch_ids):
+                self._compact()
+            self._assinaturas = assinaturas
+            self.version = version
+
+    def _add(self, switch_id, texto):
+        contagem = {}
+        for token in tokenize(texto):
+            bucket = _bucket(token)
+            contagem[bucket] = contagem.get(bucket, 0) + 1
+        pesos = {bucket: 1 + math.log(tf) for bucket, tf in contagem.items()}
+        norma = math.sqrt(sum(peso * peso for peso in pesos.values())) or 1.0
+        pesos = {bucket: peso / norma for bucket, peso in pesos.items()}
+
+        linha = len(self._switch_ids)
+        self._switch_ids.append(switch_id)
+        self._vivas.append(True)
+        self._vivas_np = None
+        self._termos.append(pesos)
+        self._linha_do_switch[switch_id] = linha
+        for bucket, peso in pesos.items():
+            linhas, valores = self._postings.setdefault(bucket, ([], []))
+            linhas.append(linha)
+            valores.append(peso)
+            self._arrays.pop(bucket, None)
+            self._df[bucket] = self._df.get(bucket, 0) + 1
+
+    def _remove(self, switch_id):
+        linha = self._linha_do_switch.pop(switch_id, None)
+        if linha is None:
+            return
+        self._vivas[linha] = False
+        self._vivas_np = None
+        self._mortas += 1
+        for bucket in self._termos[linha]:
+            self._df[bucket] -= 1
+        self._termos[linha] = {}
+
+    def _compact(self):
+        vivos = [(self._switch_ids[linha], self._termos[linha])
+                 for linha in range(len(self._switch_ids)) if self._vivas[linha]]
+        self._linha_do_switch, self._switch_ids, self._vivas, self._termos = {}, [], [], []
+        self._postings, self._arrays = {}, {}
+        self._mortas = 0
+        self._vivas_np = None
+        for linha, (switch_id, pesos) in enumerate(vivos):
+            self._switch_ids.append(switch_id)
+            self._vivas.append(True)
+            self._termos.append(pesos)
+            self._linha_do_switch[switch_id] = linha
+            for bucket, peso in pesos.items():
+                linhas, valores = self._postings.setdefault(bucket, ([], []))
+                linhas.append(linha)
+                valores.append(peso)
+
+    # -------------------------------------------------------------- consultas
+
+    def _posting(self, bucket):
+        arrays = self._arrays.get(bucket)
+        if arrays is None:
+            linhas, valores = self._postings[bucket]
+            arrays = self._arrays[bucket] = (
+                self.np.array(linhas, dtype=self.np.int32),
+                self.np.array(valores, dtype=self.np.float32),
+            )
+        return arrays
+
+    def search(self, question, k=TOP_K):
+        """[(switch_id, score)] dos k switches mais parecidos com a pergunta, maior score primeiro"""
+        np = self.np
+        with self.lock:
+            self.refresh()
+            contagem = {}
+            for token in tokenize(question):
+                bucket = _bucket(token)
+                if self._df.get(bucket):
+                    contagem[bucket] = contagem.get(bucket, 0) + 1
+            if not contagem:
+                return []
+
+            n_docs = len(self._linha_do_switch)
+            consulta = {
+                bucket: (1 + math.log(tf)) * (1 + math.log(n_docs / self._df[bucket]))
+                for bucket, tf in contagem.items()
+            }
+            norma = math.sqrt(sum(peso * peso for peso in consulta.values()))
+
+            scores = np.zeros(len(self._switch_ids), dtype=np.float32)
+            for bucket, peso in consulta.items():
+                linhas, valores = self._posting(bucket)
+                # Cada linha aparece uma vez por lista: soma vetorizada sem np.add.at
+                scores[linhas] += valores * np.float32(peso / norma)
+
+            if self._vivas_np is None:
+                self._vivas_np = np.array(self._vivas, dtype=bool)
+            candidatos = np.flatnonzero((scores > 0) & self._vivas_np)
+            if len(candidatos) > k:
+                candidatos = candidatos[np.argpartition(-scores[candidatos], k - 1)[:k]]
+            ordem = candidatos[np.argsort(-scores[candidatos], kind='stable')]
+            return [(self._switch_ids[linha], float(scores[linha])) for linha in ordem]
+
+
+def fuse_rankings(*rankings, limit=TOP_K):
+    """Ids de várias listas ordenadas combinados por Reciprocal Rank Fusion
+
+    Cada lista soma 1 / (RRF_K + posição) ao id; quem aparece bem colocado em
+    mais de uma lista (ex.: FTS e TF-IDF) sobe. Empates mantêm a ordem de chegada.
+    """
+    scores = {}
+    for ranking in rankings:
+        for posicao, switch_id in enumerate(ranking, start=1):
+            scores[switch_id] = scores.get(switch_id, 0.0) + 1.0 / (RRF_K + posicao)
+    return sorted(scores, key=scores.get, reverse=True)[:limit]
+
+
+def create_index():
+    """Índice vazio, ou None se o NumPy não estiver disponível"""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return VectorIndex(numpy)
@@ -0,0 +1,76 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.readers import COLUMNS
+
+# Posições em services.readers.COLUMNS (a ordem da planilha)
+POSICOES = {campo: posicao for posicao, (_, campo) in enumerate(COLUMNS)}
+
+
+def linha(id_ativo, **campos):
+    """Linha de planilha com os obrigatórios preenchidos; `campos` sobrescreve por nome de coluna"""
+    valores = {
+        'id_ativo': id_ativo,
+        'nome_switch': f'SW-{id_ativo}',
+        'status_funcionamento': 'Em produção',
+        'criticidade': 'Média',
+        'unidade': 'Sede',
+        'fabricante': 'Cisco',
+        'modelo': 'C9300',
+        'tipo_switch': 'Acesso',
+        'valor_aquisicao': 1000,
+        **campos,
+    }
+    row = [None] * len(COLUMNS)
+    for campo, valor in valores.items():
+        row[POSICOES[campo]] = valor
+    return row
+
+
+def escrever_csv(caminho, rows):
+    import csv
+    with open(caminho, 'w', newline='', encoding='utf-8') as arquivo:
+        escritor = csv.writer(arquivo)
+        escritor.writerow([cabecalho for cabecalho, _ in COLUMNS])
+        escritor.writerows(['' if valor is None else valor for valor in row] for row in rows)
+
+
+def usuario(username, admin=False):
+    from app import db
+    from models.user import User
+    user = User(username=username, email=f'{username}@empresa.com', name=username, is_admin=admin)
+    db.session.add(user)
+    db.session.commit()
+    return user.id
+
+
+def entrar(client, user_id):
+    """Sessão do Flask-Login para `user_id` no cliente de teste"""
+    from flask import g, has_app_context
+    # As requisições reaproveitam o app context da fixture, onde o Flask-Login guarda o usuário
+    if has_app_context():
+        g.pop('_login_user', None)
+    with client.session_transaction() as sessao:
+        sessao['_user_id'] = str(user_id)
+        sessao['_fresh'] = True
+
+
+@pytest.fixture
+def app(tmp_path):
+    from app import create_app, db
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'teste.db'}",
+        'BACKGROUND_SERVICES': False,
+        'ASSISTANT_ANALYTICS': False,
+        'ASSISTANT_RETRIEVAL': False,
+        'LOGIN_DISABLED': True,
+        'TESTING': True,
+    })
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.engine.dispose()
@@ -0,0 +1,69 @@
+import sqlite3
+
+import pytest
+
+from app import db
+from conftest import entrar, linha, usuario
+from services import inventory_state
+from services.switch_import import SwitchImporter
+
+
+def _get(client, etag=None):
+    resposta = client.get('/api/switches/stats', headers={'If-None-Match': etag} if etag else {})
+    # Cada requisição real tem a própria sessão; aqui o app context é o da fixture
+    db.session.remove()
+    return resposta
+
+
+@pytest.mark.parametrize('com_triggers', [True, False])
+def test_etag_changes_after_another_process_writes(app, com_triggers):
+    app.config['INVENTORY_FINGERPRINT_TTL'] = 0
+    if com_triggers:
+        inventory_state.install_version()
+    SwitchImporter(None).run([linha(f'SW-{i}') for i in range(4)])
+    client = app.test_client()
+    entrar(client, usuario('ana'))
+
+    primeira = _get(client)
+    etag = primeira.headers['ETag'].strip('"')
+    assert primeira.get_json()['total'] == 4
+    assert _get(client, etag).status_code == 304
+
+    conexao = sqlite3.connect(app.config['SQLALCHEMY_DATABASE_URI'].removeprefix('sqlite:///'))
+    conexao.execute("DELETE FROM switches WHERE id_ativo = 'SW-3'")
+    conexao.commit()
+    conexao.close()
+
+    segunda = _get(client, etag)
+    assert segunda.status_code == 200
+    assert segunda.get_json()['total'] == 3
+    assert segunda.headers['ETag'].strip('"') != etag
+
+
+def test_etag_ignores_the_process_counter(app):
+    from models.switch import inventory_version
+    from services.dashboard_stats import current_etag
+    inventory_state.install_version()
+    SwitchImporter(None).run([linha('SW-1')])
+
+    # Outro worker, com outro contador local e o mesmo banco, chega à mesma ETag
+    etag = current_etag()
+    inventory_version.bump()
+    assert current_etag() == etag
+
+
+def test_fingerprint_is_reused_until_local_write_or_ttl(app, monkeypatch):
+    SwitchImporter(None).run([linha('SW-1'), linha('SW-2')])
+    instante = [1000.0]
+    monkeypatch.setattr(inventory_state.time, 'monotonic', lambda: instante[0])
+    antes = inventory_state.database_version()
+
+    conexao = sqlite3.connect(app.config['SQLALCHEMY_DATABASE_URI'].removeprefix('sqlite:///'))
+    conexao.execute("DELETE FROM switches WHERE id_ativo = 'SW-2'")
+    conexao.commit()
+    conexao.close()
+    db.session.remove()
+
+    assert inventory_state.database_version() == antes
+    instante[0] += inventory_state.FINGERPRINT_TTL
+    assert inventory_state.database_version()[0] == 1
@@ -0,0 +1,54 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app import db
+from conftest import entrar, linha, usuario
+from services.db_routing import READ_MAX_OVERFLOW, READ_POOL_SIZE, ReadRouter, read_router
+from services.switch_import import SwitchImporter
+
+
+def _lista(client):
+    db.session.remove()
+    antes = read_router.routed
+    resposta = client.get('/api/v1/switches?fields=id_ativo,status_funcionamento')
+    assert resposta.status_code == 200
+    return read_router.routed - antes, resposta.get_json()['data']
+
+
+def test_read_pool_follows_config(app):
+    assert read_router.engine.pool.size() == READ_POOL_SIZE
+    assert read_router.engine.pool._max_overflow == READ_MAX_OVERFLOW
+
+    app.config.update(READ_POOL_SIZE=2, READ_MAX_OVERFLOW=3, READ_POOL_TIMEOUT=1)
+    engine = ReadRouter()._create_engine(app, db.engine)
+    assert (engine.pool.size(), engine.pool._max_overflow, engine.pool._timeout) == (2, 3, 1)
+    # Conexões de leitura ao mesmo arquivo não gravam, nem por engano
+    with engine.connect() as conn:
+        assert conn.execute(text('SELECT COUNT(*) FROM switches')).scalar() == 0
+        with pytest.raises(OperationalError):
+            conn.execute(text("DELETE FROM switches"))
+    engine.dispose()
+
+
+def test_read_only_views_use_read_engine_until_a_write(app):
+    SwitchImporter(None).run([linha('SW-1'), linha('SW-2')])
+    client = app.test_client()
+    entrar(client, usuario('admin', admin=True))
+
+    roteadas, dados = _lista(client)
+    assert roteadas > 0 and len(dados) == 2
+
+    db.session.remove()
+    resposta = client.post('/api/v1/switches/bulk-update',
+                           json={'ids': [1], 'set': {'status_funcionamento': 'Inativo'}})
+    assert resposta.get_json()['affected'] == 1
+
+    # Ler o que escrevi: logo depois da gravação, o mesmo usuário lê do primário
+    roteadas, dados = _lista(client)
+    assert roteadas == 0 and dados[0]['status_funcionamento'] == 'Inativo'
+
+    with client.session_transaction() as sessao:
+        sessao['ler_primario_ate'] = 0
+    roteadas, dados = _lista(client)
+    assert roteadas > 0 and dados[0]['status_funcionamento'] == 'Inativo'
@@ -0,0 +1,49 @@
+from app import db
+from conftest import linha
+from models.switch import Switch
+from services.fleet_rollups import fleet_totals, install_rollups, read_rollups, verify
+from services.switch_bulk import bulk_delete, bulk_update
+from services.switch_import import SwitchImporter
+
+FABRICANTES = ('Cisco', 'HP', 'Juniper')
+STATUS = ('Em produção', 'Inativo', 'Manutenção')
+
+
+def _frota(total=30):
+    SwitchImporter(None).run(
+        linha(f'SW-{i:03d}', fabricante=FABRICANTES[i % 3], status_funcionamento=STATUS[i % 3],
+              criticidade='Alta' if i % 4 == 0 else 'Média', valor_aquisicao=1000 + i)
+        for i in range(total)
+    )
+
+
+def _normalizar(rollups):
+    return {
+        dimensao: {valor: (quantidade, round(float(total), 2)) for valor, (quantidade, total) in valores.items()}
+        for dimensao, valores in rollups.items()
+    }
+
+
+def test_rollups_follow_bulk_update_and_delete(app):
+    assert install_rollups()
+    _frota()
+    assert verify() == []
+
+    resultado = bulk_update({'fabricante': 'HP'}, {'fabricante': 'Aruba', 'valor_aquisicao': 5000})
+    assert resultado['affected'] == 10
+    assert verify() == []
+    assert read_rollups()['fabricante']['Aruba'] == (10, 50000)
+
+    resultado = bulk_delete({'criticidade': 'Alta'})
+    assert resultado['affected'] == 8
+    assert verify() == []
+    assert fleet_totals(read_rollups())[0] == Switch.query.count() == 22
+
+
+def test_read_rollups_without_triggers_queries_switches(app):
+    _frota()
+    sem_triggers = read_rollups()
+    assert fleet_totals(sem_triggers)[0] == 30
+
+    install_rollups()
+    assert _normalizar(sem_triggers) == _normalizar(read_rollups())
@@ -0,0 +1,82 @@
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from conftest import linha
+from services import inventory_state
+from services.assistant_aggregation import build_conditions, run_aggregation
+from services.fleet_snapshot import create_snapshot
+from services.intent_parser import IntentParser
+from services.switch_import import SwitchImporter
+
+pytest.importorskip('numpy')
+
+PERGUNTAS = [
+    'Quantos switches temos?',
+    'Quantos switches ativos?',
+    'Quantos switches inativos?',
+    'Quantos switches Cisco na sede?',
+    'Quantos switches HP na filial?',
+    'Qual o valor total dos equipamentos?',
+    'Qual o investimento total em equipamentos HP?',
+    'Quantos switches com garantia perto do vencimento?',
+    'Quantos switches com valor acima de 2500?',
+    'Quantos switches com portas livres?',
+    'Distribuição por fabricante',
+    'Quantos switches temos inativos por fabricante?',
+]
+
+
+def _frota():
+    hoje = datetime.now().date()
+    fabricantes = ('Cisco', 'HP', 'Cisco Systems', None, 'Mikrotik')
+    status = ('Em produção', 'Ativo', 'Inativo', 'Manutenção')
+    unidades = ('Sede', 'Filial Norte', 'Matriz', 'Unidade Sul')
+    SwitchImporter(None).run(
+        linha(f'SW-{i:03d}',
+              fabricante=fabricantes[i % 5],
+              status_funcionamento=status[i % 4],
+              unidade=unidades[i % 4],
+              local_detalhado='Sala da sede' if i % 7 == 0 else None,
+              valor_aquisicao=None if i % 11 == 0 else 1000 + 37 * i,
+              qtd_ports_utp=24 + i % 3 * 12,
+              ports_utp_usadas=i % 40,
+              fim_garantia=hoje + timedelta(days=i % 60 - 10) if i % 3 else None)
+        for i in range(120)
+    )
+
+
+def _normalizar(resultado):
+    return (resultado.count, round(float(resultado.total_valor or 0), 2),
+            sorted((valor or '', count, round(float(total or 0), 2)) for valor, count, total in resultado.grupos))
+
+
+@pytest.mark.parametrize('pergunta', PERGUNTAS)
+def test_snapshot_matches_sql(app, pergunta):
+    _frota()
+    snapshot = create_snapshot()
+    params = IntentParser().parse(pergunta)
+    filters, aggregations = params['filters'], params['aggregations']
+    aggregations['mostrar_lista'] = False
+
+    esperado = run_aggregation(build_conditions(filters), aggregations)
+    assert _normalizar(snapshot.aggregate(filters, aggregations)) == _normalizar(esperado)
+
+
+def test_snapshot_follows_writes_from_other_processes(app):
+    _frota()
+    inventory_state.install_version()
+    snapshot = create_snapshot()
+    params = IntentParser().parse('Quantos switches Mikrotik?')
+    assert snapshot.aggregate(params['filters'], params['aggregations']).count == 24
+
+    conexao = sqlite3.connect(app.config['SQLALCHEMY_DATABASE_URI'].removeprefix('sqlite:///'))
+    conexao.execute("DELETE FROM switches WHERE id_ativo IN ('SW-004', 'SW-009')")
+    conexao.execute("UPDATE switches SET fabricante = 'Mikrotik', hash_conteudo = 'x' WHERE id_ativo = 'SW-000'")
+    conexao.commit()
+    conexao.close()
+    db.session.rollback()
+
+    assert snapshot.aggregate(params['filters'], params['aggregations']).count == 23
@@ -0,0 +1,104 @@
+import re
+
+import pytest
+
+from services.intent_parser import IntentParser, normalize
+
+# Perguntas da ajuda do assistente e variações com acentos e grafias mistas
+PERGUNTAS = [
+    'Quantos switches temos?',
+    'Quantos switches ativos?',
+    'Quantos switches Cisco na sede?',
+    'Qual o valor total dos equipamentos?',
+    'Quanto investimos em switches ativos?',
+    'Valor dos equipamentos em manutenção',
+    'Switches Cisco',
+    'Equipamentos HP ativos',
+    'Switches na sede',
+    'Equipamentos nas filiais',
+    'Mostre switches ativos na matriz',
+    'Garantias próximas do vencimento',
+    'Equipamentos com garantia expirando',
+    'Distribuição por fabricante',
+    'Estatísticas do sistema',
+    'Mostre switches Cisco ativos na sede com garantia próxima',
+    'Qual o investimento total em equipamentos HP?',
+    'Quantos switches temos inativos por fabricante?',
+    'Liste equipamentos com mais de 20 portas ocupadas',
+    'Switches com portas livres em produção',
+    'Número de switches parados na filial',
+    'Switches com valor acima de 1500,50',
+    'Soma do custo dos equipamentos Mikrotik e TP-Link',
+]
+
+
+def _antigo(question):
+    """Testes `palavra in pergunta` de natural_language_to_sql antes do IntentParser"""
+    q = question.lower().strip()
+    filters = {"status": [], "localizacao": [], "fabricante": [], "criticidade": [],
+               "garantia_proxima": False, "valor_min": None, "valor_max": None, "ports_livres": False}
+    aggregations = {"soma_valor": False, "contagem_switches": False, "agrupar_por": None, "mostrar_lista": True}
+    palavras = {
+        "contagem": ['quantos', 'quantas', 'contagem', 'número', 'qtd', 'total'],
+        "lista": ['mostre', 'liste', 'exiba', 'mostrar', 'listar'],
+        "valor": ['valor', 'preço', 'custo', 'investimento', 'dinheiro'],
+        "localizacao": ['sede', 'filial', 'matriz', 'local', 'onde'],
+        "status": ['ativo', 'inativo', 'manutenção', 'funcionando', 'parado'],
+        "garantia": ['garantia', 'vencimento', 'vencer', 'validade'],
+        "fabricante": ['cisco', 'hp', 'dlink', 'tp-link', 'mikrotik', 'fabricante'],
+        "ports": ['portas', 'ports', 'conexões', 'livres', 'ocupadas'],
+    }
+    intencoes = {nome: any(palavra in q for palavra in lista) for nome, lista in palavras.items()}
+    if 'inativo' in q or 'manutenção' in q or 'parado' in q:
+        filters["status"].extend(["Inativo", "Manutenção", "Inativo (Manutenção)"])
+    elif 'ativo' in q or 'produção' in q or 'funcionando' in q:
+        filters["status"].extend(["Em produção", "Ativo"])
+    if 'sede' in q or 'matriz' in q:
+        filters["localizacao"].extend(["Sede", "SEDE", "Matriz"])
+    elif 'filial' in q:
+        filters["localizacao"].extend(["Filial", "Unidade"])
+    for fabricante in ['cisco', 'hp', 'dlink', 'tp-link', 'mikrotik']:
+        if fabricante in q:
+            filters["fabricante"].append(fabricante.title())
+    if any(palavra in q for palavra in ['garantia', 'vencimento', 'vencer']):
+        filters["garantia_proxima"] = True
+    valor_match = re.search(r'valor.*?(\d+[\.,]?\d*)', q)
+    if valor_match:
+        filters["valor_min"] = float(valor_match.group(1).replace(',', '.'))
+    if ('portas' in q or 'ports' in q) and ('livres' in q or 'disponíveis' in q):
+        filters["ports_livres"] = True
+    if intencoes["contagem"] and not intencoes["lista"]:
+        aggregations["contagem_switches"] = True
+        aggregations["mostrar_lista"] = False
+    if intencoes["valor"] and ('total' in q or 'soma' in q):
+        aggregations["soma_valor"] = True
+    if 'por fabricante' in q or 'distribuição' in q:
+        aggregations["agrupar_por"] = "fabricante"
+        aggregations["mostrar_lista"] = False
+    return {"filters": filters, "aggregations": aggregations, "intentions": intencoes}
+
+
+@pytest.mark.parametrize('pergunta', PERGUNTAS)
+def test_parse_matches_keyword_tests(pergunta):
+    assert IntentParser().parse(pergunta) == _antigo(pergunta)
+
+
+def test_normalized_spellings_share_the_parse():
+    parser = IntentParser()
+    base = parser.parse('Quantos switches em manutenção?')
+    for variacao in ('quantos  SWITCHES em manutencao?', 'Quantos switches em MANUTENÇÃO? '):
+        assert parser.parse(variacao) == base
+    assert normalize('  Distribuição   por Fabricante ') == 'distribuicao por fabricante'
+    assert parser.cache_info().misses == 1
+
+    # Sinônimos que o teste por substring não via
+    for grafia in ('Switches D-Link', 'switches d link', 'Switches DLINK'):
+        assert parser.parse(grafia)['filters']['fabricante'] == ['Dlink']
+    assert parser.parse('Equipamentos TPLink')['filters']['fabricante'] == ['Tp-Link']
+
+
+def test_cached_parse_is_not_shared():
+    parser = IntentParser()
+    primeiro = parser.parse('Switches Cisco')
+    primeiro['filters']['fabricante'].append('HP')
+    assert parser.parse('Switches Cisco')['filters']['fabricante'] == ['Cisco']
@@ -0,0 +1,178 @@
+import socket
+import threading
+import time
+
+import pytest
+
+from app import db
+from conftest import entrar, linha, usuario
+from models.switch import Switch
+from services.live_updates import LiveUpdates, live_updates
+from services.sse_fanout import SSEFanout
+from services.switch_import import SwitchImporter
+
+
+@pytest.fixture
+def publicador(app, monkeypatch):
+    """live_updates ligado ao app de teste, com uma thread "viva" no lugar do loop de publicação"""
+    parar = threading.Event()
+    thread = threading.Thread(target=parar.wait, daemon=True)
+    thread.start()
+    monkeypatch.setattr(live_updates, 'app', app)
+    monkeypatch.setattr(live_updates, '_thread', thread)
+    monkeypatch.setattr(live_updates, 'keepalive', 0.05)
+    monkeypatch.setattr(live_updates, '_resumo', None)
+    monkeypatch.setattr(live_updates, '_ouvintes', [])
+    yield live_updates
+    parar.set()
+
+
+def test_events_refused_without_publisher(app):
+    assert not live_updates.running
+    resposta = app.test_client().get('/api/events')
+    assert resposta.status_code == 503
+    assert live_updates.subscribers == 0
+
+
+def test_subscriber_cap_is_atomic():
+    live = LiveUpdates()
+    live.max_subscribers = 10
+    inicio = threading.Barrier(40)
+    aceitos = []
+
+    def conectar():
+        inicio.wait()
+        aceitos.append(live.try_subscribe())
+
+    threads = [threading.Thread(target=conectar) for _ in range(40)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert aceitos.count(True) == 10 and live.subscribers == 10
+    live.unsubscribe()
+    assert live.try_subscribe() and not live.try_subscribe()
+
+
+def test_stream_reads_baseline_outside_the_app_context(app, publicador):
+    SwitchImporter(None).run([linha('SW-1'), linha('SW-2', status_funcionamento='Inativo')])
+    db.session.remove()
+    recebidos = []
+
+    # Outra thread, sem o app context da fixture: como uma requisição real do servidor
+    def cliente():
+        resposta = app.test_client().get('/api/events', buffered=False)
+        partes = resposta.iter_encoded()
+        recebidos.append(resposta.status_code)
+        recebidos.extend(next(partes) for _ in range(2))
+        assert publicador.subscribers == 1
+        resposta.close()
+
+    thread = threading.Thread(target=cliente)
+    thread.start()
+    thread.join(10)
+
+    status, retry, snapshot = recebidos
+    assert status == 200 and retry.startswith(b'retry:')
+    assert b'event: snapshot' in snapshot and b'"total": 2' in snapshot and b'"ativos": 1' in snapshot
+    assert publicador.subscribers == 0
+
+
+def test_delta_reaches_subscriber(app, publicador):
+    SwitchImporter(None).run([linha('SW-1')])
+    publicador.publish()                      # referência inicial
+    eventos = publicador.events()
+    assert next(eventos).startswith(b'retry:')
+    seq, _ = publicador.full_event()
+    assert b'snapshot' in next(eventos)
+
+    Switch.query.filter_by(id_ativo='SW-1').one().status_funcionamento = 'Inativo'
+    db.session.commit()
+    assert publicador.publish() == {'ativos': 0, 'inativos': 1,
+                                    'por_status': {'Em produção': 0, 'Inativo': 1}}
+    delta = next(eventos)
+    assert delta.startswith(f'id: {seq + 1}\nevent: delta'.encode())
+
+
+@pytest.fixture
+def fanout(app, publicador):
+    """Servidor de eventos numa porta livre, alimentado pelo publicador de teste"""
+    app.config.update(LIVE_SSE_PORT=0, LIVE_SSE_MAX_SUBSCRIBERS=2)
+    servidor = SSEFanout(publicador)
+    assert servidor.init_app(app)
+    return servidor
+
+
+def _conectar(porta, cookie=None):
+    conexao = socket.create_connection(('127.0.0.1', porta), timeout=5)
+    pedido = f'GET /events HTTP/1.1\r\nHost: 127.0.0.1:{porta}\r\nOrigin: http://127.0.0.1:5000\r\n'
+    if cookie:
+        pedido += f'Cookie: {cookie}\r\n'
+    conexao.sendall((pedido + '\r\n').encode())
+    return conexao
+
+
+def _ler_ate(conexao, marcador, lido=b''):
+    while marcador not in lido:
+        parte = conexao.recv(65536)
+        if not parte:
+            break
+        lido += parte
+    return lido
+
+
+def _esperar(condicao):
+    limite = time.monotonic() + 5
+    while not condicao() and time.monotonic() < limite:
+        time.sleep(0.01)
+    return condicao()
+
+
+def test_fanout_streams_snapshot_then_deltas(app, publicador, fanout):
+    SwitchImporter(None).run([linha('SW-1')])
+    conexao = _conectar(fanout.port)
+    # Antes do estado inicial o assinante só espera: o laço não lê o banco
+    assert _esperar(lambda: fanout.subscribers == 1)
+    publicador.publish()
+    lido = _ler_ate(conexao, b'event: snapshot')
+    assert lido.startswith(b'HTTP/1.1 200 OK') and b'text/event-stream' in lido
+    assert b'Access-Control-Allow-Origin: http://127.0.0.1:5000' in lido
+    assert b'"total": 1' in lido
+
+    Switch.query.filter_by(id_ativo='SW-1').one().status_funcionamento = 'Inativo'
+    db.session.commit()
+    publicador.publish()
+    lido = _ler_ate(conexao, b'event: delta', lido)
+    assert b'"inativos": 1' in lido.split(b'event: delta', 1)[1]
+
+    conexao.close()
+    assert _esperar(lambda: fanout.subscribers == 0)
+
+
+def test_fanout_caps_subscribers_without_threads(app, publicador, fanout):
+    publicador.publish()
+    threads = threading.active_count()
+    conexoes = [_conectar(fanout.port) for _ in range(2)]
+    for conexao in conexoes:
+        _ler_ate(conexao, b'event: snapshot')
+    recusada = _conectar(fanout.port)
+    assert _ler_ate(recusada, b'\r\n\r\n').startswith(b'HTTP/1.1 503')
+    assert fanout.subscribers == 2 and threading.active_count() == threads
+    for conexao in conexoes + [recusada]:
+        conexao.close()
+    assert _esperar(lambda: fanout.subscribers == 0)
+
+
+def test_fanout_checks_session_cookie(app, publicador, fanout):
+    app.config['LOGIN_DISABLED'] = False
+    publicador.publish()
+    assert _ler_ate(_conectar(fanout.port), b'\r\n\r\n').startswith(b'HTTP/1.1 401')
+    forjado = f"{app.config['SESSION_COOKIE_NAME']}=eyJfdXNlcl9pZCI6IjEifQ.x.y"
+    assert _ler_ate(_conectar(fanout.port, forjado), b'\r\n\r\n').startswith(b'HTTP/1.1 401')
+
+    client = app.test_client()
+    entrar(client, usuario('leitor'))
+    cookie = client.get_cookie(app.config['SESSION_COOKIE_NAME'])
+    conexao = _conectar(fanout.port, f'{cookie.key}={cookie.value}')
+    assert _ler_ate(conexao, b'event: snapshot').startswith(b'HTTP/1.1 200')
+    conexao.close()
@@ -0,0 +1,104 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from config_llm import LLMClient, LLMError
+
+
+class _Stub(BaseHTTPRequestHandler):
+    """Endpoint /chat/completions que ecoa o prompt (keep-alive, HTTP/1.1)"""
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        corpo = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        servidor = self.server
+        servidor.pedidos.append((self.client_address, corpo))
+        prompt = corpo['messages'][-1]['content']
+        time.sleep(servidor.atraso)
+        if prompt == 'falhe':
+            dados, status = b'{"error": "boom"}', 500
+        else:
+            dados, status = json.dumps({'choices': [{'message': {'content': f'eco: {prompt}'}}]}).encode(), 200
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub():
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), _Stub)
+    servidor.pedidos = []
+    servidor.atraso = 0.0
+    thread = threading.Thread(target=servidor.serve_forever, daemon=True)
+    thread.start()
+    yield servidor
+    servidor.shutdown()
+    servidor.server_close()
+
+
+def _cliente(stub, **opcoes):
+    return LLMClient(api_key='', base_url=f'http://127.0.0.1:{stub.server_port}/v1', **opcoes)
+
+
+def test_cache_by_version_and_keep_alive(stub):
+    llm = _cliente(stub)
+    assert llm.is_available()
+    assert llm.complete('oi', system='contexto', version=1) == 'eco: oi'
+    assert llm.complete('oi', system='contexto', version=1) == 'eco: oi'
+    assert llm.complete('oi', system='contexto', version=2) == 'eco: oi'
+    assert llm.complete('outra', version=2) == 'eco: outra'
+
+    assert llm.stats()['calls'] == 3 and llm.stats()['cache_hits'] == 1
+    assert stub.pedidos[0][1]['messages'][0] == {'role': 'system', 'content': 'contexto'}
+    # Todas as chamadas pela mesma conexão persistente
+    assert len({endereco for endereco, _ in stub.pedidos}) == 1
+    llm.close()
+
+
+def test_concurrent_identical_prompts_share_one_call(stub):
+    stub.atraso = 0.1
+    llm = _cliente(stub, batch_window=0.05)
+    respostas = []
+    threads = [threading.Thread(target=lambda: respostas.append(llm.complete('mesma', version=1)))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert respostas == ['eco: mesma'] * 5
+    assert len(stub.pedidos) == 1
+    assert llm.stats()['deduplicated'] == 4
+    llm.close()
+
+
+def test_errors_and_timeout(stub):
+    llm = _cliente(stub)
+    with pytest.raises(LLMError, match='HTTP 500'):
+        llm.complete('falhe')
+
+    stub.atraso = 1.0
+    inicio = time.monotonic()
+    with pytest.raises(LLMError):
+        llm.complete('lenta', timeout=0.2)
+    assert time.monotonic() - inicio < 0.9
+    llm.close()
+
+
+def test_assistant_falls_back_only_without_intent(app, stub):
+    from network_system_rag import NetworkRAGSystem
+    rag = NetworkRAGSystem()
+    rag.llm = _cliente(stub)
+
+    assert 'eco: qual a capital da franca?' in rag.execute_rag_query('qual a capital da franca?')
+    assert 'eco:' not in rag.execute_rag_query('Mostre todos os switches')
+    assert len(stub.pedidos) == 1
+    rag.llm.close()
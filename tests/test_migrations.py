@@ -0,0 +1,96 @@
+import os
+import sqlite3
+import subprocess
+import sys
+
+from conftest import linha
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# O que a série acrescentou ao esquema criado por db.create_all()
+_SEM_SERIE = [
+    "DROP TRIGGER IF EXISTS trg_switches_fts_insert",
+    "DROP TRIGGER IF EXISTS trg_switches_fts_delete",
+    "DROP TRIGGER IF EXISTS trg_switches_fts_update",
+    "DROP TABLE IF EXISTS switches_fts",
+    "DROP TABLE IF EXISTS switch_rollups",
+    "DROP INDEX IF EXISTS ix_switches_status_id_ativo",
+    "DROP INDEX IF EXISTS ix_switches_criticidade_id_ativo",
+    "DROP INDEX IF EXISTS ix_switches_fabricante_valor",
+    "DROP INDEX IF EXISTS ix_switches_fim_garantia_valor",
+    "DROP INDEX IF EXISTS ix_switches_nome_switch",
+    "ALTER TABLE switches DROP COLUMN hash_conteudo",
+    "ALTER TABLE import_jobs DROP COLUMN modo",
+    "ALTER TABLE import_jobs DROP COLUMN linhas_atualizadas",
+    "ALTER TABLE import_jobs DROP COLUMN linhas_inalteradas",
+]
+
+
+def _banco_anterior(app, caminho):
+    """Banco com switches, mas com o esquema de antes da série (sem alembic_version)"""
+    from app import db
+    from services.switch_import import SwitchImporter
+    SwitchImporter(None).run([linha('SW-1'), linha('SW-2', fabricante='HP', valor_aquisicao='1.234,50')])
+    db.session.remove()
+    db.engine.dispose()
+    conexao = sqlite3.connect(caminho)
+    for comando in _SEM_SERIE:
+        conexao.execute(comando)
+    conexao.commit()
+    conexao.close()
+
+
+def test_upgrade_pre_series_database(app, tmp_path):
+    caminho = tmp_path / 'teste.db'
+    _banco_anterior(app, caminho)
+
+    # Pela CLI, como na implantação: create_app não pode consultar colunas que ainda não existem
+    processo = subprocess.run(
+        [sys.executable, '-m', 'flask', '--app', 'app:create_app', 'db', 'upgrade'],
+        cwd=RAIZ, env={**os.environ, 'DATABASE_URL': f'sqlite:///{caminho}'},
+        capture_output=True, text=True, timeout=120,
+    )
+    assert processo.returncode == 0, processo.stderr
+
+    from app import db
+    from models.switch import Switch, compute_content_hash
+    from services import fleet_rollups, inventory_state
+    from services.switch_search import switch_search
+    from services.switch_import import MODO_ATUALIZAR, SwitchImporter
+
+    switches = Switch.query.order_by(Switch.id_ativo).all()
+    assert [switch.hash_conteudo for switch in switches] == [compute_content_hash(switch) for switch in switches]
+
+    fleet_rollups.init_app(app)
+    assert fleet_rollups.enabled()
+    inventory_state.init_app(app)
+    assert inventory_state.enabled()
+    switch_search.init_app(app)
+    assert switch_search.enabled
+    assert [switch.id for switch in switch_search.filter(Switch.query, 'SW-2')] == [switches[1].id]
+    assert fleet_rollups.verify() == []
+
+    # Com o hash preenchido, reimportar o mesmo conteúdo não regrava nada
+    resultado = SwitchImporter(None, modo=MODO_ATUALIZAR).run(
+        [linha('SW-1'), linha('SW-2', fabricante='HP', valor_aquisicao='1.234,50')]
+    )
+    assert (resultado.updated, resultado.unchanged) == (0, 2)
+    assert db.session.execute(db.text('SELECT version_num FROM alembic_version')).scalar()
+
+
+def test_search_index_is_detected_not_created(app):
+    from app import db
+    from services.switch_search import installed, switch_search
+
+    # create_app só detecta: o banco da fixture não passou pelas migrações
+    assert not switch_search.enabled
+    with db.engine.connect() as conn:
+        assert not installed(conn)
+
+    from services.switch_import import SwitchImporter
+    SwitchImporter(None).run([linha('SW-1', modelo='C9500'), linha('SW-2')])
+    assert switch_search.install() and not switch_search.install()
+    assert [row[0] for row in db.session.execute(db.text(
+        "SELECT switches.id_ativo FROM switches JOIN switches_fts ON switches_fts.rowid = switches.id "
+        "WHERE switches_fts MATCH 'c9500'"
+    ))] == ['SW-1']
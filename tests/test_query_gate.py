@@ -0,0 +1,94 @@
+import threading
+import time
+
+import pytest
+
+from conftest import entrar, usuario
+from network_system_rag import network_system
+from services.query_gate import QueryBusy, QueryGate, query_gate
+from services.query_metrics import QueryTrace
+
+
+def _esperar(condicao, limite=5.0):
+    fim = time.monotonic() + limite
+    while not condicao():
+        assert time.monotonic() < fim
+        time.sleep(0.005)
+
+
+def test_single_flight_and_busy():
+    gate = QueryGate(max_concurrent=1, max_queue=1, queue_timeout=0.05)
+    liberar = threading.Event()
+    chamadas = []
+    resultados = []
+
+    def lenta():
+        chamadas.append(1)
+        liberar.wait(5)
+        return 'resposta'
+
+    threads = [threading.Thread(target=lambda: resultados.append(gate.run('k', lenta))) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    _esperar(lambda: gate.stats()['coalesced'] == 2)
+
+    # A única vaga está com o líder: quem não compartilha a execução desiste após o timeout
+    with pytest.raises(QueryBusy):
+        gate.run('outra', lambda: 'nunca')
+    assert gate.stats()['rejected'] == 1
+
+    liberar.set()
+    for thread in threads:
+        thread.join()
+    assert len(chamadas) == 1
+    assert sorted(resultados) == [('resposta', False), ('resposta', True), ('resposta', True)]
+    assert gate.run('outra', lambda: 'agora')[0] == 'agora'
+
+
+def test_route_coalesces_spellings_and_reports_own_timings(app, monkeypatch):
+    user_id = usuario('ana')
+    liberar = threading.Event()
+    chamadas = []
+
+    def consulta(question, user_id=None):
+        chamadas.append(question)
+        liberar.wait(5)
+        return f'resposta para {question}', QueryTrace()
+
+    monkeypatch.setattr(network_system, 'query_with_timings', consulta)
+    respostas = {}
+
+    def perguntar(pergunta):
+        client = app.test_client()
+        entrar(client, user_id)
+        respostas[pergunta] = client.post('/api/query', json={'question': pergunta, 'debug': True})
+
+    lider = threading.Thread(target=perguntar, args=('Quantos switches em manutenção?',))
+    lider.start()
+    _esperar(lambda: chamadas)
+    seguidor = threading.Thread(target=perguntar, args=('quantos  SWITCHES em manutencao?',))
+    seguidor.start()
+    _esperar(lambda: query_gate.stats()['coalesced'] == 1)
+    liberar.set()
+    lider.join()
+    seguidor.join()
+
+    assert chamadas == ['Quantos switches em manutenção?']
+    primeira = respostas['Quantos switches em manutenção?'].get_json()
+    segunda = respostas['quantos  SWITCHES em manutencao?'].get_json()
+    assert primeira['response'] == segunda['response']
+    assert (primeira['coalesced'], segunda['coalesced']) == (False, True)
+    assert primeira['timings']['total_ms'] >= 0 and segunda['timings'] is None
+
+
+def test_route_answers_503_when_full(app, monkeypatch):
+    entrar(client := app.test_client(), usuario('ana'))
+    query_gate.configure(1, 1, 0.05)
+    query_gate.acquire()
+    try:
+        resposta = client.post('/api/query', json={'question': 'Quantos switches?'})
+    finally:
+        query_gate.release()
+    assert resposta.status_code == 503
+    assert resposta.headers['Retry-After'] == '1'
+    assert resposta.get_json()['busy'] is True
@@ -0,0 +1,66 @@
+import time
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app import db
+from conftest import entrar, linha, usuario
+from network_system_rag import NetworkRAGSystem
+from services.query_metrics import QueryMetrics, QueryTrace, end_trace, stage, start_trace
+from services.switch_import import SwitchImporter
+
+
+def test_query_records_stage_and_sql_times(app):
+    SwitchImporter(None).run([linha(f'SW-{i}') for i in range(3)])
+    rag = NetworkRAGSystem()
+
+    resposta, trace = rag.query_with_timings('Quantos switches Cisco?')
+    assert 'Cisco**: 3' in resposta
+    tempos = trace.to_dict()
+    assert all(tempos[f'{etapa}_ms'] > 0 for etapa in ('parse', 'build', 'execute', 'format'))
+    assert tempos['sql_statements'] >= 2   # impressão digital do inventário + a agregação
+    assert 0 < tempos['sql_ms'] <= tempos['total_ms']
+    assert sum(tempos[f'{etapa}_ms'] for etapa in ('parse', 'build', 'execute', 'format')) <= tempos['total_ms']
+
+    # Do cache: a agregação não volta ao banco
+    _, repetida = rag.query_with_timings('Quantos switches Cisco?')
+    assert repetida.sql_statements < tempos['sql_statements']
+
+
+def test_failed_statement_leaves_no_pending_start(app):
+    trace = start_trace()
+    with stage('execute'):
+        with pytest.raises(OperationalError):
+            db.session.execute(text('SELECT * FROM tabela_que_nao_existe'))
+        db.session.rollback()
+        time.sleep(0.05)
+        db.session.execute(text('SELECT 1'))
+    end_trace()
+    # Só o comando que terminou conta, e sem a espera entre os dois
+    assert trace.sql_statements == 1
+    assert trace.sql_time < 0.04
+    assert trace.timings['execute'] >= 0.05
+
+
+def test_percentiles_over_window():
+    metricas = QueryMetrics(window=100)
+    for ms in range(1, 151):
+        trace = QueryTrace()
+        trace.total = ms / 1000
+        metricas.record(trace)
+    resumo = metricas.snapshot()
+    assert resumo['queries'] == 150
+    # Janela com as 100 últimas (51..150 ms), nearest-rank
+    assert resumo['stages']['total'] == {'p50': 100.0, 'p95': 145.0, 'p99': 149.0, 'max': 150.0}
+
+
+def test_metrics_endpoint_is_admin_only(app):
+    client = app.test_client()
+    entrar(client, usuario('ana'))
+    assert client.get('/api/admin/metrics').status_code == 403
+
+    entrar(client, usuario('admin', admin=True))
+    resposta = client.get('/api/admin/metrics')
+    assert resposta.status_code == 200
+    assert {'metrics', 'admission', 'cache'} <= resposta.get_json().keys()
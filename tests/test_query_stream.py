@@ -0,0 +1,53 @@
+import json
+
+from conftest import linha
+from services.switch_import import SwitchImporter
+
+PERGUNTA = 'Liste os switches ativos'
+
+
+def _eventos(client, **corpo):
+    resposta = client.post('/api/query', json={'question': PERGUNTA, 'stream': True, **corpo})
+    assert resposta.status_code == 200
+    assert resposta.mimetype == 'application/x-ndjson'
+    corpo = resposta.get_data(as_text=True)
+    # Um objeto JSON completo por linha, cada linha terminada em \n
+    assert corpo.endswith('\n')
+    return [json.loads(texto) for texto in corpo.split('\n')[:-1]]
+
+
+def test_stream_pages_rows_and_cursor(app):
+    SwitchImporter(None).run(
+        linha(f'SW-{i:04d}', status_funcionamento='Em produção' if i % 5 else 'Inativo') for i in range(700)
+    )
+    client = app.test_client()
+
+    eventos = _eventos(client)
+    assert eventos[0]['type'] == 'header' and eventos[0]['total'] == 560
+    assert [evento['type'] for evento in eventos[1:-1]] == ['rows'] * 10
+    assert [evento['count'] for evento in eventos[1:-1]] == [50] * 10
+    assert eventos[-1]['type'] == 'end' and eventos[-1]['cursor']
+
+    # A página seguinte não repete o cabeçalho e termina sem cursor
+    seguinte = _eventos(client, cursor=eventos[-1]['cursor'])
+    assert [evento['type'] for evento in seguinte] == ['rows', 'rows', 'end']
+    assert sum(evento['count'] for evento in seguinte[:-1]) == 60
+    assert seguinte[-1]['cursor'] is None
+
+    ativos = [trecho.split('**')[1] for evento in eventos[1:-1] + seguinte[:-1]
+              for trecho in evento['response'].split('\n') if trecho.startswith('🟢')]
+    assert len(ativos) == len(set(ativos)) == 560
+    assert ativos == sorted(ativos)
+
+
+def test_stream_aggregation_and_bad_cursor(app):
+    SwitchImporter(None).run([linha('SW-1'), linha('SW-2')])
+    client = app.test_client()
+
+    resposta = client.post('/api/query', json={'question': 'Quantos switches?', 'stream': True})
+    eventos = [json.loads(texto) for texto in resposta.get_data(as_text=True).splitlines()]
+    assert [evento['type'] for evento in eventos] == ['header', 'end']
+    assert 'Switches**: 2' in eventos[0]['response']
+
+    eventos = _eventos(client, cursor='nao-e-um-cursor')
+    assert [evento['type'] for evento in eventos] == ['error']
@@ -0,0 +1,53 @@
+import sqlite3
+
+import pytest
+
+from app import db
+from conftest import linha
+from models.switch import Switch, inventory_version
+from network_system_rag import NetworkRAGSystem
+from services import inventory_state
+from services.switch_import import SwitchImporter
+
+PERGUNTA = 'Quantos switches Cisco?'
+
+
+@pytest.fixture
+def rag(app):
+    SwitchImporter(None).run([linha(f'SW-{i}', fabricante='Cisco' if i < 3 else 'HP') for i in range(5)])
+    return NetworkRAGSystem()
+
+
+def _outro_processo(app, sql):
+    """Gravação por outra conexão: não passa pelos eventos da sessão nem pelo contador local"""
+    conexao = sqlite3.connect(app.config['SQLALCHEMY_DATABASE_URI'].removeprefix('sqlite:///'))
+    conexao.execute(sql)
+    conexao.commit()
+    conexao.close()
+
+
+def test_cached_answer_until_this_process_writes(rag):
+    assert 'Cisco**: 3' in rag.execute_rag_query(PERGUNTA)
+    assert 'Cisco**: 3' in rag.execute_rag_query(PERGUNTA)
+    assert rag.result_cache.stats()['hits'] == 1
+
+    switch = Switch.query.filter_by(id_ativo='SW-4').one()
+    switch.fabricante = 'Cisco'
+    db.session.commit()
+    assert 'Cisco**: 4' in rag.execute_rag_query(PERGUNTA)
+
+
+@pytest.mark.parametrize('com_triggers', [True, False])
+def test_cached_answer_drops_after_another_process_writes(app, rag, com_triggers):
+    app.config['INVENTORY_FINGERPRINT_TTL'] = 0
+    if com_triggers:
+        assert inventory_state.install_version()
+    assert inventory_state.enabled() is com_triggers
+    assert 'Cisco**: 3' in rag.execute_rag_query(PERGUNTA)
+    versao_local = inventory_version.value
+
+    _outro_processo(app, "UPDATE switches SET fabricante = 'Cisco', data_atualizacao = '2030-01-01' "
+                         "WHERE id_ativo = 'SW-4'")
+    db.session.rollback()   # fim da transação de leitura anterior desta sessão
+    assert inventory_version.value == versao_local
+    assert 'Cisco**: 4' in rag.execute_rag_query(PERGUNTA)
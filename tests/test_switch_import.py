@@ -0,0 +1,186 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import text
+
+from app import db
+from conftest import entrar, escrever_csv, linha, usuario
+from models.import_job import ImportJob
+from models.switch import Switch
+from services.import_jobs import import_jobs
+from models.switch import compute_content_hash
+from services.switch_bulk import bulk_update
+from services.switch_import import MODO_ATUALIZAR, MODO_INSERIR, SwitchImporter
+
+
+class Queda(BaseException):
+    """Simula o processo morrendo no meio da importação (não é tratada por _run)"""
+
+
+def _job(caminho, modo=MODO_INSERIR, worker_id=None, **campos):
+    job = ImportJob(id=uuid.uuid4().hex, arquivo='teste.csv', caminho_arquivo=str(caminho),
+                    status='pendente', modo=modo, worker_id=worker_id, **campos)
+    db.session.add(job)
+    db.session.commit()
+    return job.id
+
+
+def test_upsert_counts(app):
+    SwitchImporter(None).run([linha(f'SW-{i}') for i in range(5)])
+
+    rows = [linha('SW-0'), linha('SW-1'),
+            linha('SW-2', fabricante='HP'), linha('SW-3', valor_aquisicao=2000),
+            linha('SW-9')]
+    result = SwitchImporter(None, modo=MODO_ATUALIZAR).run(rows)
+    assert (result.imported, result.updated, result.unchanged, result.rejected) == (1, 2, 2, 0)
+    assert db.session.query(Switch.fabricante).filter_by(id_ativo='SW-2').scalar() == 'HP'
+
+    # Reimportar o mesmo arquivo no modo atualizar não regrava nada
+    result = SwitchImporter(None, modo=MODO_ATUALIZAR).run(rows)
+    assert (result.imported, result.updated, result.unchanged) == (0, 0, 5)
+
+    result = SwitchImporter(None, modo=MODO_INSERIR).run(rows)
+    assert result.rejected == 5
+    assert result.errors[0] == 'Switch SW-0 já existe'
+
+
+def test_bulk_update_marks_hash_stale_for_next_import(app):
+    planilha = [linha('SW-1'), linha('SW-2'), linha('SW-3', fabricante='HP')]
+    SwitchImporter(None).run(planilha)
+
+    assert bulk_update({'fabricante': 'Cisco'}, {'modelo': 'C9200'})['affected'] == 2
+    db.session.expire_all()
+    assert [switch.hash_conteudo is None for switch in Switch.query.order_by(Switch.id_ativo)] == [True, True, False]
+
+    # A planilha antiga desfaz a alteração em massa e grava o hash de novo
+    resultado = SwitchImporter(None, modo=MODO_ATUALIZAR).run(planilha)
+    assert (resultado.updated, resultado.unchanged) == (2, 1)
+    switches = Switch.query.order_by(Switch.id_ativo).all()
+    assert {switch.modelo for switch in switches} == {'C9300'}
+    assert [switch.hash_conteudo for switch in switches] == [compute_content_hash(switch) for switch in switches]
+    assert SwitchImporter(None, modo=MODO_ATUALIZAR).run(planilha).unchanged == 3
+
+
+def test_fallback_rows_commit_with_checkpoint(app):
+    """Linhas do lote gravadas uma a uma só persistem junto com o checkpoint"""
+    SwitchImporter(None).run([linha('SW-3')])
+    rows = [linha(f'SW-{i}') for i in range(6)]
+
+    def falha(result):
+        raise Queda()
+
+    importer = SwitchImporter(None, on_chunk=falha)
+    for row in rows:   # sem load_existing_ids: SW-3 só falha no INSERT
+        importer.result.rows += 1
+        importer.map_row(row)
+    with pytest.raises(Queda):
+        importer.flush_chunk()
+    db.session.rollback()
+    assert Switch.query.count() == 1
+
+    checkpoints = []
+    importer = SwitchImporter(None, on_chunk=lambda result: checkpoints.append(result.imported))
+    for row in rows:
+        importer.result.rows += 1
+        importer.map_row(row)
+    importer.flush_chunk()
+    assert Switch.query.count() == 6
+    assert importer.result.imported == 5 and checkpoints == [5]
+    assert importer.result.errors == ['Erro na linha SW-3: UNIQUE constraint failed: switches.id_ativo']
+
+
+def test_resume_from_checkpoint(app, tmp_path, monkeypatch):
+    caminho = tmp_path / 'inventario.csv'
+    escrever_csv(caminho, [linha(f'SW-{i:02d}') for i in range(23)])
+    monkeypatch.setattr(import_jobs, 'chunk_size', 5)
+    job_id = _job(caminho, worker_id=import_jobs.worker_id)
+
+    # O processo morre no terceiro lote: ficam os dois primeiros e o checkpoint deles
+    flush_original = SwitchImporter.flush_chunk
+    lotes = []
+
+    def flush_com_queda(self):
+        lotes.append(1)
+        if len(lotes) == 3:
+            raise Queda()
+        flush_original(self)
+
+    monkeypatch.setattr(SwitchImporter, 'flush_chunk', flush_com_queda)
+    with pytest.raises(Queda):
+        import_jobs._run(job_id)
+    monkeypatch.setattr(SwitchImporter, 'flush_chunk', flush_original)
+
+    job = db.session.get(ImportJob, job_id)
+    assert (job.status, job.checkpoint_linha, job.linhas_inseridas) == ('executando', 10, 10)
+    assert Switch.query.count() == 10
+
+    # Outro worker assume o job parado e continua do checkpoint
+    ImportJob.query.filter_by(id=job_id).update({
+        'worker_id': 'morto', 'atualizado_em': datetime.utcnow() - timedelta(hours=1)
+    })
+    db.session.commit()
+    assert import_jobs.claim(job_id)
+    import_jobs._run(job_id)
+
+    job = db.session.get(ImportJob, job_id)
+    assert job.status == 'concluido'
+    assert (job.linhas_lidas, job.linhas_inseridas, job.linhas_rejeitadas) == (23, 23, 0)
+    assert job.error_list == []
+    assert Switch.query.count() == 23
+
+
+def test_claim_only_stale_or_unowned_jobs(app, tmp_path):
+    caminho = tmp_path / 'inventario.csv'
+    escrever_csv(caminho, [linha('SW-1')])
+    job_id = _job(caminho, worker_id='outro')
+
+    # Dono vivo: nem claim nem _run mexem no job
+    assert not import_jobs.claim(job_id)
+    import_jobs._run(job_id)
+    job = db.session.get(ImportJob, job_id)
+    assert (job.status, job.worker_id) == ('pendente', 'outro')
+    assert Switch.query.count() == 0
+
+    db.session.execute(text('UPDATE import_jobs SET atualizado_em = :antes WHERE id = :id'),
+                       {'antes': datetime.utcnow() - timedelta(hours=1), 'id': job_id})
+    db.session.commit()
+    assert import_jobs.claim(job_id)
+    assert not import_jobs.claim(job_id)
+    import_jobs._run(job_id)
+    assert db.session.get(ImportJob, job_id).status == 'concluido'
+    assert Switch.query.count() == 1
+
+
+def test_job_status_is_private_and_read_only(app, tmp_path):
+    caminho = tmp_path / 'inventario.csv'
+    escrever_csv(caminho, [linha('SW-1')])
+    dono, outro, admin = usuario('dono'), usuario('outro'), usuario('admin', admin=True)
+    job_id = _job(caminho, worker_id='morto', criado_por=dono,
+                  atualizado_em=datetime.utcnow() - timedelta(hours=1))
+    client = app.test_client()
+
+    entrar(client, outro)
+    assert client.get(f'/api/import-jobs/{job_id}').status_code == 404
+    for user_id in (dono, admin):
+        entrar(client, user_id)
+        resposta = client.get(f'/api/import-jobs/{job_id}')
+        assert resposta.status_code == 200
+        assert resposta.get_json()['job']['status'] == 'pendente'
+
+    # Consultar o progresso não assume o job parado
+    db.session.expire_all()
+    assert db.session.get(ImportJob, job_id).worker_id == 'morto'
+
+
+def test_resume_stale_takes_over_dead_jobs(app, tmp_path):
+    caminho = tmp_path / 'inventario.csv'
+    escrever_csv(caminho, [linha(f'SW-{i}') for i in range(3)])
+    parado = _job(caminho, worker_id='morto', atualizado_em=datetime.utcnow() - timedelta(hours=1))
+    vivo = _job(caminho, worker_id='outro')
+
+    assert import_jobs.resume_stale() == [parado]
+    import_jobs._futures[parado].result(timeout=10)
+    db.session.expire_all()
+    assert db.session.get(ImportJob, parado).status == 'concluido'
+    assert db.session.get(ImportJob, vivo).worker_id == 'outro'
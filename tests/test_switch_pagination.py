@@ -0,0 +1,94 @@
+import pytest
+
+from conftest import linha
+from models.switch import Switch
+from services.switch_import import SwitchImporter
+from services.switch_pagination import keyset_page, ranked_page, switch_page
+from services.switch_search import switch_search
+
+
+@pytest.fixture
+def frota(app):
+    # Banco de teste sem migrações: índice FTS como em produção
+    switch_search.install()
+    # id_ativo fora da ordem de inserção: a ordem por (id_ativo, id) difere da de id
+    SwitchImporter(None).run(linha(f'SW-{(i * 7) % 45:03d}', local_detalhado=f'Sala {i % 5}') for i in range(45))
+    return [row.id for row in Switch.query.order_by(Switch.id_ativo, Switch.id)]
+
+
+def test_keyset_cursor_continuation(frota):
+    paginas, cursor = [], None
+    while True:
+        pagina = keyset_page(Switch.query, cursor, 10)
+        paginas.append([switch.id for switch in pagina.items])
+        if not pagina.has_next:
+            break
+        cursor = pagina.next_cursor
+
+    assert [len(ids) for ids in paginas] == [10, 10, 10, 10, 5]
+    assert sum(paginas, []) == frota
+    assert not keyset_page(Switch.query, None, 10).has_prev
+
+    # Voltando da última página chega-se à penúltima, com os mesmos itens
+    anterior = keyset_page(Switch.query, pagina.prev_cursor, 10)
+    assert [switch.id for switch in anterior.items] == paginas[-2]
+    assert anterior.has_next and anterior.has_prev
+
+
+def test_keyset_with_filter(frota):
+    query = Switch.query.filter(Switch.local_detalhado == 'Sala 1')
+    esperado = [switch.id for switch in query.order_by(Switch.id_ativo, Switch.id)]
+    vistos, cursor = [], None
+    while True:
+        pagina = keyset_page(query, cursor, 4)
+        vistos += [switch.id for switch in pagina.items]
+        if not pagina.has_next:
+            break
+        cursor = pagina.next_cursor
+    assert vistos == esperado
+
+
+def test_search_pages_keep_relevance_order(frota):
+    if not switch_search.enabled:
+        pytest.skip('SQLite sem FTS5')
+    busca = lambda: switch_search.filter(Switch.query, 'sala 1')
+    esperado = [switch.id for switch in busca().order_by(Switch.id)]
+
+    vistos, cursor = [], None
+    while True:
+        pagina = switch_page(busca(), cursor, 4, search=True)
+        vistos += [switch.id for switch in pagina.items]
+        if not pagina.has_next:
+            break
+        cursor = pagina.next_cursor
+    assert vistos == esperado
+
+
+def test_cursor_kinds_are_not_interchangeable(frota):
+    keyset = keyset_page(Switch.query, None, 10).next_cursor
+    ranked = ranked_page(Switch.query, None, 10).next_cursor
+    with pytest.raises(ValueError):
+        ranked_page(Switch.query, keyset, 10)
+    with pytest.raises(ValueError):
+        keyset_page(Switch.query, ranked, 10)
+    with pytest.raises(ValueError):
+        keyset_page(Switch.query, 'nao-e-um-cursor', 10)
+
+
+def test_cached_total_sees_other_processes(frota, app):
+    import sqlite3
+    from app import db
+    from services.inventory_state import install_version
+    from services.switch_pagination import cached_total
+
+    install_version()
+    cisco = lambda: cached_total(Switch.query.filter_by(fabricante='Cisco'), {'fabricante': 'Cisco'})
+    assert cisco() == 45
+
+    # Outro worker apaga direto no banco: o contador deste processo não muda
+    conexao = sqlite3.connect(app.config['SQLALCHEMY_DATABASE_URI'].removeprefix('sqlite:///'))
+    conexao.execute("DELETE FROM switches WHERE id_ativo IN ('SW-000', 'SW-001')")
+    conexao.commit()
+    conexao.close()
+    db.session.remove()
+    assert cisco() == 43
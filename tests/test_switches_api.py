@@ -0,0 +1,46 @@
+from conftest import linha
+from services.switch_import import SwitchImporter
+
+
+def _frota(quantidade=25):
+    SwitchImporter(None).run(
+        linha(f'SW-{(i * 7) % quantidade:03d}', fabricante='HP' if i % 3 == 0 else 'Cisco', valor_aquisicao='1.500,25')
+        for i in range(quantidade)
+    )
+
+
+def test_sparse_fieldsets(app):
+    _frota(3)
+    client = app.test_client()
+
+    dados = client.get('/api/v1/switches?fields=id_ativo,valor_aquisicao,id_ativo').get_json()['data']
+    assert dados[0] == {'id_ativo': 'SW-000', 'valor_aquisicao': 1500.25}
+
+    completo = client.get('/api/v1/switches?limit=1').get_json()['data'][0]
+    assert 'fabricante' in completo and 'hash_conteudo' not in completo and 'data_criacao' not in completo
+
+    resposta = client.get('/api/v1/switches?fields=id_ativo,senha')
+    assert resposta.status_code == 400 and 'senha' in resposta.get_json()['message']
+
+    switch_id = client.get('/api/v1/switches?fields=id&limit=1').get_json()['data'][0]['id']
+    assert client.get(f'/api/v1/switches/{switch_id}?fields=fabricante').get_json()['data'] == {'fabricante': 'HP'}
+    assert client.get('/api/v1/switches/999').status_code == 404
+
+
+def test_cursor_walks_filtered_collection_once(app):
+    _frota()
+    client = app.test_client()
+
+    vistos, cursor = [], None
+    while True:
+        url = '/api/v1/switches?fabricante=HP&fields=id_ativo&limit=3&count=1'
+        payload = client.get(url + (f'&cursor={cursor}' if cursor else '')).get_json()
+        assert payload['total'] == 9
+        vistos += [item['id_ativo'] for item in payload['data']]
+        cursor = payload['next_cursor']
+        if cursor is None:
+            break
+    assert vistos == sorted(f'SW-{(i * 7) % 25:03d}' for i in range(0, 25, 3))
+
+    assert client.get('/api/v1/switches?limit=0').status_code == 400
+    assert client.get('/api/v1/switches?cursor=lixo').status_code == 400
@@ -0,0 +1,68 @@
+import pytest
+
+from conftest import linha
+from models.switch import Switch
+from network_system_rag import NetworkRAGSystem
+from services.switch_import import SwitchImporter
+from services.switch_search import switch_search
+from services.vector_index import create_index, fuse_rankings
+
+pytest.importorskip('numpy')
+
+
+def _frota():
+    SwitchImporter(None).run([
+        linha('SW-CORE-01', modelo='C9500', rack='B4', versao_so_firmware='17.3.4', responsavel_tecnico='Marta'),
+        linha('SW-ACC-02', modelo='C9300', rack='B4', versao_so_firmware='16.9.1', responsavel_tecnico='Joao'),
+        linha('SW-ACC-03', modelo='C9300', rack='C1', versao_so_firmware='17.3.4', responsavel_tecnico='Joao'),
+        linha('SW-DIST-04', modelo='C9400', rack='C2', versao_so_firmware='16.12.5', responsavel_tecnico='Rita',
+              observacoes='uplink redundante para o datacenter'),
+    ])
+
+
+def test_index_ranks_by_shared_rare_terms(app):
+    _frota()
+    index = create_index()
+    ids = {switch.id_ativo: switch.id for switch in Switch.query}
+
+    resultado = index.search('firmware 17.3.4 no rack B4')
+    assert resultado[0][0] == ids['SW-CORE-01']
+    assert {switch_id for switch_id, _ in resultado} == {ids['SW-CORE-01'], ids['SW-ACC-02'], ids['SW-ACC-03']}
+    assert [score for _, score in resultado] == sorted((score for _, score in resultado), reverse=True)
+
+    assert index.search('datacenter')[0][0] == ids['SW-DIST-04']
+    assert index.search('xyz inexistente') == []
+
+
+def test_fuse_rankings_prefers_ids_in_both_lists():
+    assert fuse_rankings([1, 2, 3], [3, 4]) == [3, 1, 2, 4]
+    assert fuse_rankings([5, 6], []) == [5, 6]
+    assert fuse_rankings([1, 2, 3], [3, 4], limit=2) == [3, 1]
+
+
+def test_free_text_only_without_list_intent(app):
+    _frota()
+    rag = NetworkRAGSystem()
+    rag.enable_retrieval()
+
+    resposta = rag.execute_rag_query('rack B4 com firmware 17.3.4')
+    assert 'Busca por texto' in resposta
+    assert resposta.index('SW-CORE-01') < resposta.index('SW-ACC-02')
+
+    # Pedido de listagem sem filtros reconhecidos vai para a listagem, não para a busca
+    resposta = rag.execute_rag_query('Liste equipamentos com mais de 20 portas ocupadas')
+    assert 'Busca por texto' not in resposta
+    assert 'Total encontrado: 4 switches' in resposta
+
+
+def test_fts_and_index_hits_are_merged(app):
+    assert switch_search.install()
+    _frota()
+    rag = NetworkRAGSystem()
+    rag.enable_retrieval()
+
+    # "datacenter" só está em observações (fora da FTS); "C9300" casa na FTS
+    resposta = rag.execute_rag_query('C9300 datacenter')
+    assert {'SW-ACC-02', 'SW-ACC-03', 'SW-DIST-04'} <= {
+        trecho.split('**')[1] for trecho in resposta.split('\n') if trecho.startswith(('🟢', '🔴'))
+    }